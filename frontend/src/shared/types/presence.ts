@@ -5,6 +5,58 @@ export type Presence = {
   verified: boolean;
 };
 
+export type RestartStats = {
+  crashes: number;
+  consecutive_crashes: number;
+  restarts: number;
+  hangs: number;
+  last_exit_code: number | null;
+  last_exit_at: number | null;
+  next_restart_at: number | null;
+  restart_in?: number;
+  crash_loop: boolean;
+};
+
+export type PresenceMetrics = {
+  pid: number;
+  cpu_time: number;
+  cpu_scope: "thread" | "process";
+  cpu_percent: number | null;
+  rss: number | null;
+  threads: number;
+  ticks: number;
+  tick_avg_ms: number | null;
+  tick_max_ms: number | null;
+  tick_histogram: {
+    bounds_ms: number[];
+    counts: number[];
+  };
+  uptime: number;
+  sampled_at: number;
+  age: number;
+  running: boolean;
+  hosted: boolean;
+};
+
+export type PresenceMetricsReport = {
+  presences: Record<string, PresenceMetrics>;
+  total: {
+    running: number;
+    cpu_percent: number;
+    rss: number;
+    processes: number;
+  };
+};
+
+export type PresenceProfile = {
+  status?: "running" | "done" | "failed";
+  seconds?: number;
+  samples?: number;
+  path?: string;
+  finished_at?: number;
+  error?: string;
+};
+
 export type InstalledPresence = Presence & {
   path: string;
   entrypoint: string;
@@ -14,7 +66,11 @@ export type InstalledPresence = Presence & {
   backoff_time: number;
   on_exit: any;
   runs: number;
+  startup_latency: number | null;
+  restart_stats: RestartStats;
   running: boolean;
+  armed: boolean;
+  matches: string[];
   image: string;
 };
 
@@ -1,3 +1,8 @@
+import type {
+  PresenceMetricsReport,
+  PresenceProfile,
+} from "../shared/types/presence";
+
 export {};
 
 declare global {
@@ -14,6 +19,15 @@ declare global {
         stop_presence(name: string): Promise<void>;
         get_remote_presences(): Promise<RemotePresence[]>;
         install_remote_presence(name: string): Promise<ResultState>;
+        install_remote_presences(
+          names: string[],
+        ): Promise<Record<string, ResultState>>;
+        get_presence_metrics(): Promise<PresenceMetricsReport>;
+        profile_presence(
+          name: string,
+          seconds?: number,
+        ): Promise<{ status: "started"; seconds: number }>;
+        get_presence_profile(name: string): Promise<PresenceProfile>;
         remove_installed_presence(name: string): Promise<ResultState>;
         is_discord_running(): Promise<boolean>;
         get_network_processes(): Promise<any[]>;
@@ -5,25 +5,20 @@ Main entry point for the application.
 import os
 from pathlib import Path
 import socket
+import time
 import threading
 from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
-import webview
-from dotenv import load_dotenv
 
-env_path = Path(__file__).parent / ".env"
-load_dotenv(dotenv_path=env_path)
-
-from src.api import RPPApi
-from src.constants import config
-from src.browser_manager import BrowserManager
-from src.presence_manager import PresenceManager
-from src.runtime import Runtime
-from src.user import get_user_settings
-from src.logger import logger, set_log_level
+# The application is only imported by start(): worker processes started with
+# spawn import this module as __mp_main__ and must not load webview, the API
+# and the managers.
 
 
 def serve_dist(directory: Path, port: int) -> None:
     """Serve static files from the given directory on the specified port."""
+    # pylint: disable=import-outside-toplevel
+    from src.logger import logger
+
     handler_class = SimpleHTTPRequestHandler
     prev_cwd = Path.cwd()
     try:
@@ -46,6 +41,22 @@ def find_free_port() -> int:
 
 def start():
     """Start the main application and webview window."""
+    # pylint: disable=import-outside-toplevel
+    from dotenv import load_dotenv
+
+    # before any src import: the config reads the environment
+    load_dotenv(dotenv_path=Path(__file__).parent / ".env")
+
+    import webview
+    from src.api import RPPApi
+    from src.constants import config
+    from src.browser_manager import BrowserManager
+    from src.presence_manager import PresenceManager
+    from src.runtime import Runtime
+    from src.user import get_user_settings
+    from src.logger import logger, set_log_level
+
+    logger.info("Starting application...")
     logger.info("Starting backend...")
     user_settings = get_user_settings()
     set_log_level(user_settings.logs_level)
@@ -63,7 +74,7 @@ def start():
     def load_managers() -> None:
         """Load browser and presence managers in background."""
         bm.load()
-        presence_manager.discover(force=True, dev=config.development_mode)
+        presence_manager.discover(dev=config.development_mode)
         rt.load(True)
 
     background_thread = threading.Thread(target=load_managers, daemon=True)
@@ -116,14 +127,15 @@ def start():
 
     finally:
         logger.info("Shutting down...")
+        shutdown_started = time.monotonic()
         try:
-            pm.stop_all()
+            pm.shutdown()
             if api.custom_presence.is_connected:
                 api.custom_presence.disconnect()
         except Exception as exc:
             logger.error("Error stopping presences: %s", exc)
+        logger.info("Shutdown completed in %.2fs", time.monotonic() - shutdown_started)
 
 
 if __name__ == "__main__":
-    logger.info("Starting application...")
     start()
@@ -55,7 +55,7 @@ def main(
             page = get_last_netflix_page(runtime)
             if page is None:
                 logger.debug("No Netflix page found")
-                stop_event.wait(interval)
+                runtime.wait_for_pages(interval, stop_event)
                 continue
 
             page.connect_if_needed()
@@ -4,6 +4,9 @@ from typing import Optional
 import requests
 from src.logger import logger
 
+# seconds; a stalled request must not hang the presence
+REQUEST_TIMEOUT = 10
+
 
 def get_last_roblox_log(log_path: Optional[str]) -> Optional[str]:
     """
@@ -30,7 +33,7 @@ def make_request(url: str) -> Optional[dict]:
     Make a GET request
     """
     try:
-        response = requests.get(url)
+        response = requests.get(url, timeout=REQUEST_TIMEOUT)
         response.raise_for_status()
         return response.json().get("data", [])[0]
     except requests.RequestException as e:
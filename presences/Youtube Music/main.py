@@ -100,7 +100,7 @@ def main(rpc: ClientRPC, runtime: Optional[Runtime], interval: int, stop_event:
                     was_idle = True
 
                 logger.debug("No YouTube Music pages detected. Waiting 5 seconds.")
-                stop_event.wait(5)
+                runtime.wait_for_pages(5, stop_event)
                 continue
 
             # There are pages, reset idle flag
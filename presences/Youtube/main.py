@@ -139,7 +139,8 @@ def main(
                         logger.debug("Idle RPC update failed", exc_info=True)
                     state.cleanup()
                     was_idle = True
-                stop_event.wait(interval)
+                # wake up as soon as a tab opens instead of after a full interval
+                runtime.wait_for_pages(interval, stop_event)
                 continue
 
             was_idle = False
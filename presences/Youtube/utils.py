@@ -4,11 +4,21 @@ from urllib.parse import parse_qs, urlparse
 from src.logger import logger
 from src.runtime import Page
 
+# video metadata only changes with the URL, so it can be memoized per URL
+METADATA_CACHE_TTL = 60.0
 
-def eval_page(page: Page, expression: str, timeout: float = 3.0) -> Any:
+
+def eval_page(
+    page: Page,
+    expression: str,
+    timeout: float = 3.0,
+    cache_ttl: Optional[float] = None,
+) -> Any:
     """Evaluate JS on the page and return the result (safe wrapper)."""
     try:
-        return page.evaluate(expression, return_by_value=True, timeout=timeout)
+        return page.evaluate(
+            expression, return_by_value=True, timeout=timeout, cache_ttl=cache_ttl
+        )
     except Exception:
         logger.debug("JS evaluation failed on page %s: %s", page.id, exc_info=True)
         return None
@@ -32,7 +42,7 @@ def extract_title(page: Page) -> Optional[str]:
             return null;
         }
     })();"""
-    return eval_page(page, js) or None
+    return eval_page(page, js, cache_ttl=METADATA_CACHE_TTL) or None
 
 
 def extract_shorts_title(page: Page) -> Optional[str]:
@@ -59,7 +69,7 @@ def extract_author(page: Page) -> Optional[str]:
             return null;
         }
     })();"""
-    return eval_page(page, js) or None
+    return eval_page(page, js, cache_ttl=METADATA_CACHE_TTL) or None
 
 
 def extract_shorts_author(page: Page) -> Optional[str]:
@@ -69,7 +79,7 @@ def extract_shorts_author(page: Page) -> Optional[str]:
 
 def extract_author_url(page: Page) -> Optional[str]:
     js = "(function(){try{const el=document.querySelector('#owner #text > a')||document.querySelector('#text a'); if(!el) return null; return el.href||null;}catch(e){return null;}})()"
-    return eval_page(page, js) or None
+    return eval_page(page, js, cache_ttl=METADATA_CACHE_TTL) or None
 
 
 def extract_video_id(page: Page, url: Optional[str]) -> Optional[str]:
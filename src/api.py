@@ -4,7 +4,7 @@ Provides the RPPApi class for JavaScript calls.
 """
 
 import os
-from typing import Optional, Dict
+from typing import Optional, Dict, List
 
 from src.constants import config
 from src.browser_manager import BrowserManager
@@ -15,10 +15,12 @@ from src.logger import logger, set_log_level
 from src.github_sync import (
     get_remote_presences_list,
     install,
+    install_many,
     sync,
     force_sync,
     uninstall,
     check_version_update,
+    invalidate_remote_tree,
 )
 from src.process_manager import get_processes_by_port, close_pids, is_discord_running
 from src.steam import Steam
@@ -179,11 +181,11 @@ class RPPApi:
         spec = self.pm.get_worker(presence_name)
         if not spec:
             raise ValueError(f"Presence '{presence_name}' not found")
-        if not spec.shared_state:
+        state_dict = self.pm.get_shared_state(spec)
+        if not state_dict:
             logger.info("No shared state for %s", presence_name)
             return {}
 
-        state_dict = dict(spec.shared_state)
         last_rpc = state_dict.get("last_rpc_update", {})
 
         return {
@@ -197,6 +199,54 @@ class RPPApi:
             "small_text": last_rpc.get("small_text"),
         }
 
+    def profile_presence(self, presence_name: str, seconds: float = 10) -> Dict:
+        """
+        Profile a running presence for some seconds with a sampling profiler.
+        The collapsed stacks are written to the logs profiles directory; poll
+        get_presence_profile for the result.
+        """
+        spec = self.pm.get_worker(presence_name)
+        if not spec:
+            raise ValueError(f"Presence '{presence_name}' not found")
+        self.pm.profile(spec, seconds)
+        return {"status": "started", "seconds": seconds}
+
+    def get_presence_profile(self, presence_name: str) -> Dict:
+        """Get the status of the last profile of a presence."""
+        spec = self.pm.get_worker(presence_name)
+        if not spec:
+            raise ValueError(f"Presence '{presence_name}' not found")
+        return self.pm.get_shared_state(spec).get("last_profile") or {}
+
+    def get_presence_metrics(self) -> Dict:
+        """
+        Get the resource usage reported by the presence workers, with totals.
+        Presences of the shared host report the CPU of their own thread and
+        the memory of the whole host, so memory is summed per process.
+        """
+        presences = {}
+        rss_by_pid: Dict[int, int] = {}
+        cpu_percent = 0.0
+        for name, spec in self.pm.list_workers().items():
+            metrics = self.pm.get_metrics(spec)
+            if not metrics:
+                continue
+            presences[name] = metrics
+            if not spec.running:
+                continue
+            cpu_percent += metrics.get("cpu_percent") or 0.0
+            if metrics.get("rss") is not None:
+                rss_by_pid[metrics["pid"]] = metrics["rss"]
+        return {
+            "presences": presences,
+            "total": {
+                "running": sum(1 for m in presences.values() if m["running"]),
+                "cpu_percent": cpu_percent,
+                "rss": sum(rss_by_pid.values()),
+                "processes": len(rss_by_pid),
+            },
+        }
+
     def get_installed_presences(self) -> list:
         """Get a list of installed presences."""
         presences = self.pm.list_workers()
@@ -212,12 +262,16 @@ class RPPApi:
                 "description": spec.description,
                 "callable_name": spec.callable_name,
                 "running": spec.running,
+                "armed": spec.armed,
+                "matches": spec.matches,
                 "interval": spec.interval,
                 "enabled": spec.enabled,
                 "backoff_time": spec.backoff_time,
                 "web": spec.web,
                 "on_exit": spec.on_exit,
                 "runs": spec.runs,
+                "startup_latency": self.pm.get_startup_latency(spec),
+                "restart_stats": self.pm.get_restart_stats(spec),
             }
             for spec in presences.values()
         ]
@@ -239,7 +293,7 @@ class RPPApi:
             logger.info("Sync check for '%s': %s", presence_name, sync_msg)
             if not success:
                 raise RuntimeError(sync_msg)
-        self.pm.start(spec)
+        self.pm.arm(spec)
 
     def stop_presence(self, presence_name: str):
         """Stop a presence worker by name."""
@@ -268,9 +322,24 @@ class RPPApi:
         success, msg = install(presence_name, path)
         logger.info("Install result: %s, %s", success, msg)
         self.force_cache = True
-        self.pm.discover(force=True, dev=config.development_mode)
+        self.pm.discover(dev=config.development_mode)
         return {"success": success, "message": msg}
 
+    def install_remote_presences(self, presence_names: List[str]):
+        """Install several remote presences at once from a single archive."""
+        logger.info("Installing remote presences: %s", ", ".join(presence_names))
+        if not presence_names:
+            raise ValueError("Presence names are required for installation")
+        results = install_many(presence_names)
+        for name, (success, msg) in results.items():
+            logger.info("Install result for '%s': %s, %s", name, success, msg)
+        self.force_cache = True
+        self.pm.discover(dev=config.development_mode)
+        return {
+            name: {"success": success, "message": msg}
+            for name, (success, msg) in results.items()
+        }
+
     def remove_installed_presence(self, presence_name: str):
         """Uninstall an installed presence by name."""
         logger.info("Uninstalling presence: %s", presence_name)
@@ -285,7 +354,7 @@ class RPPApi:
         success, msg = uninstall(path)
         logger.info("Uninstall result: %s, %s", success, msg)
         self.force_cache = True
-        self.pm.discover(force=True, dev=config.development_mode)
+        self.pm.discover(dev=config.development_mode)
         return {"success": success, "message": msg}
 
     def sync_presence(self, presence_name: str):
@@ -304,11 +373,12 @@ class RPPApi:
             )
 
         remote_spec = "presences/" + presence_name
+        invalidate_remote_tree()
         success, msg = force_sync(remote_spec, spec.path)
         logger.info("Sync result for '%s': %s", presence_name, msg)
 
         # Rediscover to reload updated files
-        self.pm.discover(force=True, dev=config.development_mode)
+        self.pm.discover(dev=config.development_mode)
 
         return {"success": success, "message": msg}
 
@@ -53,6 +53,7 @@ class Config:
     frontend_dir: pathlib.Path = FRONTEND_DIR
     presences_entrypoint: str = "main.py"
     presences_callable: str = "execute"
+    presences_tick_callable: str = "tick"
     user_settings_filename: str = "settings.json"
 
     logs_dir: pathlib.Path = (
@@ -69,6 +70,31 @@ class Config:
     custom_app_id: str = ""
     custom_presets_filename: str = "custom_presets.json"
     custom_presets_path: pathlib.Path = CUSTOM_PRESETS_PATH
+    presence_host_enabled: bool = True
+    hosted_restart_timeout: float = 5.0  # seconds a hosted thread gets to stop
+    worker_pool_size: int = 2
+    pages_snapshot_size: int = 256 * 1024  # bytes
+    pages_poll_interval: float = 0.05  # seconds between generation checks
+    discovery_workers: int = 4
+    discovery_timeout: float = 20.0  # seconds
+    restart_backoff_max: int = 300  # seconds
+    crash_loop_threshold: int = 5
+    crash_loop_window: float = 60.0  # seconds
+    shutdown_timeout: float = 5.0  # seconds
+    auto_start_web: bool = True
+    auto_suspend_grace: float = 60.0  # seconds
+    tick_jitter: float = 0.1  # fraction of the interval
+    tick_stop_poll_interval: float = 0.25  # seconds between stop checks
+    metrics_interval: float = 5.0  # seconds
+    status_max_pending: int = 1024  # queued status keys per worker process
+    profile_interval: float = 0.01  # seconds between samples
+    profile_max_seconds: float = 120.0
+    worker_import_budget: float = 0.25  # seconds
+    ws_recv_timeout: float = 10.0  # seconds
+    watchdog_enabled: bool = True
+    watchdog_interval: float = 5.0  # seconds between checks
+    watchdog_budget: float = 60.0  # seconds a tick may overrun before a restart
+    heartbeat_interval: float = 1.0  # seconds between busy heartbeats
 
     development_mode: bool = True
     frontend_dev_server_url: str = os.getenv(
@@ -80,9 +106,17 @@ class Config:
     github_owner: str = "manucabral"
     github_repo: str = "RichPresencePlus"
     github_token: str | None = os.getenv("RPP_GITHUB_TOKEN")
+    github_branch: str = os.getenv("RPP_GITHUB_BRANCH", "main")
+    github_tree_ttl: float = 30.0  # seconds a fetched remote tree is reused
+    github_download_workers: int = 6
     meta_filename: str = ".meta.json"
+    meta_stats_filename: str = ".meta.stats.json"
     cache_filename: str = "presences.cache.json"
     cache_ttl_seconds: int = 300  # 5 minutes
+    http_cache_filename: str = "github.cache.json"
+    discovery_index_filename: str = "presences.index.json"
+    presences_watch: bool = True
+    presences_watch_interval: float = 2.0  # seconds
 
     steam_config_path: str = os.getenv(
         "RPP_STEAM_CONFIG", r"C:\Program Files (x86)\Steam\config\config.vdf"
@@ -0,0 +1,153 @@
+"""
+Persistent index of discovered presences.
+"""
+
+import os
+import json
+import time
+import hashlib
+import threading
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+from .logger import logger
+from .constants import config
+
+_IGNORED_NAMES = ("__pycache__",)
+
+
+def manifest_stamp(entry: Path) -> Optional[Tuple[int, int]]:
+    """
+    Return (mtime_ns, size) of a presence's manifest, or None if missing.
+    """
+    try:
+        stat = (entry / "manifest.json").stat()
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def directory_fingerprint(entry: Path) -> str:
+    """
+    Cheap fingerprint of every file of a presence (path, size and mtime),
+    used to reuse a verification verdict while nothing changed on disk.
+    """
+    digest = hashlib.sha1()
+    try:
+        for root, dirs, files in os.walk(entry):
+            dirs[:] = sorted(d for d in dirs if d not in _IGNORED_NAMES)
+            for filename in sorted(files):
+                path = Path(root) / filename
+                try:
+                    stat = path.stat()
+                except OSError:
+                    continue
+                rel = path.relative_to(entry).as_posix()
+                digest.update(f"{rel}:{stat.st_size}:{stat.st_mtime_ns};".encode())
+    except OSError as exc:
+        logger.debug("Failed to fingerprint %s: %s", entry, exc)
+    return digest.hexdigest()
+
+
+class DiscoveryIndex:
+    """
+    JSON file mapping each presence directory to its parsed manifest (keyed
+    by manifest mtime/size and content hash) and its last verification
+    verdict (keyed by a fingerprint of the directory).
+    """
+
+    def __init__(self, path: Optional[Path] = None):
+        self.path = Path(path or config.discovery_index_filename)
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self.load()
+
+    def load(self) -> None:
+        """Load the index from disk; a missing or broken file starts empty."""
+        if not self.path.exists():
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as file_:
+                data = json.load(file_)
+            if isinstance(data, dict):
+                self._entries = data.get("presences", {})
+            logger.debug("Loaded discovery index (%d entries)", len(self._entries))
+        except Exception as exc:
+            logger.warning("Discovery index load failed: %s", exc)
+            self._entries = {}
+
+    def save(self) -> None:
+        """Write the index to disk atomically."""
+        with self._lock:
+            payload = {"timestamp": int(time.time()), "presences": self._entries}
+            tmp_path = self.path.with_name(self.path.name + ".tmp")
+            try:
+                with open(tmp_path, "w", encoding="utf-8") as file_:
+                    json.dump(payload, file_, indent=2)
+                os.replace(tmp_path, self.path)
+            except Exception as exc:
+                logger.warning("Discovery index save failed: %s", exc)
+
+    def read_manifest(self, name: str, entry: Path) -> Tuple[Optional[dict], str]:
+        """
+        Return (manifest data, content sha1) of a presence, reading and
+        parsing the file only when its mtime/size or content changed.
+        Returns (None, "") if the manifest is missing or invalid.
+        """
+        stamp = manifest_stamp(entry)
+        if stamp is None:
+            return None, ""
+        with self._lock:
+            cached = self._entries.get(name, {}).get("manifest")
+        if cached and tuple(cached.get("stamp", ())) == stamp:
+            return cached.get("data"), cached.get("sha", "")
+
+        raw = (entry / "manifest.json").read_bytes()
+        sha = hashlib.sha1(raw).hexdigest()
+        if cached and cached.get("sha") == sha:
+            data = cached.get("data")
+        else:
+            try:
+                data = json.loads(raw.decode("utf-8", errors="ignore"))
+            except json.JSONDecodeError as exc:
+                logger.error("Failed to parse manifest for presence %s: %s", name, exc)
+                return None, ""
+        with self._lock:
+            self._entries.setdefault(name, {})["manifest"] = {
+                "stamp": list(stamp),
+                "sha": sha,
+                "data": data,
+            }
+        return data, sha
+
+    def verdict(self, name: str, fingerprint: str, max_age: float) -> Optional[bool]:
+        """
+        Return the stored verdict of a presence if it was recorded for the
+        same fingerprint less than max_age seconds ago, else None.
+        """
+        with self._lock:
+            cached = self._entries.get(name, {}).get("verdict")
+        if not cached or cached.get("fingerprint") != fingerprint:
+            return None
+        if time.time() - cached.get("checked_at", 0) > max_age:
+            return None
+        return bool(cached.get("verified"))
+
+    def set_verdict(self, name: str, fingerprint: str, verified: bool) -> None:
+        """Record a verification verdict for a presence."""
+        with self._lock:
+            self._entries.setdefault(name, {})["verdict"] = {
+                "fingerprint": fingerprint,
+                "verified": verified,
+                "checked_at": time.time(),
+            }
+
+    def forget(self, name: str) -> None:
+        """Remove a presence from the index."""
+        with self._lock:
+            self._entries.pop(name, None)
+
+    def names(self) -> list:
+        """Names of every indexed presence."""
+        with self._lock:
+            return list(self._entries)
@@ -2,17 +2,28 @@
 GitHub synchronization functions.
 """
 
+import os
 import json
 import time
 import base64
 import shutil
+import tarfile
 import hashlib
 import re
-from pathlib import Path
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path, PurePosixPath
 from typing import Dict, List, Tuple, Optional
 import requests
+import requests.adapters
 from .logger import logger
 from .constants import config
+from .http_cache import get_http_cache
+
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+HASH_CHUNK_SIZE = 256 * 1024
+STAT_RACE_NS = 2_000_000_000
 
 
 def github_headers() -> dict:
@@ -35,14 +46,85 @@ def calculate_file_sha(file_path: Path) -> str:
         if not file_path.exists():
             return ""
         with open(file_path, "rb") as f:
-            content = f.read()
-        blob = b"blob " + str(len(content)).encode() + b"\0" + content
-        return hashlib.sha1(blob).hexdigest()
+            size = os.fstat(f.fileno()).st_size
+            digest = hashlib.sha1(b"blob " + str(size).encode() + b"\0")
+            for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
     except Exception as exc:
         logger.debug("Failed to calculate SHA for %s: %s", file_path, exc)
         return ""
 
 
+def load_stats(local_dir: Path) -> Dict[str, list]:
+    """
+    Load the stat cache of a presence: relative_path -> [size, mtime_ns, sha].
+    """
+    path = local_dir / config.meta_stats_filename
+    if path.exists():
+        try:
+            with open(path, "r", encoding="utf-8") as file_:
+                return json.load(file_)
+        except Exception as exc:
+            logger.debug("Failed to load stat cache: %s", exc)
+    return {}
+
+
+def save_stats(local_dir: Path, stats: Dict[str, list]):
+    """
+    Save the stat cache of a presence.
+    """
+    path = local_dir / config.meta_stats_filename
+    tmp_path = path.with_name(path.name + ".tmp")
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as file_:
+            json.dump(stats, file_)
+        os.replace(tmp_path, path)
+    except Exception as exc:
+        logger.debug("Failed to save stat cache: %s", exc)
+
+
+def record_stat(stats: Dict[str, list], local_dir: Path, rel: str, sha: str) -> bool:
+    """
+    Remember the SHA of a file for its current size and mtime.
+    Returns True if the cache changed.
+    """
+    try:
+        stat = (local_dir / rel).stat()
+    except OSError:
+        return stats.pop(rel, None) is not None
+    # a file written within the mtime resolution could change again without
+    # its stat changing, it is hashed again next time instead
+    if time.time_ns() - stat.st_mtime_ns < STAT_RACE_NS:
+        return stats.pop(rel, None) is not None
+    entry = [stat.st_size, stat.st_mtime_ns, sha]
+    if stats.get(rel) == entry:
+        return False
+    stats[rel] = entry
+    return True
+
+
+def cached_file_sha(
+    stats: Dict[str, list], local_dir: Path, rel: str
+) -> Tuple[str, bool]:
+    """
+    SHA of a local file, only hashed when its size or mtime changed since it
+    was last recorded in stats. Returns (sha, whether stats changed).
+    """
+    path = local_dir / rel
+    try:
+        stat = path.stat()
+    except OSError:
+        return "", stats.pop(rel, None) is not None
+    entry = stats.get(rel)
+    if entry and entry[0] == stat.st_size and entry[1] == stat.st_mtime_ns:
+        return entry[2], False
+    sha = calculate_file_sha(path)
+    if not sha:
+        return "", False
+    return sha, record_stat(stats, local_dir, rel, sha)
+
+
 def parse_version(version: str) -> Optional[Tuple[int, int, int, str, int]]:
     """
     Parse semantic version with prerelease suffixes.
@@ -120,9 +202,7 @@ def get_remote_version() -> Optional[str]:
             f"{config.github_repo}/contents/src/constants.py"
         )
 
-        resp = requests.get(url, headers=github_headers(), timeout=10)
-        resp.raise_for_status()
-
+        resp = get_http_cache().get(url, headers=github_headers(), timeout=10)
         data = resp.json()
         if data.get("encoding") == "base64":
             content = base64.b64decode(data["content"]).decode("utf-8")
@@ -193,161 +273,424 @@ def check_version_update() -> Dict:
     }
 
 
-def load_cache() -> List[dict] | None:
+def load_catalog() -> dict:
     """
-    Load presences list from cache if not expired.
+    Load the remote presences catalog index.
+    { timestamp, tree, presences: { name: { sha, manifest } } }
     """
     cache_path = Path(config.cache_filename)
     if not cache_path.exists():
         logger.debug("Cache file does not exist")
-        return None
+        return {}
 
     try:
         with open(cache_path, "r", encoding="utf-8") as f:
-            cache = json.load(f)
-
-        age = time.time() - cache.get("timestamp", 0)
-        if age > config.cache_ttl_seconds:
-            logger.debug("Cache expired")
-            return None
-
-        logger.info("Loaded presences from cache")
-        return cache.get("data")
+            catalog = json.load(f)
+        if not isinstance(catalog.get("presences"), dict):
+            logger.debug("Cache has an outdated format")
+            return {}
+        return catalog
 
     except Exception as exc:
         logger.warning("Cache load failed: %s", exc)
-        return None
+        return {}
 
 
-def save_cache(data: List[dict]):
+def save_catalog(catalog: dict):
     """
-    Save presences list to cache.
+    Save the remote presences catalog index.
     """
+    cache_path = Path(config.cache_filename)
+    tmp_path = cache_path.with_name(cache_path.name + ".tmp")
     try:
         logger.debug("Saving presences to cache")
-        with open(
-            config.cache_filename, "w", encoding="utf-8", errors="ignore"
-        ) as file_:
-            json.dump(
-                {
-                    "timestamp": int(time.time()),
-                    "data": data,
-                },
-                file_,
-                indent=2,
-            )
+        with open(tmp_path, "w", encoding="utf-8") as file_:
+            json.dump(catalog, file_, separators=(",", ":"))
+        os.replace(tmp_path, cache_path)
         logger.debug("Cache saved")
     except Exception as exc:
         logger.warning("Cache save failed: %s", exc)
 
 
-def get_remote_presences_list(force_refresh: bool = False) -> List[dict]:
+def fetch_manifest(repo_path: str, sha: str) -> Tuple[Optional[dict], bool]:
     """
-    Returns list of:
-    { name, manifest }
-    Cached in rootfolder for instant response.
+    Download and parse a remote manifest.json.
+    Returns (manifest, whether its content matches the blob SHA).
     """
-
-    if not force_refresh:
-        cached = load_cache()
-        if cached is not None:
-            return cached
-
-    logger.info("Fetching remote presences from GitHub")
-
-    url = "https://api.github.com/repos/"
-    url += f"{config.github_owner}/{config.github_repo}/contents/"
-    url += Path(config.presences_dir).name
-    resp = requests.get(url, headers=github_headers(), timeout=10)
+    resp = get_session().get(raw_url(repo_path), timeout=5)
     resp.raise_for_status()
+    content = resp.content
+    blob = b"blob " + str(len(content)).encode() + b"\0" + content
+    verified = hashlib.sha1(blob).hexdigest() == sha
+    return json.loads(content.decode("utf-8")), verified
 
-    presences = []
 
-    for item in resp.json():
-        if item["type"] != "dir":
-            continue
+def refresh_catalog(catalog: dict) -> dict:
+    """
+    Bring the catalog up to date with the remote tree. Only manifests whose
+    blob SHA changed are downloaded, concurrently.
+    """
+    tree = get_repo_tree()
+    if catalog.get("tree") == tree.sha:
+        catalog["timestamp"] = int(time.time())
+        return catalog
 
-        name = item["name"]
-        manifest_url = (
-            f"https://api.github.com/repos/"
-            f"{config.github_owner}/{config.github_repo}/contents/"
-            f"{config.presences_dir.name}/{name}/manifest.json"
-        )
+    root = Path(config.presences_dir).name
+    names = set()
+    manifest_shas = {}
+    for repo_path, info in tree.blobs.items():
+        parts = repo_path.split("/")
+        if len(parts) < 3 or parts[0] != root:
+            continue
+        names.add(parts[1])
+        if len(parts) == 3 and parts[2] == "manifest.json":
+            manifest_shas[parts[1]] = info["sha"]
+
+    known = catalog.get("presences", {})
+    presences = {}
+    stale = {}
+    for name in sorted(names):
+        sha = manifest_shas.get(name)
+        entry = known.get(name)
+        if sha and entry and entry.get("sha") == sha:
+            presences[name] = entry
+        else:
+            presences[name] = {"sha": None, "manifest": None}
+            if sha:
+                stale[name] = sha
+
+    if stale:
+        logger.info("Fetching %d remote manifest/s", len(stale))
+        workers = max(1, min(config.github_download_workers, len(stale)))
+        with ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="catalog"
+        ) as pool:
+            futures = {
+                name: pool.submit(fetch_manifest, f"{root}/{name}/manifest.json", sha)
+                for name, sha in stale.items()
+            }
+        for name, future in futures.items():
+            try:
+                manifest, verified = future.result()
+            except Exception as exc:
+                logger.debug("Manifest missing for %s: %s", name, exc)
+                continue
+            # a manifest not matching the tree yet is fetched again next time
+            sha = stale[name] if verified else None
+            presences[name] = {"sha": sha, "manifest": manifest}
+
+    complete = all(entry["sha"] for name, entry in presences.items() if name in stale)
+    return {
+        "timestamp": int(time.time()),
+        "tree": tree.sha if complete else None,
+        "presences": presences,
+    }
 
-        manifest = None
 
+def get_remote_presences_list(force_refresh: bool = False) -> List[dict]:
+    """
+    Returns list of:
+    { name, manifest }
+    Built from the remote tree and an on-disk catalog index, which is
+    refreshed at most every config.cache_ttl_seconds unless forced.
+    """
+    catalog = load_catalog()
+    age = time.time() - catalog.get("timestamp", 0)
+    if force_refresh or age > config.cache_ttl_seconds:
+        logger.info("Fetching remote presences from GitHub")
         try:
-            mr = requests.get(manifest_url, headers=github_headers(), timeout=5)
-            if mr.status_code == 200:
-                data = mr.json()
-                if data.get("encoding") == "base64":
-                    content = base64.b64decode(data["content"]).decode("utf-8")
-                    manifest = json.loads(content)
+            catalog = refresh_catalog(catalog)
         except Exception as exc:
-            logger.debug("Manifest missing for %s: %s", name, exc)
+            if not catalog:
+                raise
+            logger.warning("Serving outdated presences list: %s", exc)
+        else:
+            save_catalog(catalog)
+    else:
+        logger.info("Loaded presences from cache")
 
-        local_path = Path(config.presences_dir) / name
-        installed = local_path.exists() and local_path.is_dir()
+    presences = []
+    for name, entry in catalog["presences"].items():
+        manifest = entry.get("manifest")
         if manifest:
-            manifest["installed"] = installed
+            local_path = Path(config.presences_dir) / name
+            manifest = dict(manifest, installed=local_path.is_dir())
         presences.append(
             {
                 "name": name,
                 "manifest": manifest,
             }
         )
-
-    save_cache(presences)
     return presences
 
 
+class RemoteTree:
+    """
+    Files of the repository at one commit, from a single recursive
+    git/trees listing. Per-folder views are built once and reused while the
+    commit does not change.
+
+    Parameters:
+        sha (str): SHA of the root tree.
+        blobs (Dict[str, dict]): Repository path -> { sha, size } of every file.
+        commit (str): SHA of the commit the tree belongs to.
+    """
+
+    def __init__(self, sha: str, blobs: Dict[str, dict], commit: str = ""):
+        self.sha = sha
+        self.blobs = blobs
+        self.commit = commit
+        self._folders: Dict[str, Dict[str, dict]] = {}
+
+    def folder(self, path: str) -> Dict[str, dict]:
+        """
+        Files below a folder.
+        return: dict[relative_path] = { sha, download_url }
+        """
+        path = path.strip("/")
+        cached = self._folders.get(path)
+        if cached is not None:
+            return cached
+        prefix = path + "/"
+        files = {}
+        for repo_path, info in self.blobs.items():
+            if not repo_path.startswith(prefix):
+                continue
+            # repository paths use "/" on every platform, like the archive
+            rel = PurePosixPath(repo_path).relative_to(path)
+            files[str(rel)] = {
+                "sha": info["sha"],
+                "size": info.get("size"),
+                "download_url": raw_url(repo_path),
+            }
+        self._folders[path] = files
+        return files
+
+
+_tree: Optional[RemoteTree] = None  # pylint: disable=invalid-name
+_tree_fetched_at = 0.0  # pylint: disable=invalid-name
+_tree_lock = threading.Lock()
+
+
+def raw_url(repo_path: str) -> str:
+    """Download URL of a repository file on the configured branch."""
+    return (
+        f"https://raw.githubusercontent.com/{config.github_owner}/"
+        f"{config.github_repo}/{config.github_branch}/{repo_path}"
+    )
+
+
+def resolve_commit() -> str:
+    """
+    SHA of the commit the configured branch currently points to.
+    """
+    url = (
+        f"https://api.github.com/repos/{config.github_owner}/"
+        f"{config.github_repo}/commits/{config.github_branch}"
+    )
+    headers = dict(github_headers(), Accept="application/vnd.github.sha")
+    commit = get_http_cache().get(url, headers=headers, timeout=10).text.strip()
+    if not re.fullmatch(r"[0-9a-f]{40}", commit):
+        raise RuntimeError(f"Unexpected commit SHA for {config.github_branch}")
+    return commit
+
+
+def get_repo_tree(force_refresh: bool = False) -> RemoteTree:
+    """
+    Recursive listing of the whole repository at the current commit of the
+    configured branch. The listing is shared by every presence and reused
+    for config.github_tree_ttl seconds, so a sync pass over all presences
+    costs the commit lookup, plus one listing when the branch moved.
+    Concurrent callers wait for the same fetch.
+    """
+    global _tree, _tree_fetched_at  # pylint: disable=global-statement
+    with _tree_lock:
+        age = time.monotonic() - _tree_fetched_at
+        if _tree is not None and not force_refresh and age < config.github_tree_ttl:
+            return _tree
+
+        # the tree is listed at a commit, which archives can be fetched at
+        commit = resolve_commit()
+        if _tree is None or _tree.commit != commit:
+            url = (
+                f"https://api.github.com/repos/{config.github_owner}/"
+                f"{config.github_repo}/git/trees/{commit}?recursive=1"
+            )
+            resp = get_http_cache().get(url, headers=github_headers(), timeout=15)
+            data = resp.json()
+
+            if data.get("truncated"):
+                raise RuntimeError("Remote tree listing is truncated")
+
+            blobs = {
+                item["path"]: {"sha": item["sha"], "size": item.get("size")}
+                for item in data.get("tree", [])
+                if item.get("type") == "blob"
+            }
+            logger.debug(
+                "Fetched remote tree %s at %s (%d files)",
+                data["sha"],
+                commit,
+                len(blobs),
+            )
+            _tree = RemoteTree(data["sha"], blobs, commit)
+        _tree_fetched_at = time.monotonic()
+        return _tree
+
+
+def invalidate_remote_tree():
+    """
+    Drop the cached remote tree, the next sync pass fetches it again.
+    """
+    global _tree_fetched_at  # pylint: disable=global-statement
+    with _tree_lock:
+        _tree_fetched_at = 0.0
+
+
 def get_remote_tree(path: str) -> Dict[str, dict]:
     """
     Recursive listing of remote files.
     return: dict[relative_path] = { sha, download_url }
     """
-    url = f"https://api.github.com/repos/{config.github_owner}/{config.github_repo}/contents/{path}"
-    resp = requests.get(url, headers=github_headers(), timeout=15)
-    resp.raise_for_status()
+    return get_repo_tree().folder(path)
 
-    files = {}
 
-    for item in resp.json():
-        if item["type"] == "file":
-            rel = Path(item["path"]).relative_to(path)
-            files[str(rel)] = {
-                "sha": item["sha"],
-                "download_url": item["download_url"],
-            }
-        elif item["type"] == "dir":
-            files.update(get_remote_tree(item["path"]))
+class ChecksumError(Exception):
+    """Downloaded content does not match the expected blob SHA."""
+
 
-    return files
+_session: Optional[requests.Session] = None  # pylint: disable=invalid-name
+_session_lock = threading.Lock()
 
 
-def download_file(url: str, dest: Path):
+def get_session() -> requests.Session:
     """
-    Download a file from URL to destination path.
+    Shared HTTP session, so downloads reuse pooled connections.
     """
+    global _session  # pylint: disable=global-statement
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = requests.adapters.HTTPAdapter(
+                pool_connections=2, pool_maxsize=config.github_download_workers
+            )
+            session.mount("https://", adapter)
+            _session = session
+        return _session
+
+
+def download_file(
+    url: str,
+    dest: Path,
+    expected_sha: Optional[str] = None,
+    size: Optional[int] = None,
+) -> Path:
+    """
+    Stream a file from URL into a temporary file next to dest, hashing it in
+    Git blob format while writing. The temporary file is returned; callers
+    move it into place once every download of a batch succeeded.
+
+    Parameters:
+        url (str): URL to download.
+        dest (Path): Final path of the file.
+        expected_sha (Optional[str]): Blob SHA the content must match.
+        size (Optional[int]): Expected size, lets the hash be computed while
+            streaming instead of re-reading the file.
+    """
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(
+        dir=dest.parent, prefix=f".{dest.name}.", suffix=".tmp"
+    )
+    tmp_path = Path(tmp_name)
     try:
-        dest.parent.mkdir(parents=True, exist_ok=True)
-        resp = requests.get(url, timeout=20)
-        resp.raise_for_status()
-        with open(dest, "wb") as file_:
-            file_.write(resp.content)
+        hasher = None
+        if expected_sha and size is not None:
+            hasher = hashlib.sha1(b"blob " + str(size).encode() + b"\0")
+        written = 0
+        with get_session().get(url, stream=True, timeout=20) as resp:
+            resp.raise_for_status()
+            with os.fdopen(fd, "wb") as file_:
+                for chunk in resp.iter_content(DOWNLOAD_CHUNK_SIZE):
+                    file_.write(chunk)
+                    written += len(chunk)
+                    if hasher is not None:
+                        hasher.update(chunk)
+        if hasher is not None and written != size:
+            raise ChecksumError(
+                f"Size mismatch for {dest.name}: expected {size}, got {written}"
+            )
+        if expected_sha:
+            if hasher is not None:
+                actual = hasher.hexdigest()
+            else:
+                actual = calculate_file_sha(tmp_path)
+            if actual != expected_sha:
+                raise ChecksumError(
+                    f"Checksum mismatch for {dest.name}: "
+                    f"expected {expected_sha[:8]}, got {actual[:8]}"
+                )
+        return tmp_path
     except Exception as exc:
         logger.error("Failed to download %s: %s", url, exc)
+        tmp_path.unlink(missing_ok=True)
         raise exc
 
 
+def download_files(files: Dict[str, dict], local_dir: Path) -> List[str]:
+    """
+    Download remote files into local_dir with bounded concurrency. Every
+    file is verified against its blob SHA before any of them replaces its
+    local copy, so a failed download leaves the local files untouched.
+    Returns the relative paths that were written.
+
+    Parameters:
+        files (Dict[str, dict]): relative_path -> { sha, download_url, size }.
+        local_dir (Path): Folder the relative paths are resolved against.
+    """
+    if not files:
+        return []
+    workers = max(1, min(config.github_download_workers, len(files)))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="download") as pool:
+        futures = {
+            rel: pool.submit(
+                download_file,
+                info["download_url"],
+                local_dir / rel,
+                info.get("sha"),
+                info.get("size"),
+            )
+            for rel, info in files.items()
+        }
+
+    staged: Dict[str, Path] = {}
+    error: Optional[BaseException] = None
+    for rel, future in futures.items():
+        exc = future.exception()
+        if exc is None:
+            staged[rel] = future.result()
+        elif error is None:
+            error = exc
+    if error is not None:
+        for tmp_path in staged.values():
+            tmp_path.unlink(missing_ok=True)
+        raise error
+
+    for rel, tmp_path in staged.items():
+        os.replace(tmp_path, local_dir / rel)
+    return list(staged)
+
+
 def save_meta(local_dir: Path, meta: dict):
     """
     Save meta information to local .meta.json file.
     """
     logger.debug("Saving meta information")
+    path = local_dir / config.meta_filename
+    tmp_path = path.with_name(path.name + ".tmp")
     try:
-        with open(local_dir / config.meta_filename, "w", encoding="utf-8") as file_:
+        with open(tmp_path, "w", encoding="utf-8") as file_:
             json.dump(meta, file_, indent=2)
+        os.replace(tmp_path, path)
     except Exception as exc:
         logger.error("Failed to save meta information: %s", exc)
 
@@ -371,27 +714,134 @@ def install(remote_folder: str, local_folder: str) -> Tuple[bool, str]:
     Install presence from remote to local folder.
     """
     logger.info("Installing %s", remote_folder)
-    remote_dir = "presences/" + remote_folder
+    remote_dir = f"{Path(config.presences_dir).name}/{remote_folder}"
     local_dir = Path(local_folder)
 
     if local_dir.exists():
         return False, "Local folder already exists"
 
+    # downloaded into a hidden staging folder renamed into place at the end
+    staging_dir = local_dir.with_name(f".{local_dir.name}.tmp")
     try:
+        shutil.rmtree(staging_dir, ignore_errors=True)
         files = get_remote_tree(remote_dir)
-        meta = {}
-
-        for rel, info in files.items():
-            download_file(info["download_url"], local_dir / rel)
-            meta[rel] = info["sha"]
-
-        save_meta(local_dir, meta)
+        if not files:
+            return False, "Presence not found in remote repository"
+        staging_dir.mkdir(parents=True)
+        download_files(files, staging_dir)
+        save_meta(staging_dir, {rel: info["sha"] for rel, info in files.items()})
+        os.replace(staging_dir, local_dir)
         return True, "Installed successfully"
 
     except Exception as exc:
+        shutil.rmtree(staging_dir, ignore_errors=True)
         return False, f"Install failed: {exc}"
 
 
+def write_blob(source, dest: Path, size: int) -> str:
+    """
+    Copy a file object to dest in chunks, returning its Git blob SHA.
+    """
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    digest = hashlib.sha1(b"blob " + str(size).encode() + b"\0")
+    with open(dest, "wb") as file_:
+        for chunk in iter(lambda: source.read(DOWNLOAD_CHUNK_SIZE), b""):
+            file_.write(chunk)
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def install_many(names: List[str]) -> Dict[str, Tuple[bool, str]]:
+    """
+    Install several presences from a single archive of the repository at
+    the commit the remote tree was listed at. The archive is streamed
+    once and only the files of the requested presences are extracted, each
+    checked against its blob SHA in the remote tree. Every presence is
+    extracted into a hidden staging folder renamed into place when complete.
+    A single presence is installed file by file, which downloads less.
+    Returns name -> (success, message).
+    """
+    presences_dir = Path(config.presences_dir)
+    root = presences_dir.name
+    results: Dict[str, Tuple[bool, str]] = {}
+    tree = get_repo_tree(force_refresh=True)
+
+    wanted: Dict[str, Dict[str, dict]] = {}
+    for name in dict.fromkeys(names):
+        if (presences_dir / name).exists():
+            results[name] = (False, "Local folder already exists")
+            continue
+        files = tree.folder(f"{root}/{name}")
+        if not files:
+            results[name] = (False, "Presence not found in remote repository")
+            continue
+        wanted[name] = files
+
+    if len(wanted) == 1:
+        name = next(iter(wanted))
+        results[name] = install(name, str(presences_dir / name))
+        return results
+    if not wanted:
+        return results
+
+    logger.info("Installing %s from archive", ", ".join(wanted))
+    staging = {name: presences_dir / f".{name}.tmp" for name in wanted}
+    extracted: Dict[str, Dict[str, str]] = {name: {} for name in wanted}
+    failed: Dict[str, str] = {}
+    try:
+        for staging_dir in staging.values():
+            shutil.rmtree(staging_dir, ignore_errors=True)
+            staging_dir.mkdir(parents=True)
+        url = (
+            f"https://api.github.com/repos/{config.github_owner}/"
+            f"{config.github_repo}/tarball/{tree.commit}"
+        )
+        with get_session().get(
+            url, headers=github_headers(), stream=True, timeout=30
+        ) as resp:
+            resp.raise_for_status()
+            resp.raw.decode_content = True
+            with tarfile.open(fileobj=resp.raw, mode="r|gz") as archive:
+                for member in archive:
+                    # members are "<owner>-<repo>-<sha>/<repository path>"
+                    parts = member.name.split("/", 3)
+                    if not member.isfile() or len(parts) < 4 or parts[1] != root:
+                        continue
+                    name, rel = parts[2], parts[3]
+                    # only paths listed in the tree are written
+                    info = wanted.get(name, {}).get(rel)
+                    if info is None or name in failed:
+                        continue
+                    source = archive.extractfile(member)
+                    sha = write_blob(source, staging[name] / rel, member.size)
+                    if sha != info["sha"]:
+                        failed[name] = f"Checksum mismatch for {rel}"
+                        continue
+                    extracted[name][rel] = sha
+
+    except Exception as exc:
+        logger.error("Archive install failed: %s", exc)
+        for name, staging_dir in staging.items():
+            shutil.rmtree(staging_dir, ignore_errors=True)
+            results[name] = (False, f"Install failed: {exc}")
+        return results
+
+    for name, files in wanted.items():
+        missing = len(files) - len(extracted[name])
+        if name not in failed and missing:
+            failed[name] = f"{missing} file(s) missing from archive"
+        try:
+            if name in failed:
+                raise RuntimeError(failed[name])
+            save_meta(staging[name], extracted[name])
+            os.replace(staging[name], presences_dir / name)
+            results[name] = (True, "Installed successfully")
+        except Exception as exc:
+            shutil.rmtree(staging[name], ignore_errors=True)
+            results[name] = (False, f"Install failed: {exc}")
+    return results
+
+
 def uninstall(local_folder: str) -> Tuple[bool, str]:
     """
     Uninstall presence by removing local folder.
@@ -439,19 +889,26 @@ def sync(remote_folder: str, local_folder: str) -> Tuple[bool, str]:
             if rel not in remote_files:
                 obsolete_files.append(rel)
 
-        # check for local modifications
+        # check for local modifications, hashing only files whose stat changed
+        stats = load_stats(local_dir)
+        stats_changed = False
         for rel, expected_sha in local_meta.items():
-            local_file = local_dir / rel
-            if local_file.exists():
-                actual_sha = calculate_file_sha(local_file)
-                if actual_sha and actual_sha != expected_sha:
-                    locally_modified.append(rel)
-                    logger.debug(
-                        "Local modification detected in %s: expected %s, got %s",
-                        rel,
-                        expected_sha[:8],
-                        actual_sha[:8],
-                    )
+            actual_sha, changed = cached_file_sha(stats, local_dir, rel)
+            stats_changed = stats_changed or changed
+            if actual_sha and actual_sha != expected_sha:
+                locally_modified.append(rel)
+                logger.debug(
+                    "Local modification detected in %s: expected %s, got %s",
+                    rel,
+                    expected_sha[:8],
+                    actual_sha[:8],
+                )
+
+        for rel in [rel for rel in stats if rel not in local_meta]:
+            del stats[rel]
+            stats_changed = True
+        if stats_changed:
+            save_stats(local_dir, stats)
 
         if remote_modified or missing_files or obsolete_files or locally_modified:
             parts = []
@@ -490,16 +947,16 @@ def force_sync(remote_folder: str, local_folder: str) -> Tuple[bool, str]:
         remote_files = get_remote_tree(remote_folder)
         local_meta = load_meta(local_dir)
         new_meta = {}
-
-        updated_files = []
         removed_files = []
 
+        stats = load_stats(local_dir)
+        changed = {}
         for rel, info in remote_files.items():
             if local_meta.get(rel) != info["sha"]:
                 logger.debug("Downloading updated file: %s", rel)
-                download_file(info["download_url"], local_dir / rel)
-                updated_files.append(rel)
+                changed[rel] = info
             new_meta[rel] = info["sha"]
+        updated_files = download_files(changed, local_dir)
 
         # Remove obsolete files
         for rel in local_meta:
@@ -511,6 +968,9 @@ def force_sync(remote_folder: str, local_folder: str) -> Tuple[bool, str]:
                     removed_files.append(rel)
 
         save_meta(local_dir, new_meta)
+        for rel in updated_files + removed_files:
+            stats.pop(rel, None)
+        save_stats(local_dir, stats)
 
         if updated_files or removed_files:
             parts = []
@@ -0,0 +1,177 @@
+"""
+On-disk cache of HTTP responses revalidated with conditional requests.
+"""
+
+import os
+import json
+import hashlib
+import time
+import threading
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import requests
+
+from .logger import logger
+from .constants import config
+
+
+class CachedResponse:
+    """
+    Body of a successful response, either fetched or served from the cache.
+
+    Parameters:
+        url (str): Requested URL.
+        text (str): Response body.
+        from_cache (bool): True when the body was served from the cache.
+    """
+
+    status_code = 200
+
+    def __init__(self, url: str, text: str, from_cache: bool):
+        self.url = url
+        self.text = text
+        self.from_cache = from_cache
+
+    def json(self) -> Any:
+        """Decode the body as JSON."""
+        return json.loads(self.text)
+
+    def raise_for_status(self) -> None:
+        """Cached responses are always successful."""
+
+
+class HttpCache:
+    """
+    Stores response bodies with their ETag and Last-Modified headers in a
+    JSON file. Requests are sent with If-None-Match / If-Modified-Since, and
+    a 304 answer is served from the cache: it is cheap and does not count
+    against the GitHub rate limit. Entries younger than max_age are served
+    without any request. Entries are keyed by URL and by a digest of the
+    Authorization header, so a body fetched with one token (e.g. a private
+    repository) is never served to a request made with another or none.
+
+    Parameters:
+        path (Path): File the cache is persisted to.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._entries: Optional[Dict[str, dict]] = None
+        self._lock = threading.Lock()
+
+    def _load(self) -> Dict[str, dict]:
+        if self._entries is None:
+            self._entries = {}
+            if self.path.exists():
+                try:
+                    with open(self.path, "r", encoding="utf-8") as file_:
+                        self._entries = json.load(file_)
+                except Exception as exc:
+                    logger.warning("HTTP cache load failed: %s", exc)
+        return self._entries
+
+    def _save(self) -> None:
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as file_:
+                json.dump(self._entries, file_)
+            os.replace(tmp_path, self.path)
+        except Exception as exc:
+            logger.warning("HTTP cache save failed: %s", exc)
+
+    @staticmethod
+    def key(url: str, headers: Optional[dict] = None) -> str:
+        """Cache key of a request: its URL and the identity it is sent with."""
+        auth = next(
+            (
+                value
+                for name, value in (headers or {}).items()
+                if name.lower() == "authorization" and value
+            ),
+            None,
+        )
+        if auth is None:
+            return url
+        digest = hashlib.sha256(str(auth).encode("utf-8")).hexdigest()[:16]
+        return f"{url}#auth={digest}"
+
+    def lookup(self, url: str, headers: Optional[dict] = None) -> Optional[dict]:
+        """Cached entry of a request, if any."""
+        with self._lock:
+            return self._load().get(self.key(url, headers))
+
+    def get(
+        self,
+        url: str,
+        headers: Optional[dict] = None,
+        timeout: float = 10,
+        max_age: float = 0.0,
+        session: Optional[Any] = None,
+    ) -> CachedResponse:
+        """
+        GET a URL through the cache. Raises for error statuses like
+        requests does.
+
+        Parameters:
+            url (str): URL to fetch.
+            headers (Optional[dict]): Request headers.
+            timeout (float): Request timeout in seconds.
+            max_age (float): Seconds a cached body is served without being
+                revalidated.
+            session (Optional[Any]): requests session to send the request with.
+        """
+        key = self.key(url, headers)
+        with self._lock:
+            entry = self._load().get(key)
+        if entry is not None and time.time() - entry.get("checked_at", 0) < max_age:
+            return CachedResponse(url, entry["body"], True)
+
+        request_headers = dict(headers or {})
+        if entry is not None:
+            if entry.get("etag"):
+                request_headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                request_headers["If-Modified-Since"] = entry["last_modified"]
+
+        client = session if session is not None else requests
+        resp = client.get(url, headers=request_headers, timeout=timeout)
+        if resp.status_code == 304 and entry is not None:
+            logger.debug("Not modified: %s", url)
+            with self._lock:
+                # only kept in memory, the stored body did not change
+                entry["checked_at"] = time.time()
+            return CachedResponse(url, entry["body"], True)
+        resp.raise_for_status()
+
+        etag = resp.headers.get("ETag")
+        last_modified = resp.headers.get("Last-Modified")
+        if etag or last_modified:
+            with self._lock:
+                self._load()[key] = {
+                    "etag": etag,
+                    "last_modified": last_modified,
+                    "checked_at": time.time(),
+                    "body": resp.text,
+                }
+                self._save()
+        return CachedResponse(url, resp.text, False)
+
+    def clear(self) -> None:
+        """Drop every cached response."""
+        with self._lock:
+            self._entries = {}
+            self._save()
+
+
+_cache: Optional[HttpCache] = None  # pylint: disable=invalid-name
+_cache_lock = threading.Lock()
+
+
+def get_http_cache() -> HttpCache:
+    """Return the HTTP cache of GitHub API responses."""
+    global _cache  # pylint: disable=global-statement
+    with _cache_lock:
+        if _cache is None:
+            _cache = HttpCache(Path(config.http_cache_filename))
+        return _cache
@@ -0,0 +1,179 @@
+"""
+Shared-memory page snapshot transport between the manager and workers.
+"""
+
+import json
+import time
+import struct
+import threading
+from multiprocessing import shared_memory
+from typing import Any, Dict, Iterator, List, Optional
+
+from .constants import config
+from .logger import logger
+
+# seq (odd while writing), generation, payload length
+_HEADER = struct.Struct("<QQI")
+_FIELDS = ("id", "url", "title", "ws_url", "protocol")
+
+# attachments of this process by segment name, shared by every job
+_attached: Dict[str, "SharedPageSnapshot"] = {}
+_attached_lock = threading.Lock()
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    """
+    Attach to an existing segment without tracking it where supported. Worker
+    processes share the manager's resource tracker, so the segment is only
+    unlinked by its owner.
+    """
+    try:
+        # pylint: disable=unexpected-keyword-arg
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        return shared_memory.SharedMemory(name=name)
+
+
+class SharedPageSnapshot:
+    """
+    Versioned page snapshot stored in a multiprocessing.shared_memory segment
+    and protected by a seqlock. The manager publishes, workers read without
+    any IPC round trip; a reader only decodes when the generation changed.
+
+    Workers wait for "pages changed or timeout" by polling the generation
+    every config.pages_poll_interval seconds. Nothing is shared but the
+    segment, so a worker killed while waiting cannot block the publisher or
+    the other workers, as a cross-process condition would.
+    """
+
+    def __init__(self, shm: shared_memory.SharedMemory, owner: bool = False):
+        self._shm = shm
+        self._owner = owner
+        self._write_lock = threading.Lock()
+        self._cached_generation = -1
+        self._cached_pages: List[Dict[str, Any]] = []
+
+    @classmethod
+    def create(cls, size: int = config.pages_snapshot_size) -> "SharedPageSnapshot":
+        """Create a new, empty snapshot segment owned by the caller."""
+        shm = shared_memory.SharedMemory(create=True, size=_HEADER.size + size)
+        _HEADER.pack_into(shm.buf, 0, 0, 0, 0)
+        logger.debug("Created shared page snapshot %s (%d bytes)", shm.name, shm.size)
+        return cls(shm, owner=True)
+
+    @classmethod
+    def attach(cls, name: str) -> "SharedPageSnapshot":
+        """
+        Attach to a snapshot segment created by another process. A process
+        maps each segment once: pooled and hosted workers unpickle a job per
+        run, and every run reuses the same attachment.
+        """
+        with _attached_lock:
+            snapshot = _attached.get(name)
+            if snapshot is None:
+                snapshot = cls(_attach(name))
+                _attached[name] = snapshot
+            return snapshot
+
+    def __reduce__(self):
+        return (SharedPageSnapshot.attach, (self._shm.name,))
+
+    @property
+    def name(self) -> str:
+        """Name of the shared memory segment."""
+        return self._shm.name
+
+    @property
+    def generation(self) -> int:
+        """Generation of the last published snapshot."""
+        _, generation, _ = _HEADER.unpack_from(self._shm.buf, 0)
+        return generation
+
+    @staticmethod
+    def _encode(pages: List[Dict[str, Any]]) -> bytes:
+        rows = [[page.get(field) for field in _FIELDS] for page in pages]
+        return json.dumps(rows, separators=(",", ":")).encode("utf-8")
+
+    def publish(self, pages: List[Dict[str, Any]]) -> int:
+        """
+        Write a new snapshot and return its generation. Pages that do not fit
+        in the segment are dropped from the end.
+        """
+        capacity = self._shm.size - _HEADER.size
+        payload = self._encode(pages)
+        while len(payload) > capacity and pages:
+            pages = pages[:-1]
+            payload = self._encode(pages)
+        with self._write_lock:
+            seq, generation, _ = _HEADER.unpack_from(self._shm.buf, 0)
+            generation += 1
+            _HEADER.pack_into(self._shm.buf, 0, seq + 1, generation, 0)
+            self._shm.buf[_HEADER.size : _HEADER.size + len(payload)] = payload
+            _HEADER.pack_into(self._shm.buf, 0, seq + 2, generation, len(payload))
+        return generation
+
+    def wait_for_change(
+        self,
+        generation: int,
+        timeout: Optional[float],
+        stop_event: Optional[Any] = None,
+    ) -> bool:
+        """
+        Block until the generation differs from the given one, the stop_event
+        is set or the timeout elapses. Returns True if the pages changed.
+        """
+
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self.generation == generation:
+            if stop_event is not None and stop_event.is_set():
+                break
+            step = config.pages_poll_interval
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                step = min(step, remaining)
+            time.sleep(step)
+        return self.generation != generation
+
+    def read(self, retries: int = 100) -> List[Dict[str, Any]]:
+        """
+        Return the current pages. Falls back to the last decoded snapshot if
+        a consistent read is not possible.
+        """
+        buf = self._shm.buf
+        for _ in range(retries):
+            seq, generation, length = _HEADER.unpack_from(buf, 0)
+            if seq % 2:
+                continue
+            if generation == self._cached_generation:
+                return list(self._cached_pages)
+            payload = bytes(buf[_HEADER.size : _HEADER.size + length])
+            if _HEADER.unpack_from(buf, 0)[0] != seq:
+                continue
+            try:
+                rows = json.loads(payload) if payload else []
+            except ValueError:
+                continue
+            self._cached_pages = [dict(zip(_FIELDS, row)) for row in rows]
+            self._cached_generation = generation
+            break
+        return list(self._cached_pages)
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        return iter(self.read())
+
+    def __len__(self) -> int:
+        return len(self.read())
+
+    def close(self) -> None:
+        """Close this process' view of the segment; the owner also unlinks it."""
+        with _attached_lock:
+            if _attached.get(self._shm.name) is self:
+                del _attached[self._shm.name]
+        try:
+            self._shm.close()
+            if self._owner:
+                self._shm.unlink()
+        except Exception:
+            logger.debug("Failed to close shared page snapshot", exc_info=True)
@@ -0,0 +1,446 @@
+"""
+Shared presence host that runs many presences as threads in one process.
+"""
+
+import os
+import itertools
+import threading
+import multiprocessing as _mp
+from multiprocessing.connection import Connection
+from typing import Dict, Optional, Any, Set
+
+from .constants import config
+from .logger import logger
+from .presence_spec import PresenceJob
+from .status_channel import (
+    StatusChannel,
+    flush_status_channels,
+    install_status_channel,
+)
+
+
+class _HostedTask:
+    """
+    A presence running as a thread inside the host process.
+    """
+
+    def __init__(self, name: str, run_id: int, job: PresenceJob):
+        self.name = name
+        self.run_id = run_id
+        self.job = job
+        self.stop_event = threading.Event()
+        self.thread: Optional[threading.Thread] = None
+        # ControlHandler of the run, kept so a profile spans several messages
+        self.control: Optional[Any] = None
+
+
+def host_main(
+    commands: Connection,
+    events: Connection,
+    status_channel: Optional[StatusChannel] = None,
+) -> None:
+    """
+    Host process entrypoint. Receives start/stop/restart commands from the
+    PresenceManager and runs each presence in its own thread. Exceptions
+    raised by a presence end its thread only and are reported as exit codes.
+    A restart waits for the previous thread off the command loop; a thread
+    that ignores its stop_event is reported as stuck instead of replaced.
+
+    Parameters:
+        commands (Connection): Receiving end of the command pipe.
+        events (Connection): Sending end of the event pipe.
+        status_channel (Optional[StatusChannel]): Status channel of the host.
+    """
+    # pylint: disable=import-outside-toplevel
+    from .worker import run_presence
+    from .worker_control import ControlHandler
+
+    install_status_channel(status_channel)
+    tasks: Dict[str, _HostedTask] = {}
+    # run ids of restarts waiting for the previous thread to exit
+    pending: Dict[str, int] = {}
+    tasks_lock = threading.RLock()
+    send_lock = threading.Lock()
+
+    def send_event(*event: Any) -> None:
+        with send_lock:
+            try:
+                events.send(event)
+            except Exception:
+                logger.debug("Failed to send host event %s", event[0])
+
+    def run_task(task: _HostedTask) -> None:
+        try:
+            exit_code = run_presence(task.job, stop_event=task.stop_event, hosted=True)
+        except BaseException:
+            logger.exception("Hosted presence %s crashed", task.name)
+            exit_code = 1
+        send_event("exited", task.name, task.run_id, exit_code)
+
+    def start_task(name: str, run_id: int, job: PresenceJob) -> None:
+        with tasks_lock:
+            task = tasks.get(name)
+            if task is not None and task.thread is not None and task.thread.is_alive():
+                logger.warning("Hosted presence %s is already running", name)
+                return
+            task = _HostedTask(name, run_id, job)
+            task.thread = threading.Thread(
+                target=run_task, args=(task,), name=f"hosted:{name}", daemon=True
+            )
+            tasks[name] = task
+            task.thread.start()
+            task.control = ControlHandler(name, job.shared_state, [task.thread.ident])
+        send_event("started", name, run_id)
+
+    def control_task(name: str, message: Any) -> None:
+        task = tasks.get(name)
+        if task is None or task.control is None or not task.thread.is_alive():
+            logger.debug("Control message for stopped presence %s", name)
+            return
+        task.control.handle(message)
+
+    def stop_task(name: str) -> None:
+        with tasks_lock:
+            task = tasks.get(name)
+            run_id = pending.pop(name, None)
+        if run_id is not None:
+            # the restarted run is stopped before it started
+            send_event("exited", name, run_id, 0)
+        if task is not None:
+            task.stop_event.set()
+
+    def replace_task(task: _HostedTask, run_id: int) -> None:
+        if task.thread is not None:
+            task.thread.join(timeout=config.hosted_restart_timeout)
+            if task.thread.is_alive():
+                with tasks_lock:
+                    if pending.get(task.name) != run_id:
+                        return
+                    del pending[task.name]
+                logger.warning("Hosted presence %s ignores its stop_event", task.name)
+                send_event("stuck", task.name, run_id)
+                return
+        with tasks_lock:
+            # a stop or another restart may have superseded this one
+            if pending.get(task.name) != run_id:
+                return
+            del pending[task.name]
+            start_task(task.name, run_id, task.job)
+
+    def restart_task(name: str, run_id: int) -> None:
+        with tasks_lock:
+            task = tasks.get(name)
+            if task is None:
+                send_event("exited", name, run_id, 1)
+                return
+            superseded = pending.get(name)
+            pending[name] = run_id
+        if superseded is not None:
+            send_event("exited", name, superseded, 0)
+        task.stop_event.set()
+        # waiting here would stall the commands of every other presence
+        threading.Thread(
+            target=replace_task,
+            args=(task, run_id),
+            name=f"hosted-restart:{name}",
+            daemon=True,
+        ).start()
+
+    logger.info("Presence host started (pid=%s)", os.getpid())
+    while True:
+        try:
+            message = commands.recv()
+        except (EOFError, OSError):
+            break
+        op = message[0]
+        if op == "start":
+            start_task(message[1], message[2], message[3])
+        elif op == "stop":
+            stop_task(message[1])
+        elif op == "control":
+            control_task(message[1], message[2])
+        elif op == "restart":
+            restart_task(message[1], message[2])
+        elif op == "shutdown":
+            break
+
+    for name in list(tasks):
+        stop_task(name)
+    for task in tasks.values():
+        if task.thread is not None:
+            task.thread.join(timeout=5)
+    flush_status_channels()
+    logger.info("Presence host stopped")
+
+
+class HostedStopEvent:
+    """
+    Parent-side stop_event for a hosted presence. Setting it sends a stop
+    command to the host, which sets the presence's thread-local event.
+    """
+
+    def __init__(self, host: "PresenceHost", name: str):
+        self._host = host
+        self._name = name
+        self._set = False
+
+    def set(self) -> None:
+        """Request the hosted presence to stop."""
+        self._set = True
+        self._host.send("stop", self._name)
+
+    def is_set(self) -> bool:
+        """Return True once a stop was requested."""
+        return self._set
+
+
+class HostedControl:
+    """
+    Parent-side control pipe of a hosted presence. Messages are forwarded
+    to the host, which handles them for the presence's thread.
+    """
+
+    def __init__(self, host: "PresenceHost", name: str):
+        self._host = host
+        self._name = name
+
+    def send(self, message: Any) -> None:
+        """Send a control message to the hosted presence."""
+        self._host.send("control", self._name, message)
+
+    def close(self) -> None:
+        """Nothing to release: the host's command pipe is shared."""
+
+
+class HostedProcess:
+    """
+    Parent-side handle of a hosted presence. Mirrors the parts of the
+    multiprocessing.Process interface used by PresenceManager.
+    """
+
+    def __init__(self, host: "PresenceHost", name: str, run_id: int):
+        self.name = name
+        self.run_id = run_id
+        self.stop_event = HostedStopEvent(host, name)
+        self.control = HostedControl(host, name)
+        self.exitcode: Optional[int] = None
+        self._host = host
+        self._exited = threading.Event()
+        # the receiving end becomes readable (EOF) once the presence exited
+        self._sentinel, self._sentinel_send = _mp.Pipe(duplex=False)
+
+    @property
+    def pid(self) -> Optional[int]:
+        """PID of the host process running this presence."""
+        return self._host.pid
+
+    @property
+    def sentinel(self) -> Connection:
+        """
+        Object that becomes ready for multiprocessing.connection.wait when
+        the hosted presence exits, like multiprocessing.Process.sentinel.
+        """
+        return self._sentinel
+
+    def is_alive(self) -> bool:
+        """Return True while the hosted presence is running."""
+        return not self._exited.is_set()
+
+    def join(self, timeout: Optional[float] = None) -> None:
+        """Wait until the hosted presence exits."""
+        self._exited.wait(timeout)
+
+    def terminate(self) -> None:
+        """
+        Threads cannot be killed, so a presence that ignores its stop_event is
+        abandoned: it is reported as exited and left to die with the host.
+        """
+        logger.warning("Abandoning hosted presence %s", self.name)
+        self.stop_event.set()
+        self.mark_exited(-15)
+
+    def close(self) -> None:
+        """
+        Release the sentinel pipe, once the exit was handled. Like
+        multiprocessing.Process.close, the handle must have exited, which
+        already closed the sending end.
+        """
+        self._sentinel.close()
+
+    def mark_exited(self, exit_code: Optional[int]) -> None:
+        """Record the exit of the hosted presence."""
+        if not self._exited.is_set():
+            self.exitcode = exit_code
+            self._exited.set()
+            self._sentinel_send.close()
+
+
+class PresenceHost:
+    """
+    Parent-side controller of the shared presence host process.
+    """
+
+    def __init__(self, status: Optional[Any] = None, ctx: Optional[Any] = None) -> None:
+        # StatusBoard opening the status channel of the host process
+        self.status = status
+        # same start method as every other worker, never a bare fork
+        self._ctx = ctx if ctx is not None else _mp.get_context()
+        self._process: Optional[Any] = None
+        self._commands: Optional[Connection] = None
+        self._events: Optional[Connection] = None
+        self._listener: Optional[threading.Thread] = None
+        self._handles: Dict[str, HostedProcess] = {}
+        # presences whose thread in the running host ignored its stop_event
+        self._evicted: Set[str] = set()
+        self._lock = threading.Lock()
+        self._run_ids = itertools.count(1)
+
+    @property
+    def pid(self) -> Optional[int]:
+        """PID of the host process, if running."""
+        return self._process.pid if self._process is not None else None
+
+    def is_alive(self) -> bool:
+        """Return True if the host process is running."""
+        return self._process is not None and self._process.is_alive()
+
+    def accepts(self, name: str) -> bool:
+        """
+        Return False for a presence that left a stuck thread behind in the
+        running host; it runs in a process worker until the host respawns.
+        """
+        with self._lock:
+            return name not in self._evicted
+
+    def _ensure_started(self) -> None:
+        if self.is_alive():
+            return
+        with self._lock:
+            self._evicted.clear()
+        commands_recv, commands_send = self._ctx.Pipe(duplex=False)
+        events_recv, events_send = self._ctx.Pipe(duplex=False)
+        channel = self.status.open_channel() if self.status is not None else None
+        process = self._ctx.Process(
+            target=host_main,
+            args=(
+                commands_recv,
+                events_send,
+                channel,
+            ),
+            name="rpp-presence-host",
+            daemon=False,
+        )
+        try:
+            process.start()
+        finally:
+            if channel is not None:
+                channel.close()
+        commands_recv.close()
+        events_send.close()
+        self._process = process
+        self._commands = commands_send
+        self._events = events_recv
+        self._listener = threading.Thread(
+            target=self._listen, args=(events_recv,), daemon=True
+        )
+        self._listener.start()
+        logger.info("Started presence host with PID %d", process.pid)
+
+    def _listen(self, events: Connection) -> None:
+        """
+        Apply host events to the parent-side handles until the host exits.
+        """
+        while True:
+            try:
+                event = events.recv()
+            except (EOFError, OSError):
+                break
+            if event[0] == "started":
+                logger.info("Hosted presence %s started", event[1])
+            elif event[0] == "exited":
+                _, name, run_id, exit_code = event
+                logger.info("Hosted presence %s exited with code %s", name, exit_code)
+                with self._lock:
+                    handle = self._handles.get(name)
+                # ignore exits of previous runs replaced by a restart
+                if handle is not None and handle.run_id == run_id:
+                    handle.mark_exited(exit_code)
+            elif event[0] == "stuck":
+                _, name, run_id = event
+                logger.warning(
+                    "Hosted presence %s did not stop; moving it to a process worker",
+                    name,
+                )
+                with self._lock:
+                    self._evicted.add(name)
+                    handle = self._handles.get(name)
+                # the restart never ran: the supervisor starts it again
+                if handle is not None and handle.run_id == run_id:
+                    handle.mark_exited(1)
+
+        # host process is gone: every hosted presence died with it
+        exit_code = None
+        if self._process is not None:
+            self._process.join(timeout=1)
+            exit_code = self._process.exitcode
+        with self._lock:
+            handles = list(self._handles.values())
+        for handle in handles:
+            handle.mark_exited(exit_code if exit_code is not None else -1)
+
+    def send(self, *message: Any) -> None:
+        """Send a command to the host process."""
+        with self._lock:
+            if self._commands is None:
+                return
+            try:
+                self._commands.send(message)
+            except Exception:
+                logger.exception("Failed to send %s to presence host", message[0])
+
+    def start(self, name: str, job: PresenceJob) -> HostedProcess:
+        """
+        Start a presence in the host process.
+
+        Parameters:
+            name (str): Presence name.
+            job (PresenceJob): The presence to run.
+        """
+        self._ensure_started()
+        handle = HostedProcess(self, name, next(self._run_ids))
+        with self._lock:
+            self._handles[name] = handle
+        self.send("start", name, handle.run_id, job)
+        return handle
+
+    def restart(self, name: str) -> Optional[HostedProcess]:
+        """
+        Restart a presence inside the host without respawning the host.
+        Returns the handle of the new run; the caller retires the handle of
+        the previous run once nothing refers to it any more.
+        """
+        with self._lock:
+            previous = self._handles.get(name)
+        if previous is None or not previous.is_alive() or not self.is_alive():
+            return None
+        handle = HostedProcess(self, name, next(self._run_ids))
+        with self._lock:
+            self._handles[name] = handle
+        self.send("restart", name, handle.run_id)
+        return handle
+
+    def shutdown(self, timeout: float = 5.0) -> None:
+        """Stop every hosted presence and the host process."""
+        if self._process is None:
+            return
+        self.send("shutdown")
+        self._process.join(timeout=timeout)
+        if self._process.is_alive():
+            logger.warning("Presence host did not exit; terminating")
+            self._process.terminate()
+            self._process.join()
+        with self._lock:
+            if self._commands is not None:
+                self._commands.close()
+                self._commands = None
+        logger.info("Shut down presence host")
@@ -2,306 +2,31 @@
 Presence manager that discovers and runs presence workers.
 """
 
-import os
-import inspect
-import sys
-import json
+import time
 import pathlib
 import threading
-import multiprocessing as _mp
-import importlib
-import importlib.util
-import re
-import types
-from typing import Dict, Optional, Any
-
-from .utils import resolve_callable
-from .github_sync import sync, force_sync
-from .logger import logger, get_logger
+import functools
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import Dict, Optional, Any, Set, Tuple
+
+from .github_sync import sync, force_sync, invalidate_remote_tree
+from .logger import logger
 from .constants import config
 from .worker_spec import WorkerSpecification
-from .rpc import ClientRPC
+from .presence_host import HostedProcess, PresenceHost
+from .worker_pool import WorkerPool, get_worker_context
+from .page_snapshot import SharedPageSnapshot
+from .status_channel import StatusBoard
+from .supervisor import Supervisor
+from .watchdog import Watchdog
+from .url_matcher import UrlMatcher
+from .worker_lifecycle import WorkerMonitor, stop_workers
+from .discovery_index import DiscoveryIndex, directory_fingerprint
+from .presence_watcher import PresenceWatcher
+from .presence_spec import CompiledPresence, PresenceJob, compile_presence
 from .runtime.runtime import Runtime
-from .runtime.runtime_shim import SimpleRuntimeShim
 from .steam import SteamAccount
-
-
-# pylint: disable=too-many-branches
-# pylint: disable=too-many-locals
-# pylint: disable=too-many-nested-blocks
-def process_worker(
-    path: str,
-    entrypoint: str,
-    callable_name: str,
-    interval: int,
-    client_id: Optional[str] = None,
-    stop_event: Optional[Any] = None,
-    shared_pages: Optional[Any] = None,
-    steam_account: Optional[SteamAccount] = None,
-    shared_state: Optional[Any] = None,
-) -> None:
-    """
-    Worker process entrypoint. Loads and runs the specified presence worker.
-
-    Parameters:
-        path (str): Path to the presence worker module.
-        entrypoint (str): Entrypoint filename within the module.
-        callable_name (str): Name of the callable to execute.
-        interval (int): Update interval in seconds.
-        client_id (Optional[str]): RPC client ID.
-        stop_event (Optional[Any]): Multiprocessing Event to signal shutdown.
-        shared_pages (Optional[Any]): Manager list proxy for shared pages.
-        steam_account (Optional[SteamAccount]): Steam account to use.
-        shared_state (Optional[Any]): Manager dict proxy for sharing RPC state.
-    """
-    rpc: Optional[ClientRPC] = None
-    runtime: Optional[Any] = None
-
-    try:
-        logger.debug(
-            "process_worker starting in pid=%s name=%s",
-            os.getpid(),
-            _mp.current_process().name,
-        )
-
-        rpc = ClientRPC(client_id=client_id, debug=True)
-        rpc.connect()
-        module_path = pathlib.Path(path)
-
-        package_base_name = None
-        try:
-            manifest_file_early = module_path / "manifest.json"
-            if manifest_file_early.exists():
-                try:
-                    mf_early = json.loads(
-                        manifest_file_early.read_text(encoding="utf-8", errors="ignore")
-                    )
-                except Exception:
-                    mf_early = None
-            else:
-                mf_early = None
-        except Exception:
-            mf_early = None
-
-        process_name = "pp_" + module_path.name
-
-        # if manifest specifies imports, create a temporary package and preload files
-        try:
-            imports_list = None
-            if mf_early and isinstance(mf_early, dict):
-                imports_list = mf_early.get("imports")
-            if imports_list and isinstance(imports_list, list):
-                package_base_name = re.sub(r"[^0-9a-zA-Z_]+", "_", module_path.name)
-                package_name = f"presences.{package_base_name}"
-                pkg_mod = types.ModuleType(package_name)
-                pkg_mod.__path__ = [str(module_path)]
-                sys.modules[package_name] = pkg_mod
-                for fname in imports_list:
-                    try:
-                        file_path = module_path / fname
-                        if not file_path.exists():
-                            logger.warning(
-                                "Import file %s listed in manifest not found for %s",
-                                fname,
-                                module_path,
-                            )
-                            continue
-                        mod_name = f"{package_name}.{file_path.stem}"
-                        spec_i = importlib.util.spec_from_file_location(
-                            mod_name, str(file_path)
-                        )
-                        if spec_i and spec_i.loader:
-                            m = importlib.util.module_from_spec(spec_i)
-                            spec_i.loader.exec_module(m)
-                            sys.modules[mod_name] = m
-                            logger.info(
-                                "Preloaded import %s for %s", fname, module_path
-                            )
-                    except Exception:
-                        logger.debug(
-                            "Failed to preload import %s for %s", fname, module_path
-                        )
-
-                # set process_name to a namespaced module so __package__ is correct
-                entry_stem = pathlib.Path(entrypoint).stem
-                process_name = f"{package_name}.{entry_stem}"
-        except Exception:
-            process_name = "pp_" + module_path.name
-
-        spec = importlib.util.spec_from_file_location(
-            process_name, str(module_path / entrypoint)
-        )
-        if spec is None or spec.loader is None:
-            logger.error("Could not load module for presence worker at %s", path)
-            sys.exit(1)
-
-        module = importlib.util.module_from_spec(spec)
-        spec.loader.exec_module(module)
-
-        func, resolved_name = resolve_callable(module, callable_name)
-        if func is None:
-            logger.error(
-                "Callable %s not found in module %s", callable_name, entrypoint
-            )
-            sys.exit(1)
-        if resolved_name != callable_name:
-            logger.warning(
-                "Requested callable %s not found, using %s instead",
-                callable_name,
-                resolved_name,
-            )
-
-        # prepare extensible context
-        manifest_file = module_path / "manifest.json"
-        web_enabled = False
-        if manifest_file.exists():
-            try:
-                mf = json.loads(
-                    manifest_file.read_text(encoding="utf-8", errors="ignore")
-                )
-                web_enabled = bool(mf.get("web", False))
-            except Exception as exc:
-                logger.debug("Could not read manifest for %s: %s", module_path, exc)
-                web_enabled = False
-        else:
-            logger.debug(
-                "No manifest.json for %s; runtime will be disabled unless manifest sets web:true",
-                module_path,
-            )
-
-        runtime = None
-        if web_enabled:
-            logger.debug("Web runtime enabled for worker %s", module_path.name)
-            if shared_pages is not None:
-                try:
-                    logger.debug(
-                        "Using shared pages proxy inside worker %s", module_path.name
-                    )
-                    runtime = SimpleRuntimeShim(shared_pages)
-                    try:
-                        pages_count = len(list(shared_pages))
-                    except Exception:
-                        pages_count = 0
-                    logger.debug(
-                        "Using shared pages proxy inside worker %s (pages=%d)",
-                        module_path.name,
-                        pages_count,
-                    )
-                    logger.debug(
-                        "Worker runtime type=shim (shared_pages) module=%s",
-                        module_path.name,
-                    )
-                except Exception as exc:
-                    runtime = None
-                    logger.debug(
-                        "Failed to build runtime from shared_pages for %s: %s",
-                        module_path.name,
-                        exc,
-                    )
-            else:
-                try:
-                    runtime = Runtime(origin=f"worker:{module_path.name}")
-                    try:
-                        try:
-                            runtime.load(start_background=False)
-                        except TypeError:
-                            runtime.load()
-
-                    except Exception as inner_exc:
-                        runtime = None
-                        logger.debug(
-                            "Failed to initialize local Runtime for %s: %s",
-                            module_path.name,
-                            inner_exc,
-                        )
-                except Exception as exc:
-                    runtime = None
-                    logger.debug(
-                        "Failed to create Runtime for %s: %s", module_path.name, exc
-                    )
-
-        context: Dict[str, Any] = {
-            "client_id": client_id,
-            "path": str(module_path),
-            "interval": interval,
-            "runtime": runtime,
-            "stop_event": stop_event,
-            "process_name": process_name,
-            "steam_account": steam_account,
-            "shared_state": shared_state,
-        }
-        try:
-            signature = inspect.signature(func)
-            params = list(signature.parameters.values())
-            logger.debug("Calling worker %s with params: %s", path, params)
-            if len(params) == 0:
-                result = func()
-            else:
-                args = []
-                for p in params:
-                    if p.name == "rpc":
-                        args.append(rpc)
-                    elif p.name == "context":
-                        args.append(context)
-                    elif p.name == "stop_event":
-                        args.append(stop_event)
-                    elif p.name in ("runtime", "rt"):
-                        args.append(runtime)
-                    elif p.name in ("steam_account", "sa"):
-                        args.append(steam_account)
-                    elif p.name == "interval":
-                        args.append(interval)
-                    elif p.name == "logger":
-                        args.append(get_logger("worker"))
-                    elif p.name == "shared_state":
-                        args.append(shared_state)
-                    else:
-                        args.append(context)
-                result = func(*args)
-
-            if isinstance(result, dict) and rpc is not None:
-                try:
-                    rpc.update(
-                        state=result.get("state"),
-                        details=result.get("details"),
-                        activity_type=result.get("activity_type"),
-                        start_time=result.get("start_time"),
-                        end_time=result.get("end_time"),
-                        large_image=result.get("large_image"),
-                        large_text=result.get("large_text"),
-                        small_image=result.get("small_image"),
-                        small_text=result.get("small_text"),
-                        buttons=result.get("buttons"),
-                    )
-                except Exception:
-                    logger.exception("Failed to call rpc.update for %s", path)
-        except Exception:
-            logger.exception("Error calling callable for worker %s", path)
-            sys.exit(1)
-    except Exception as exc:
-        logger.exception("Fatal error in process_worker for %s -> %s", path, exc)
-    finally:
-        if rpc is not None:
-            try:
-                try:
-                    rpc.clear_activity()
-                except Exception:
-                    logger.debug(
-                        "rpc.clear_activity() failed (continuing to close)",
-                        exc_info=True,
-                    )
-                rpc.close()
-            except Exception:
-                logger.exception("Error closing rpc for worker %s", path)
-        if runtime is not None:
-            try:
-                # if runtime has a close method, call it
-                close_fn = getattr(runtime, "close", None)
-                if callable(close_fn):
-                    # pylint: disable=not-callable
-                    close_fn()
-            except Exception:
-                logger.exception("Error closing runtime for worker %s", path)
+from .worker import process_worker
 
 
 class PresenceManager:
@@ -318,12 +43,43 @@ class PresenceManager:
         self.default_backoff = default_backoff
         self.presences_dir = config.presences_dir
         self.workers: Dict[str, WorkerSpecification] = {}
-        self.supervisor_thread: Optional[threading.Thread] = None
+        self.supervisor = Supervisor(self._restart_crashed)
         self.steam_account: Optional[SteamAccount] = None
         self._stop_event = threading.Event()
         self._lock = threading.Lock()
-        self._mp_manager = None
-        self.shared_pages = None
+        self._discovery_pool: Optional[ThreadPoolExecutor] = None
+        self._discover_lock = threading.Lock()
+        self._verifying: Dict[str, Tuple[str, Future]] = {}
+        self._index = DiscoveryIndex()
+        self._watcher: Optional[PresenceWatcher] = None
+        self._dev = False
+        self._ctx = get_worker_context()
+        self._status = StatusBoard(self._ctx)
+        self._worker_monitor = WorkerMonitor(self._status, self.supervisor)
+        self.shared_pages: Optional[SharedPageSnapshot] = None
+        try:
+            self.shared_pages = SharedPageSnapshot.create()
+        except Exception:
+            logger.exception("Failed to create shared pages snapshot")
+        self._pages_shared = False
+        self._last_pages: Optional[list] = None
+        self._matcher = UrlMatcher()
+        self._last_match: Dict[str, float] = {}
+        self._matched_names: Set[str] = set()
+        self._watchdog = Watchdog(
+            self.list_workers, self._status.get_heartbeat, self._on_hang
+        )
+        if config.watchdog_enabled:
+            self._watchdog.start()
+        self._host = PresenceHost(status=self._status, ctx=self._ctx)
+        self._pool: Optional[WorkerPool] = None
+        if config.worker_pool_size > 0:
+            self._pool = WorkerPool(
+                size=config.worker_pool_size,
+                ctx=self._ctx,
+                status=self._status,
+            )
+            self._pool.fill_async()
         self._runtime = runtime
         if self._runtime is None:
             try:
@@ -351,15 +107,21 @@ class PresenceManager:
 
     def _sync_pages_loop(self) -> None:
         """
-        Background loop that refreshes the shared_pages proxy from the
-        manager's Runtime. Runs until self._stop_event is set.
+        Background loop that refreshes the shared pages snapshot from the
+        manager's Runtime. A new generation is only published when the pages
+        changed, which waiting workers notice on their next poll. Runs until
+        self._stop_event is set.
         """
         logger.debug(
             "Starting shared pages sync loop (interval=%s)", self._pages_sync_interval
         )
         while not self._stop_event.is_set():
             try:
-                if self.shared_pages is not None and self._runtime is not None:
+                if (
+                    (self._pages_shared or self._has_armed())
+                    and self.shared_pages is not None
+                    and self._runtime is not None
+                ):
                     # skip sync if runtime has no protocol set (no browser connected)
                     if not getattr(self._runtime, "protocol", None):
                         self._stop_event.wait(
@@ -379,28 +141,9 @@ class PresenceManager:
                             "Runtime.load() failed in pages sync loop", exc_info=True
                         )
 
-                    snapshot = []
-                    try:
-                        pages = list(self._runtime.pages)
-                    except Exception:
-                        pages = []
-
-                    for p in pages:
-                        try:
-                            page_data = {
-                                "id": getattr(p, "id", None),
-                                "url": getattr(p, "url", None),
-                                "title": getattr(p, "title", None),
-                                "ws_url": getattr(p, "ws_url", None),
-                                "protocol": getattr(p, "protocol", "shim"),
-                            }
-                            snapshot.append(page_data)
-                        except Exception:
-                            continue
-                    try:
-                        self.shared_pages[:] = snapshot
-                    except Exception:
-                        logger.debug("Failed to update shared_pages proxy")
+                    snapshot = self._pages_to_dicts()
+                    self._publish_pages(snapshot)
+                    self._apply_matches(snapshot)
             except Exception:
                 logger.exception("Error in shared pages sync loop")
             self._stop_event.wait(
@@ -409,10 +152,141 @@ class PresenceManager:
                 else 1.0
             )
 
+    def _refresh_matcher(self) -> None:
+        """Rebuild the URL match index from the discovered presences."""
+        workers = self.list_workers()
+        for name, spec in workers.items():
+            self._matcher.set(name, spec.matches)
+        for name in self._matched_names - set(workers):
+            self._matcher.remove(name)
+            with self._lock:
+                self._last_match.pop(name, None)
+        self._matched_names = set(workers)
+
+    def _has_armed(self) -> bool:
+        return any(spec.armed for spec in self.list_workers().values())
+
+    def arm(self, worker_spec: WorkerSpecification) -> None:
+        """
+        Start a presence on demand. Presences whose manifest declares URL
+        "matches" are armed instead of started: the process starts when a
+        matching tab appears and is stopped again config.auto_suspend_grace
+        seconds after the last one closed. Other presences start right away.
+
+        Parameters:
+            worker_spec (WorkerSpecification): The specification of the worker.
+        """
+        if not worker_spec.matches or not config.auto_start_web:
+            self.start(worker_spec)
+            return
+        worker_spec.armed = True
+        logger.info("Armed %s; it starts when a matching tab opens", worker_spec.name)
+        if self._last_pages is not None:
+            self._apply_matches(self._last_pages)
+
+    def _apply_matches(self, pages: list) -> None:
+        """
+        Start armed presences that have a matching tab and suspend the ones
+        without one for longer than the grace period. The starts and stops
+        run on the supervisor thread, so a slow stop never holds up the
+        publishing of pages.
+        """
+        with self._lock:
+            if not any(spec.armed for spec in self.workers.values()):
+                return
+        matched = self._matcher.match_all(page.get("url") or "" for page in pages)
+        now = time.monotonic()
+        with self._lock:
+            for name, worker_spec in self.workers.items():
+                if not worker_spec.armed:
+                    continue
+                if name in matched:
+                    self._last_match[name] = now
+                    if not self._is_alive(worker_spec):
+                        self.supervisor.run_soon(
+                            name, functools.partial(self._start_matched, worker_spec)
+                        )
+                elif self._is_alive(worker_spec):
+                    idle_for = now - self._last_match.setdefault(name, now)
+                    if idle_for >= config.auto_suspend_grace:
+                        self.supervisor.run_soon(
+                            name, functools.partial(self._suspend, worker_spec)
+                        )
+
+    @staticmethod
+    def _is_alive(worker_spec: WorkerSpecification) -> bool:
+        process = worker_spec.process
+        return process is not None and process.is_alive()
+
+    def _start_matched(self, worker_spec: WorkerSpecification) -> None:
+        """Start an armed presence a matching tab was found for."""
+        if not worker_spec.armed or self._is_alive(worker_spec):
+            return
+        logger.info("Matching tab found; starting %s", worker_spec.name)
+        try:
+            self.start(worker_spec)
+        except Exception as exc:
+            logger.debug("Could not start armed %s: %s", worker_spec.name, exc)
+
+    def _suspend(self, worker_spec: WorkerSpecification) -> None:
+        """Stop an armed presence whose matching tabs are all closed."""
+        with self._lock:
+            # a matching tab may have opened again since the stop was queued
+            idle_for = time.monotonic() - self._last_match.get(worker_spec.name, 0)
+            if not worker_spec.armed or idle_for < config.auto_suspend_grace:
+                return
+        logger.info(
+            "No matching tabs for %s in %.0fs; suspending", worker_spec.name, idle_for
+        )
+        self.stop(worker_spec)
+        worker_spec.armed = True
+
+    def _publish_pages(self, snapshot: list) -> None:
+        """
+        Publish a pages snapshot unless it equals the last published one.
+        """
+        if self.shared_pages is None or snapshot == self._last_pages:
+            return
+        try:
+            generation = self.shared_pages.publish(snapshot)
+            self._last_pages = snapshot
+            logger.debug(
+                "Published shared pages generation %d (pages=%d)",
+                generation,
+                len(snapshot),
+            )
+        except Exception:
+            logger.debug("Failed to publish shared pages snapshot")
+
+    def _pages_to_dicts(self) -> list:
+        """
+        Return the current Runtime.pages as a list of page dicts.
+        """
+        snapshot = []
+        try:
+            pages = list(self._runtime.pages)
+        except Exception:
+            pages = []
+
+        for p in pages:
+            try:
+                snapshot.append(
+                    {
+                        "id": getattr(p, "id", None),
+                        "url": getattr(p, "url", None),
+                        "title": getattr(p, "title", None),
+                        "ws_url": getattr(p, "ws_url", None),
+                        "protocol": getattr(p, "protocol", "shim"),
+                    }
+                )
+            except Exception:
+                continue
+        return snapshot
+
     def _build_pages_snapshot(self) -> list:
         """
         Return a list-of-dict snapshot based on the current Runtime.pages.
-        This is used to populate the Manager list proxy immediately when it is
+        This is used to populate the shared snapshot immediately when it is
         created so workers don't see an empty list until the background sync loop runs.
         """
         snapshot = []
@@ -427,123 +301,307 @@ class PresenceManager:
                         "Runtime.load() failed while building snapshot", exc_info=True
                     )
 
-                try:
-                    pages = list(self._runtime.pages)
-                except Exception:
-                    pages = []
-
-                for p in pages:
-                    try:
-                        snapshot.append(
-                            {
-                                "id": getattr(p, "id", None),
-                                "url": getattr(p, "url", None),
-                                "title": getattr(p, "title", None),
-                                "ws_url": getattr(p, "ws_url", None),
-                            }
-                        )
-                    except Exception:
-                        continue
+                snapshot = self._pages_to_dicts()
         except Exception:
             logger.exception("Failed to build pages snapshot")
         return snapshot
 
+    def _build_specification(
+        self, name: str, entry: pathlib.Path, data: dict, sha: str
+    ) -> WorkerSpecification:
+        """
+        Build a worker specification from a presence's parsed manifest.
+        """
+        specification = WorkerSpecification(
+            name=name,
+            path=str(entry),
+            backoff_time=self.default_backoff,
+            manifest_sha=sha,
+            compiled=compile_presence(name, str(entry), data),
+        )
+        specification.entrypoint = data.get("entry", specification.entrypoint)
+        specification.callable_name = data.get(
+            "callable", specification.compiled.callable_name
+        )
+        specification.description = data.get("description", specification.description)
+        specification.interval = data.get("interval", specification.interval)
+        specification.enabled = data.get("enabled", specification.enabled)
+        try:
+            setattr(specification, "web", bool(data.get("web", False)))
+        except Exception:
+            pass
+        specification.hosted = bool(data.get("hosted", False))
+        matches = data.get("matches")
+        specification.matches = list(matches) if isinstance(matches, list) else []
+        specification.on_exit = data.get("on_exit", specification.on_exit)
+        specification.client_id = data.get("client_id", specification.client_id)
+        specification.image = data.get("image", None)
+        logger.info(
+            "Discovered: %s (def %s, uses %ss)",
+            name,
+            specification.callable_name,
+            specification.interval,
+        )
+        return specification
+
+    def _load_specification(
+        self, name: str, entry: pathlib.Path
+    ) -> Optional[WorkerSpecification]:
+        """
+        Build a worker specification from a presence's local manifest, read
+        through the discovery index. Returns None if the manifest is missing
+        or invalid.
+        """
+        try:
+            data, sha = self._index.read_manifest(name, entry)
+        except OSError as exc:
+            logger.warning("Failed to read manifest for presence %s: %s", name, exc)
+            return None
+        if data is None:
+            logger.warning("Manifest file missing for presence: %s", name)
+            return None
+        return self._build_specification(name, entry, data, sha)
+
+    @staticmethod
+    def _carry_runtime_state(
+        source: WorkerSpecification, target: WorkerSpecification
+    ) -> None:
+        """
+        Move the state of a running worker to a freshly loaded specification.
+        """
+        target.running = source.running
+        target.process = source.process
+        target.stop_event = source.stop_event
+        target.shared_state = source.shared_state
+        target.started_at = source.started_at
+        target.startup_latency = source.startup_latency
+        target.armed = source.armed
+
+    @staticmethod
+    def _verify(
+        name: str, entry: pathlib.Path, dev: bool
+    ) -> Tuple[bool, str, bool, str]:
+        """
+        Check a presence against the remote repository. In dev mode an out of
+        sync presence is force synced.
+        Returns (verified, message, synced, fingerprint after the check).
+        """
+        sync_result, sync_msg = sync(f"presences/{name}", str(entry))
+        synced = False
+        if not sync_result and dev:
+            logger.info("Dev mode: forcing sync for %s", name)
+            sync_result, sync_msg = force_sync(f"presences/{name}", str(entry))
+            synced = sync_result
+        return sync_result, sync_msg, synced, directory_fingerprint(entry)
+
+    def _apply_verdict(self, name: str, entry: pathlib.Path, future: Future) -> None:
+        """
+        Record the verification result of a presence in the index and apply
+        it to its published spec. Verdicts of superseded checks are ignored.
+        """
+        try:
+            verified, message, synced, fingerprint = future.result()
+        except Exception as exc:
+            verified, message, synced = False, f"Sync check failed: {exc}", False
+            fingerprint = ""
+        if fingerprint:
+            self._index.set_verdict(name, fingerprint, verified)
+
+        with self._lock:
+            inflight = self._verifying.get(name)
+            if inflight is None or inflight[1] is not future:
+                return
+            del self._verifying[name]
+            spec = self.workers.get(name)
+            if spec is None:
+                return
+            if not verified:
+                logger.warning("Presence %s skipped: %s", name, message)
+                if not spec.running:
+                    del self.workers[name]
+            else:
+                logger.debug("Presence %s: %s", name, message)
+                fresh = None
+                if synced:
+                    # files changed on disk, so re-read the manifest
+                    fresh = self._load_specification(name, entry)
+                if fresh is not None:
+                    self._carry_runtime_state(spec, fresh)
+                    fresh.verified = True
+                    self.workers[name] = fresh
+                else:
+                    spec.verified = True
+        self._index.save()
+        self._refresh_matcher()
+
+    def _discover_entry(
+        self, name: str, entry: pathlib.Path, force: bool, dev: bool
+    ) -> Optional[Future]:
+        """
+        Bring the spec of one presence directory up to date. The manifest is
+        only re-read when it changed, and a verification is only scheduled
+        when no verdict is known for the current files.
+        Returns the pending verification, if any.
+        """
+        current = self.workers.get(name)
+        if current is not None and current.manifest_sha is not None:
+            try:
+                _, sha = self._index.read_manifest(name, entry)
+            except OSError:
+                sha = ""
+            specification = current if sha == current.manifest_sha else None
+        else:
+            specification = None
+        if specification is None:
+            specification = self._load_specification(name, entry)
+            if specification is None:
+                with self._lock:
+                    if current is not None and not current.running:
+                        del self.workers[name]
+                return None
+            if current is not None:
+                self._carry_runtime_state(current, specification)
+
+        fingerprint = directory_fingerprint(entry)
+        verdict = None
+        if not force:
+            verdict = self._index.verdict(name, fingerprint, config.cache_ttl_seconds)
+        with self._lock:
+            if verdict is not None:
+                specification.verified = verdict
+                if verdict or specification.running:
+                    self.workers[name] = specification
+                else:
+                    logger.debug("Presence %s skipped: failed verification", name)
+                    self.workers.pop(name, None)
+                return None
+            self.workers[name] = specification
+            inflight = self._verifying.get(name)
+            if (
+                not force
+                and inflight is not None
+                and inflight[0] == fingerprint
+                and not inflight[1].done()
+            ):
+                return inflight[1]
+
+        if self._discovery_pool is None:
+            self._discovery_pool = ThreadPoolExecutor(
+                max_workers=config.discovery_workers,
+                thread_name_prefix="discovery",
+            )
+        future = self._discovery_pool.submit(self._verify, name, entry, dev)
+        with self._lock:
+            self._verifying[name] = (fingerprint, future)
+        future.add_done_callback(functools.partial(self._apply_verdict, name, entry))
+        return future
+
     def discover(self, force: bool = False, dev: bool = False) -> None:
         """
         Discover worker specifications in the presences directory.
+
+        Discovery is incremental: removed directories are dropped, manifests
+        are only re-read when they changed on disk and running workers keep
+        their spec. Sync verdicts are persisted in the discovery index and
+        reused while a presence's files are unchanged; force re-verifies
+        every presence against a freshly fetched remote tree. Checks run on
+        a bounded thread pool, share one remote tree listing and their
+        verdicts are applied as they complete. Waits at most
+        config.discovery_timeout seconds for them. Presences that fail
+        verification are dropped.
         """
         if not self.presences_dir.exists():
             logger.warning("Presences directory does not exist")
             return
 
-        running_workers = {}
+        started = time.monotonic()
+        pending = []
         if force:
-            logger.info("Forcing rediscovery of presence workers")
-            for name, spec in self.workers.items():
-                if spec.running and spec.process and spec.process.is_alive():
-                    running_workers[name] = {
-                        "process": spec.process,
-                        "stop_event": getattr(spec, "stop_event", None),
-                        "shared_state": getattr(spec, "shared_state", None),
-                    }
-                    logger.debug("Preserving running state for worker %s", name)
-            self.workers.clear()
-
-        for entry in self.presences_dir.iterdir():
-            if not entry.is_dir():
-                continue
-
-            name = entry.name
-            if name in self.workers:
-                logger.debug("Worker %s already discovered, skipping", name)
-                continue
-
-            sync_result, sync_msg = sync(f"presences/{name}", str(entry))
-            if not sync_result:
-                if dev:
-                    logger.info("Dev mode: forcing sync for %s", name)
-                    sync_result, sync_msg = force_sync(f"presences/{name}", str(entry))
-                    if sync_result:
-                        logger.info("Presence %s: %s", name, sync_msg)
-                    else:
-                        logger.warning("Failed to force sync %s: %s", name, sync_msg)
+            # a forced pass checks against the current remote state
+            invalidate_remote_tree()
+        with self._discover_lock:
+            self._dev = dev
+            entries = {
+                entry.name: entry
+                for entry in self.presences_dir.iterdir()
+                # hidden folders are installs in progress
+                if entry.is_dir() and not entry.name.startswith(".")
+            }
+            with self._lock:
+                for name in [n for n in self.workers if n not in entries]:
+                    if self.workers[name].running:
+                        logger.warning("Presence %s was removed while running", name)
                         continue
-                else:
-                    logger.warning("Presence %s skipped: %s", name, sync_msg)
-                    continue
-            else:
-                logger.debug("Presence %s: %s", name, sync_msg)
-
-            manifest = entry / "manifest.json"
-            if not manifest.exists():
-                logger.warning("Manifest file missing for presence: %s", name)
-                continue
-
-            specification = WorkerSpecification(
-                name=name,
-                path=str(entry),
-                backoff_time=self.default_backoff,
-                verified=sync_result,
-            )
-            try:
-                data = json.loads(manifest.read_text(encoding="utf-8", errors="ignore"))
-                specification.entrypoint = data.get("entry", specification.entrypoint)
-                specification.callable_name = data.get(
-                    "callable", specification.callable_name
-                )
-                specification.description = data.get(
-                    "description", specification.description
-                )
-                specification.interval = data.get("interval", specification.interval)
-                specification.enabled = data.get("enabled", specification.enabled)
-                try:
-                    setattr(specification, "web", bool(data.get("web", False)))
-                except Exception:
-                    pass
-                specification.on_exit = data.get("on_exit", specification.on_exit)
-                specification.client_id = data.get("client_id", specification.client_id)
-                specification.image = data.get("image", None)
-                logger.info(
-                    "Discovered: %s (def %s, uses %ss)",
-                    name,
-                    specification.callable_name,
-                    specification.interval,
+                    logger.info("Presence %s removed", name)
+                    del self.workers[name]
+                    self._verifying.pop(name, None)
+            for name in self._index.names():
+                if name not in entries:
+                    self._index.forget(name)
+
+            for name, entry in entries.items():
+                future = self._discover_entry(name, entry, force, dev)
+                if future is not None:
+                    pending.append(future)
+            self._index.save()
+            self._refresh_matcher()
+            self._start_watcher()
+
+        if pending:
+            _, not_done = wait(pending, timeout=config.discovery_timeout)
+            if not_done:
+                logger.warning(
+                    "Discovery deadline reached with %d presence(s) still verifying",
+                    len(not_done),
                 )
-            except json.JSONDecodeError as exc:
-                logger.error("Failed to parse manifest for presence %s: %s", name, exc)
-                continue
+        logger.info(
+            "Discovered %d presence(s) in %.2fs (%d verified now)",
+            len(self.workers),
+            time.monotonic() - started,
+            len(pending),
+        )
+
+    def _start_watcher(self) -> None:
+        """
+        Start watching the presences directory so changes on disk are
+        applied without an explicit discover call.
+        """
+        if self._watcher is not None or not config.presences_watch:
+            return
+        self._watcher = PresenceWatcher(
+            self.presences_dir,
+            self._on_presences_changed,
+            interval=config.presences_watch_interval,
+        )
+        self._watcher.start()
 
-            if name in running_workers:
-                saved_state = running_workers[name]
-                specification.running = True
-                specification.process = saved_state["process"]
-                if saved_state["stop_event"] is not None:
-                    setattr(specification, "stop_event", saved_state["stop_event"])
-                if saved_state["shared_state"] is not None:
-                    setattr(specification, "shared_state", saved_state["shared_state"])
-                logger.info("Restored running state for worker %s", name)
+    def _on_presences_changed(self, names: set) -> None:
+        """Apply changes reported by the presences directory watcher."""
+        logger.debug("Rediscovering after changes in %s", ", ".join(sorted(names)))
+        self.discover(dev=self._dev)
 
-            self.workers[name] = specification
+    def _compiled_for(
+        self, worker_spec: WorkerSpecification
+    ) -> Optional[CompiledPresence]:
+        """
+        Return the compiled spec of a worker, recompiling it if its
+        entrypoint changed since discovery.
+        """
+        compiled = worker_spec.compiled
+        if compiled is not None and not compiled.is_stale():
+            return compiled
+        try:
+            data, _ = self._index.read_manifest(
+                worker_spec.name, pathlib.Path(worker_spec.path)
+            )
+        except OSError:
+            data = None
+        if data is None:
+            return None
+        worker_spec.compiled = compile_presence(
+            worker_spec.name, worker_spec.path, data
+        )
+        return worker_spec.compiled
 
     def get_worker(self, name: str) -> Optional[WorkerSpecification]:
         """
@@ -555,33 +613,105 @@ class PresenceManager:
         """
         List all discovered worker specifications.
         """
-        return self.workers
+        with self._lock:
+            return dict(self.workers)
 
-    def _monitor_process(self, worker_spec: WorkerSpecification) -> None:
+    def get_startup_latency(self, worker_spec: WorkerSpecification) -> Optional[float]:
         """
-        Monitor a worker process and log its exit.
+        Seconds from the last start request to the first RPC update of a
+        worker, or None if it has not updated yet.
         """
-        process = worker_spec.process
-        if not process:
-            logger.warning(
-                "No process found for monitoring worker %s", worker_spec.name
+        if worker_spec.startup_latency is None:
+            worker_spec.startup_latency = self.get_shared_state(worker_spec).get(
+                "startup_latency"
             )
+        return worker_spec.startup_latency
+
+    def get_shared_state(self, worker_spec: WorkerSpecification) -> Dict[str, Any]:
+        """
+        Return the latest state reported by a worker. Served from memory;
+        workers push updates through the status channel.
+        """
+        return self._status.get(worker_spec.name)
+
+    def _restart_crashed(self, worker_spec: WorkerSpecification) -> None:
+        """
+        Restart a crashed worker on behalf of the supervisor, using the
+        current spec of the presence if it was rediscovered meanwhile.
+        """
+        current = self.workers.get(worker_spec.name)
+        if current is None:
+            logger.info("Not restarting %s: presence removed", worker_spec.name)
             return
-        logger.info("Monitoring worker %s (%s)", worker_spec.name, process.pid)
-        try:
-            process.join()
-            exit_code = process.exitcode
-            logger.info("Worker %s exited with code %s", worker_spec.name, exit_code)
-        except Exception as exc:
-            logger.error("Error monitoring %s: %s", worker_spec.name, exc)
-            exit_code = None
-        finally:
-            worker_spec.process = None
+        if current.process is not None and current.process.is_alive():
+            return
+        self.start(current)
+
+    def profile(
+        self,
+        worker_spec: WorkerSpecification,
+        seconds: float,
+        interval: Optional[float] = None,
+    ) -> None:
+        """
+        Ask a running worker to sample its stacks for a while and write them
+        to config.logs_dir/profiles. Progress and the output path are
+        reported as "last_profile" in the worker's shared state.
+
+        Parameters:
+            worker_spec (WorkerSpecification): The specification of the worker.
+            seconds (float): Profiling duration, capped at
+                config.profile_max_seconds.
+            interval (Optional[float]): Seconds between two samples.
+        """
+        process = worker_spec.process
+        if process is None or not process.is_alive() or worker_spec.control is None:
+            raise RuntimeError(f"{worker_spec.name} is not running")
+        logger.info("Profiling %s for %ss", worker_spec.name, seconds)
+        worker_spec.control.send(("profile", seconds, interval))
+
+    def get_metrics(self, worker_spec: WorkerSpecification) -> Dict[str, Any]:
+        """
+        Return the latest resource figures reported by a worker: CPU time,
+        RSS, thread count, tick count and tick duration histogram.
+
+        Parameters:
+            worker_spec (WorkerSpecification): The specification of the worker.
+        """
+        metrics = self._status.get_metrics(worker_spec.name)
+        if metrics:
+            metrics["running"] = worker_spec.running
+            metrics["hosted"] = worker_spec.hosted
+            metrics["age"] = max(0.0, time.time() - metrics.get("sampled_at", 0))
+        return metrics
+
+    def _on_hang(self, worker_spec: WorkerSpecification, overdue: float) -> None:
+        """
+        Handle a worker found hung by the watchdog: have it dump the stacks
+        of its threads to the logs, then restart it.
+        """
+        logger.warning(
+            "Worker %s sent no heartbeat for %.0fs over its budget; restarting",
+            worker_spec.name,
+            overdue,
+        )
+        self.supervisor.record_hang(worker_spec.name)
+        # do not report the same hang again while the restart is under way
+        self._status.reset_heartbeat(worker_spec.name, time.time())
+        if worker_spec.control is not None:
             try:
-                if hasattr(worker_spec, "stop_event"):
-                    worker_spec.stop_event = None
+                worker_spec.control.send(("dump_stacks",))
+                # the dump is written by the worker's control thread
+                time.sleep(0.5)
             except Exception:
-                pass
+                logger.debug("Failed to request stacks of %s", worker_spec.name)
+        armed = worker_spec.armed
+        self.restart(worker_spec)
+        worker_spec.armed = armed
+
+    def get_restart_stats(self, worker_spec: WorkerSpecification) -> Dict[str, Any]:
+        """Restart statistics of a worker kept by the supervisor."""
+        return self.supervisor.stats(worker_spec.name).to_dict()
 
     def stop(self, worker_spec: WorkerSpecification) -> None:
         """
@@ -590,6 +720,8 @@ class PresenceManager:
         Parameters:
             worker_spec (WorkerSpecification): The specification of the worker to stop.
         """
+        self.supervisor.cancel(worker_spec.name)
+        worker_spec.armed = False
         process = worker_spec.process
         if process and process.is_alive():
             stop_event = getattr(worker_spec, "stop_event", None)
@@ -641,6 +773,7 @@ class PresenceManager:
         if worker_spec.process and worker_spec.process.is_alive():
             logger.warning("%s is already running", worker_spec.name)
             return
+        self.supervisor.check_start(worker_spec)
 
         # Check if web presence requires a browser connection
         try:
@@ -657,110 +790,180 @@ class PresenceManager:
                 worker_spec.name,
             )
 
-        stop_event = _mp.Event()
         needs_shared = needs_browser
 
-        # init multiprocessing Manager if needed
-        if self._mp_manager is None:
-            try:
-                self._mp_manager = _mp.Manager()
-                logger.debug("Initialized multiprocessing.Manager")
-            except Exception:
-                logger.exception("Failed to create multiprocessing.Manager")
-                self._mp_manager = None
-
-        # initialize shared_pages for web workers
-        if needs_shared and self.shared_pages is None and self._mp_manager:
+        # start sharing pages with workers on the first web presence
+        if needs_shared and self.shared_pages is not None and not self._pages_shared:
             try:
-                self.shared_pages = self._mp_manager.list()
-                try:
-                    snapshot = self._build_pages_snapshot()
-                    self.shared_pages[:] = snapshot
-                    logger.debug(
-                        "Populated shared_pages proxy with snapshot (pages=%d)",
-                        len(snapshot),
-                    )
-                except Exception:
-                    logger.debug("Failed to populate shared_pages proxy on init")
-
-                # start the pages sync thread (if not already running)
-                if self._pages_sync_thread is None:
-                    self._pages_sync_thread = threading.Thread(
-                        target=self._sync_pages_loop, daemon=True
-                    )
-                    self._pages_sync_thread.start()
+                snapshot = self._build_pages_snapshot()
+                self._publish_pages(snapshot)
                 logger.debug(
-                    "PresenceManager: passing shared_pages proxy to workers (pages=%d)",
-                    len(self.shared_pages),
+                    "Populated shared pages snapshot (pages=%d)", len(snapshot)
                 )
             except Exception:
-                logger.exception("Failed to create shared_pages for worker")
-                self.shared_pages = None
+                logger.debug("Failed to populate shared pages snapshot on init")
+            self._pages_shared = True
+            logger.debug(
+                "PresenceManager: passing shared pages snapshot %s to workers (pages=%d)",
+                self.shared_pages.name,
+                len(self.shared_pages),
+            )
 
-        shared_state = None
-        if self._mp_manager:
-            try:
-                shared_state = self._mp_manager.dict()
-                logger.debug(
-                    "Created shared_state dict for worker %s", worker_spec.name
-                )
-            except Exception:
-                logger.exception(
-                    "Failed to create shared_state for worker %s", worker_spec.name
-                )
-                shared_state = {}
-        else:
-            shared_state = {}
+        shared_state = self._status.writer(worker_spec.name)
         setattr(worker_spec, "shared_state", shared_state)
 
-        arguments = (
-            str(worker_spec.path),
-            worker_spec.entrypoint,
-            worker_spec.callable_name,
-            worker_spec.interval,
-            worker_spec.client_id,
-            stop_event,
-            self.shared_pages,
-            self.steam_account,
-            worker_spec.shared_state,
+        started_at = time.time()
+        job = PresenceJob(
+            path=str(worker_spec.path),
+            entrypoint=worker_spec.entrypoint,
+            callable_name=worker_spec.callable_name,
+            interval=worker_spec.interval,
+            client_id=worker_spec.client_id,
+            shared_pages=self.shared_pages if needs_shared else None,
+            steam_account=self.steam_account,
+            shared_state=worker_spec.shared_state,
+            started_at=started_at,
+            compiled=self._compiled_for(worker_spec),
         )
-        try:
-            setattr(worker_spec, "stop_event", stop_event)
-        except Exception:
-            pass
-
-        process = _mp.Process(
-            target=process_worker,
-            args=arguments,
-            daemon=False,
+        hosted = (
+            worker_spec.hosted
+            and config.presence_host_enabled
+            and self._host.accepts(worker_spec.name)
         )
-        worker_spec.process = process
-        process.start()
-        monitor = threading.Thread(
-            target=self._monitor_process,
-            args=(worker_spec,),
-            daemon=True,
+        pooled = None
+        if not hosted and self._pool is not None:
+            pooled = self._pool.acquire()
+
+        if hosted:
+            # run inside the shared host process as a thread
+            process = self._host.start(worker_spec.name, job)
+            stop_event = process.stop_event
+            control = process.control
+        elif pooled is not None:
+            # hand the job to an idle, pre-imported worker
+            stop_event = pooled.stop_event
+            control = pooled.control
+            pooled.submit(job)
+            process = pooled.process
+        else:
+            stop_event = self._ctx.Event()
+            control_recv, control = self._ctx.Pipe(duplex=False)
+            # a spawned worker writes its state over its own status pipe
+            channel = self._status.open_channel()
+            shared_state.channel = channel
+            process = self._ctx.Process(
+                target=process_worker,
+                args=(job, stop_event),
+                kwargs={"control": control_recv},
+                daemon=False,
+            )
+            try:
+                process.start()
+            except Exception:
+                control.close()
+                raise
+            finally:
+                shared_state.channel = None
+                channel.close()
+                control_recv.close()
+        worker_spec.started_at = started_at
+        worker_spec.startup_latency = None
+        worker_spec.runs += 1
+        self._worker_monitor.attach(worker_spec, process, stop_event, control)
+        logger.info(
+            "Started worker %s with PID %d%s",
+            worker_spec.name,
+            process.pid,
+            " (pooled)" if pooled is not None else "",
         )
-        monitor.start()
-        logger.info("Started worker %s with PID %d", worker_spec.name, process.pid)
-        worker_spec.running = True
 
-    def stop_all(self, only_web: bool = False) -> None:
+    def restart(self, worker_spec: WorkerSpecification) -> None:
         """
-        Stop all running workers.
+        Restart a worker. Hosted presences are restarted inside the host
+        process, unless their thread ignores its stop_event: such a presence
+        is then started again in a process worker. Process workers are
+        stopped and started again.
+
+        Parameters:
+            worker_spec (WorkerSpecification): The specification of the worker to restart.
+        """
+        logger.info("Restarting worker %s", worker_spec.name)
+        process = worker_spec.process
+        if (
+            isinstance(process, HostedProcess)
+            and process.is_alive()
+            and self._host.is_alive()
+            and self._host.accepts(worker_spec.name)
+        ):
+            handle = self._host.restart(worker_spec.name)
+            if handle is not None:
+                worker_spec.started_at = time.time()
+                self._worker_monitor.attach(
+                    worker_spec, handle, handle.stop_event, handle.control
+                )
+                # retire the previous run only once the spec points past it
+                process.mark_exited(0)
+                return
+        self.stop(worker_spec)
+        self.start(worker_spec)
+
+    def shutdown(self) -> None:
+        """
+        Stop all workers, the shared presence host and the pages sync loop,
+        within config.shutdown_timeout seconds overall.
+        """
+        deadline = time.monotonic() + config.shutdown_timeout
+        self._stop_event.set()
+        for worker_spec in self.list_workers().values():
+            worker_spec.armed = False
+        self.supervisor.close()
+        self._watchdog.close()
+        if self._pool is not None:
+            self._pool.close()
+        self.stop_all(timeout=config.shutdown_timeout)
+        if self._watcher is not None:
+            self._watcher.stop()
+            self._watcher = None
+        if self._discovery_pool is not None:
+            self._discovery_pool.shutdown(wait=False, cancel_futures=True)
+        remaining = max(0.5, deadline - time.monotonic())
+        self._host.shutdown(timeout=remaining)
+        if self._pool is not None:
+            self._pool.shutdown(timeout=max(0.5, deadline - time.monotonic()))
+        self._worker_monitor.close()
+        self._status.close()
+        if self.shared_pages is not None:
+            self.shared_pages.close()
+            self.shared_pages = None
+
+    def stop_all(self, only_web: bool = False, timeout: Optional[float] = None) -> None:
+        """
+        Stop all running workers at once: every stop_event is signalled
+        first, then all workers are awaited together until a single deadline
+        and the ones still running are terminated.
+
+        Parameters:
+            only_web (bool): Only stop web presences.
+            timeout (Optional[float]): Seconds to wait before terminating,
+                defaults to config.shutdown_timeout.
         """
         if only_web:
             logger.info("Stopping all web workers")
-        for worker_spec in self.workers.values():
-            if worker_spec.process and worker_spec.process.is_alive():
-                if only_web:
-                    is_web = getattr(worker_spec, "web", False)
-                    if is_web:
-                        self.stop(worker_spec)
-                        worker_spec.running = False
-                else:
-                    self.stop(worker_spec)
-                    worker_spec.running = False
+        targets = [
+            spec
+            for spec in self.list_workers().values()
+            if spec.process is not None
+            and spec.process.is_alive()
+            and (not only_web or getattr(spec, "web", False))
+        ]
+        if not targets:
+            return
+
+        stop_workers(
+            targets,
+            self.supervisor,
+            config.shutdown_timeout if timeout is None else timeout,
+        )
 
     def start_all(self) -> None:
         """
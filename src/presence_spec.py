@@ -0,0 +1,233 @@
+"""
+Compiled presence specification shipped to worker processes.
+"""
+
+import ast
+import json
+import re
+import dataclasses
+import pathlib
+from typing import TYPE_CHECKING, Any, Dict, Iterable, Optional, Tuple
+
+from .logger import logger
+from .constants import config
+
+if TYPE_CHECKING:
+    from .steam import SteamAccount
+
+# parameter name -> injected value, used to call a presence's callable
+INJECTIONS: Dict[str, str] = {
+    "rpc": "rpc",
+    "context": "context",
+    "stop_event": "stop_event",
+    "runtime": "runtime",
+    "rt": "runtime",
+    "steam_account": "steam_account",
+    "sa": "steam_account",
+    "interval": "interval",
+    "logger": "logger",
+    "shared_state": "shared_state",
+}
+FALLBACK_CALLABLES = ("execute", "main")
+
+
+def parameter_plan(names: Iterable[str]) -> Tuple[str, ...]:
+    """
+    Map the parameter names of a presence callable to the values injected
+    for them. Unknown parameters receive the context dict.
+    """
+    return tuple(INJECTIONS.get(name, "context") for name in names)
+
+
+@dataclasses.dataclass(frozen=True)
+class CompiledPresence:
+    """
+    Everything a worker needs to load and call a presence, resolved once
+    during discovery so a worker starts without reading the manifest or
+    reflecting on the callable.
+
+    params is None when the callable could not be resolved statically; the
+    worker then resolves it and its parameters at load time. tick is True
+    for presences using the tick model: the callable is then called once
+    per tick by the worker instead of running its own loop.
+    """
+
+    name: str
+    path: str
+    entrypoint: str
+    callable_name: str
+    web: bool = False
+    imports: Tuple[str, ...] = ()
+    params: Optional[Tuple[str, ...]] = None
+    source_stamp: Optional[Tuple[int, int]] = None
+    tick: bool = False
+
+    @property
+    def package_name(self) -> Optional[str]:
+        """Namespace package used when the manifest lists imports."""
+        if not self.imports:
+            return None
+        base_name = re.sub(r"[^0-9a-zA-Z_]+", "_", pathlib.Path(self.path).name)
+        return f"presences.{base_name}"
+
+    @property
+    def module_name(self) -> str:
+        """Module name the entrypoint is loaded as."""
+        package_name = self.package_name
+        if package_name is None:
+            return "pp_" + pathlib.Path(self.path).name
+        return f"{package_name}.{pathlib.Path(self.entrypoint).stem}"
+
+    def is_stale(self) -> bool:
+        """Check if the entrypoint changed since the spec was compiled."""
+        return self.source_stamp != _stamp(pathlib.Path(self.path) / self.entrypoint)
+
+
+@dataclasses.dataclass
+class PresenceJob:
+    """
+    One run of a presence, handed to the worker running it: a new worker
+    process, an idle pool worker or the presence host. The stop_event and
+    control pipe belong to the worker and are passed next to the job.
+
+    compiled is None when the presence was not compiled during discovery;
+    the worker then reads the manifest and reflects on the callable itself.
+    started_at is the time the start was requested, used to report the
+    latency until the first RPC update.
+    """
+
+    path: str
+    entrypoint: str
+    callable_name: str
+    interval: int
+    client_id: Optional[str] = None
+    shared_pages: Optional[Any] = None
+    steam_account: Optional["SteamAccount"] = None
+    shared_state: Optional[Any] = None
+    started_at: Optional[float] = None
+    compiled: Optional[CompiledPresence] = None
+
+
+def _stamp(path: pathlib.Path) -> Optional[Tuple[int, int]]:
+    try:
+        stat = path.stat()
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _signature_names(node: Any) -> Tuple[str, ...]:
+    """Parameter names of a function definition, in inspect.signature order."""
+    args = node.args
+    names = [a.arg for a in args.posonlyargs + args.args]
+    if args.vararg is not None:
+        names.append(args.vararg.arg)
+    names += [a.arg for a in args.kwonlyargs]
+    if args.kwarg is not None:
+        names.append(args.kwarg.arg)
+    return tuple(names)
+
+
+def _resolve_statically(
+    source: pathlib.Path, requested: Optional[str]
+) -> Tuple[Optional[str], Optional[Tuple[str, ...]]]:
+    """
+    Find the callable the worker would resolve (see utils.resolve_callable)
+    among the plain top-level functions of the entrypoint.
+    Returns (name, parameter plan), or (None, None) if it cannot be decided
+    without importing the module.
+    """
+    try:
+        tree = ast.parse(source.read_bytes(), filename=str(source))
+    except (OSError, SyntaxError, ValueError) as exc:
+        logger.debug("Could not parse %s: %s", source, exc)
+        return None, None
+
+    functions: Dict[str, Any] = {}
+    other_names = set()
+    for node in tree.body:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            functions[node.name] = node
+        else:
+            for child in ast.walk(node):
+                if isinstance(child, ast.Name) and isinstance(child.ctx, ast.Store):
+                    other_names.add(child.id)
+                elif isinstance(
+                    child, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)
+                ):
+                    other_names.add(child.name)
+                elif isinstance(child, ast.alias):
+                    other_names.add(child.asname or child.name.split(".")[0])
+
+    candidates = ([requested] if requested else []) + list(FALLBACK_CALLABLES)
+    for name in candidates:
+        if name in other_names:
+            # bound by an assignment, import or class: resolve at load time
+            return None, None
+        node = functions.get(name)
+        if node is None:
+            continue
+        if node.decorator_list:
+            # decorators may change the signature
+            return name, None
+        return name, parameter_plan(_signature_names(node))
+    return None, None
+
+
+def compile_presence(
+    name: str, path: str, manifest: Dict[str, Any]
+) -> CompiledPresence:
+    """
+    Build the compiled spec of a presence from its parsed manifest.
+    """
+    entrypoint = manifest.get("entry", config.presences_entrypoint)
+    tick = bool(manifest.get("tick", False))
+    requested = manifest.get(
+        "callable",
+        config.presences_tick_callable if tick else config.presences_callable,
+    )
+    imports = manifest.get("imports")
+    source = pathlib.Path(path) / entrypoint
+    resolved, params = _resolve_statically(source, requested)
+    return CompiledPresence(
+        name=name,
+        path=str(path),
+        entrypoint=entrypoint,
+        callable_name=resolved or requested,
+        web=bool(manifest.get("web", False)),
+        imports=tuple(imports) if isinstance(imports, list) else (),
+        params=params,
+        source_stamp=_stamp(source),
+        tick=tick,
+    )
+
+
+def read_compiled(path: str, entrypoint: str, callable_name: str) -> CompiledPresence:
+    """
+    Build a spec for callers that did not get one from discovery. Reads the
+    manifest once; the callable is resolved when the module is loaded.
+    """
+    manifest: Dict[str, Any] = {}
+    manifest_file = pathlib.Path(path) / "manifest.json"
+    if manifest_file.exists():
+        try:
+            manifest = json.loads(
+                manifest_file.read_text(encoding="utf-8", errors="ignore")
+            )
+        except Exception as exc:
+            logger.debug("Could not read manifest for %s: %s", path, exc)
+    if not isinstance(manifest, dict):
+        manifest = {}
+    imports = manifest.get("imports")
+    tick = bool(manifest.get("tick", False))
+    if tick and "callable" not in manifest:
+        callable_name = config.presences_tick_callable
+    return CompiledPresence(
+        name=pathlib.Path(path).name,
+        path=str(path),
+        entrypoint=entrypoint,
+        callable_name=callable_name,
+        web=bool(manifest.get("web", False)),
+        imports=tuple(imports) if isinstance(imports, list) else (),
+        tick=tick,
+    )
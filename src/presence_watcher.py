@@ -0,0 +1,227 @@
+"""
+Watches the presences directory and reports changed presences.
+"""
+
+import os
+import sys
+import errno
+import struct
+import select
+import threading
+import ctypes
+import ctypes.util
+from pathlib import Path
+from typing import Callable, Dict, Optional, Set, Tuple
+
+from .logger import logger
+from .constants import config
+
+# inotify(7) flags
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+_WATCH_MASK = (
+    IN_CLOSE_WRITE
+    | IN_ATTRIB
+    | IN_MOVED_FROM
+    | IN_MOVED_TO
+    | IN_CREATE
+    | IN_DELETE
+    | IN_DELETE_SELF
+)
+_EVENT = struct.Struct("iIII")
+_IGNORED_SUFFIXES = (".pyc", ".tmp")
+
+
+def _ignored(name: str) -> bool:
+    return name == "__pycache__" or name.endswith(_IGNORED_SUFFIXES)
+
+
+def _load_libc() -> Optional[ctypes.CDLL]:
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        name = ctypes.util.find_library("c") or "libc.so.6"
+        libc = ctypes.CDLL(name, use_errno=True)
+        libc.inotify_init1.argtypes = [ctypes.c_int]
+        libc.inotify_add_watch.argtypes = [
+            ctypes.c_int,
+            ctypes.c_char_p,
+            ctypes.c_uint32,
+        ]
+        return libc
+    except (OSError, AttributeError):
+        return None
+
+
+class PresenceWatcher:
+    """
+    Calls back with the names of presences whose directory changed.
+    Uses inotify on Linux and falls back to polling directory and manifest
+    mtimes elsewhere. Events are debounced so that an install writing many
+    files produces a single callback.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        callback: Callable[[Set[str]], None],
+        interval: float = 2.0,
+        debounce: float = 0.5,
+    ):
+        self.path = Path(path)
+        self.callback = callback
+        self.interval = interval
+        self.debounce = debounce
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """Start watching in a background thread."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="presence-watcher", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self, timeout: float = 2.0) -> None:
+        """Stop watching."""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+            self._thread = None
+
+    def _notify(self, names: Set[str]) -> None:
+        if not names:
+            return
+        logger.debug("Presences changed on disk: %s", ", ".join(sorted(names)))
+        try:
+            self.callback(names)
+        except Exception:
+            logger.exception("Presence watcher callback failed")
+
+    def _run(self) -> None:
+        libc = _load_libc()
+        if libc is not None:
+            try:
+                self._run_inotify(libc)
+                return
+            except OSError as exc:
+                logger.debug("inotify unavailable (%s), polling instead", exc)
+        self._run_polling()
+
+    # inotify
+
+    def _add_watch(self, libc: ctypes.CDLL, fd: int, path: Path) -> int:
+        wd = libc.inotify_add_watch(fd, os.fsencode(str(path)), _WATCH_MASK)
+        if wd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err), str(path))
+        return wd
+
+    def _run_inotify(self, libc: ctypes.CDLL) -> None:
+        fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+        watches: Dict[int, Optional[str]] = {}
+        try:
+            watches[self._add_watch(libc, fd, self.path)] = None
+            for entry in self.path.iterdir():
+                if entry.is_dir():
+                    watches[self._add_watch(libc, fd, entry)] = entry.name
+            logger.debug("Watching %s with inotify", self.path)
+
+            changed: Set[str] = set()
+            while not self._stop_event.is_set():
+                timeout = self.debounce if changed else self.interval
+                ready, _, _ = select.select([fd], [], [], timeout)
+                if not ready:
+                    # quiet period after a burst of events
+                    names, changed = changed, set()
+                    self._notify(names)
+                    continue
+                try:
+                    data = os.read(fd, 64 * 1024)
+                except OSError as exc:
+                    if exc.errno == errno.EAGAIN:
+                        continue
+                    raise
+                for wd, name, mask in self._parse(data):
+                    parent = watches.get(wd)
+                    if _ignored(name):
+                        continue
+                    if parent is None:
+                        # event on the presences directory itself
+                        if not name:
+                            continue
+                        changed.add(name)
+                        if mask & IN_ISDIR and mask & (IN_CREATE | IN_MOVED_TO):
+                            try:
+                                wd_new = self._add_watch(libc, fd, self.path / name)
+                                watches[wd_new] = name
+                            except OSError:
+                                logger.debug("Failed to watch new presence %s", name)
+                    elif mask & IN_DELETE_SELF:
+                        watches.pop(wd, None)
+                        changed.add(parent)
+                    else:
+                        changed.add(parent)
+        finally:
+            os.close(fd)
+
+    @staticmethod
+    def _parse(data: bytes):
+        offset = 0
+        while offset + _EVENT.size <= len(data):
+            wd, mask, _, length = _EVENT.unpack_from(data, offset)
+            offset += _EVENT.size
+            name = data[offset : offset + length].split(b"\0", 1)[0]
+            offset += length
+            yield wd, os.fsdecode(name), mask
+
+    # polling fallback
+
+    def _scan(self) -> Dict[str, Tuple[int, int, int]]:
+        state = {}
+        try:
+            for entry in self.path.iterdir():
+                if not entry.is_dir():
+                    continue
+                stamps = []
+                for path in (
+                    entry,
+                    entry / "manifest.json",
+                    entry / config.meta_filename,
+                ):
+                    try:
+                        stamps.append(path.stat().st_mtime_ns)
+                    except OSError:
+                        stamps.append(0)
+                state[entry.name] = tuple(stamps)
+        except OSError as exc:
+            logger.debug("Failed to scan %s: %s", self.path, exc)
+        return state
+
+    def _run_polling(self) -> None:
+        logger.debug("Polling %s every %ss", self.path, self.interval)
+        previous = self._scan()
+        while not self._stop_event.wait(self.interval):
+            current = self._scan()
+            changed = {
+                name
+                for name in set(previous) | set(current)
+                if previous.get(name) != current.get(name)
+            }
+            previous = current
+            self._notify(changed)
@@ -0,0 +1,81 @@
+"""
+Single-threaded exit monitor for worker processes.
+"""
+
+import threading
+import multiprocessing as _mp
+from multiprocessing.connection import wait
+from typing import Any, Callable, Dict, Tuple
+
+from .logger import logger
+
+
+class ProcessMonitor:
+    """
+    Waits on the sentinels of every watched process from one thread with
+    multiprocessing.connection.wait and calls the registered callback when
+    a process exits. A wakeup pipe lets new processes join the wait.
+    """
+
+    def __init__(self) -> None:
+        self._wakeup_recv, self._wakeup_send = _mp.Pipe(duplex=False)
+        self._watched: Dict[Any, Tuple[Any, Callable[[Any], None]]] = {}
+        self._lock = threading.Lock()
+        self._closed = False
+        self._thread = threading.Thread(
+            target=self._run, name="process-monitor", daemon=True
+        )
+        self._thread.start()
+
+    def watch(self, process: Any, callback: Callable[[Any], None]) -> None:
+        """
+        Call callback(process) from the monitor thread once the process exits.
+
+        Parameters:
+            process (Any): A started process or a handle with a sentinel.
+            callback (Callable): Exit handler.
+        """
+        with self._lock:
+            self._watched[process.sentinel] = (process, callback)
+        self._wake()
+
+    def _wake(self) -> None:
+        try:
+            self._wakeup_send.send_bytes(b"\0")
+        except (OSError, ValueError):
+            pass
+
+    def _run(self) -> None:
+        while True:
+            with self._lock:
+                if self._closed:
+                    break
+                sentinels = list(self._watched)
+            for ready in wait(sentinels + [self._wakeup_recv]):
+                if ready is self._wakeup_recv:
+                    try:
+                        while self._wakeup_recv.poll():
+                            self._wakeup_recv.recv_bytes()
+                    except (EOFError, OSError):
+                        return
+                    continue
+                with self._lock:
+                    entry = self._watched.pop(ready, None)
+                if entry is None:
+                    continue
+                process, callback = entry
+                try:
+                    # reap the process so exitcode is set
+                    process.join(timeout=1)
+                    callback(process)
+                except Exception:
+                    logger.exception("Process exit handler failed")
+        self._wakeup_recv.close()
+
+    def close(self, timeout: float = 2.0) -> None:
+        """Stop the monitor thread; pending exits are no longer reported."""
+        with self._lock:
+            self._closed = True
+        self._wake()
+        self._thread.join(timeout=timeout)
+        self._wakeup_send.close()
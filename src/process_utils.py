@@ -0,0 +1,41 @@
+"""
+Helpers for waiting on worker processes.
+"""
+
+import time
+from multiprocessing.connection import wait
+from typing import Any, Iterable, List
+
+# poll interval for handles without a sentinel (hosted presences)
+_POLL_INTERVAL = 0.05
+
+
+def wait_for_exit(processes: Iterable[Any], timeout: float) -> List[Any]:
+    """
+    Wait until every process exited or the timeout elapsed, waiting on all
+    process sentinels at once. Handles without a sentinel are polled.
+
+    Parameters:
+        processes (Iterable[Any]): Processes or process-like handles.
+        timeout (float): Seconds to wait in total.
+
+    Returns:
+        List[Any]: The processes still alive when the timeout elapsed.
+    """
+    deadline = time.monotonic() + timeout
+    pending = [process for process in processes if process.is_alive()]
+    while pending:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        sentinels = [
+            process.sentinel for process in pending if hasattr(process, "sentinel")
+        ]
+        if len(sentinels) < len(pending):
+            remaining = min(remaining, _POLL_INTERVAL)
+        if sentinels:
+            wait(sentinels, timeout=remaining)
+        else:
+            time.sleep(remaining)
+        pending = [process for process in pending if process.is_alive()]
+    return pending
@@ -0,0 +1,150 @@
+"""
+Low-overhead sampling profiler for running presences.
+"""
+
+import os
+import re
+import sys
+import time
+import threading
+import traceback
+import collections
+from pathlib import Path
+from typing import Counter, Iterable, Optional
+
+from .logger import logger
+from .constants import config
+
+
+# threads of the worker machinery, left out when sampling a whole process
+IGNORED_THREADS = (
+    "worker-control",
+    "metrics-reporter",
+    "profiler:",
+    "tick-scheduler",
+    "status-sender",
+)
+
+
+def profiles_dir() -> Path:
+    """Directory profiles are written to."""
+    return config.logs_dir / "profiles"
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{Path(code.co_filename).name}:{code.co_name}:{frame.f_lineno}"
+
+
+def dump_stacks(name: str, thread_ids: Optional[Iterable[int]] = None) -> Path:
+    """
+    Write the current stacks of threads of this process to
+    config.logs_dir/stacks and return the file path.
+
+    Parameters:
+        name (str): Presence name, used in the output file name.
+        thread_ids (Optional[Iterable[int]]): Idents of the threads to dump,
+            or None for every thread but the worker machinery.
+    """
+    wanted = set(thread_ids) if thread_ids is not None else None
+    names = {thread.ident: thread.name for thread in threading.enumerate()}
+    own_ident = threading.get_ident()
+    sections = []
+    # pylint: disable=protected-access
+    for ident, frame in sys._current_frames().items():
+        thread_name = names.get(ident, str(ident))
+        if ident == own_ident:
+            continue
+        if wanted is None:
+            if thread_name.startswith(IGNORED_THREADS):
+                continue
+        elif ident not in wanted:
+            continue
+        stack = "".join(traceback.format_stack(frame))
+        sections.append(f"Thread {thread_name} ({ident}):\n{stack}")
+
+    directory = config.logs_dir / "stacks"
+    directory.mkdir(parents=True, exist_ok=True)
+    safe_name = re.sub(r"[^0-9a-zA-Z_.-]+", "_", name)
+    stamp = time.strftime("%Y%m%d-%H%M%S")
+    path = directory / f"{safe_name}-{os.getpid()}-{stamp}.txt"
+    path.write_text("\n".join(sections), encoding="utf-8")
+    return path
+
+
+class SamplingProfiler:
+    """
+    Samples the stacks of threads of the current process from a background
+    thread by walking sys._current_frames(), so a running presence can be
+    profiled without being restarted or instrumented. Stacks are counted in
+    collapsed ("folded") format, one "frame;frame;frame count" line per
+    distinct stack, as read by flamegraph.pl and speedscope.
+
+    Parameters:
+        name (str): Presence name, used in the output file name.
+        thread_ids (Optional[Iterable[int]]): Idents of the threads to
+            sample, or None for every thread but the worker machinery.
+        interval (float): Seconds between two samples.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        thread_ids: Optional[Iterable[int]] = None,
+        interval: Optional[float] = None,
+    ):
+        self.name = name
+        self.thread_ids = set(thread_ids) if thread_ids is not None else None
+        self.interval = max(
+            0.001, interval if interval is not None else config.profile_interval
+        )
+        self.samples = 0
+        self.stacks: Counter[str] = collections.Counter()
+
+    def _sample(self, own_ident: int) -> None:
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        # pylint: disable=protected-access
+        for ident, frame in sys._current_frames().items():
+            if ident == own_ident:
+                continue
+            name = names.get(ident, str(ident))
+            if self.thread_ids is None:
+                if name.startswith(IGNORED_THREADS):
+                    continue
+            elif ident not in self.thread_ids:
+                continue
+            labels = []
+            while frame is not None:
+                labels.append(_frame_label(frame))
+                frame = frame.f_back
+            labels.append(name)
+            labels.reverse()
+            self.stacks[";".join(labels)] += 1
+        self.samples += 1
+
+    def run(self, duration: float, stop_event: Optional[threading.Event] = None):
+        """Sample for duration seconds, in the calling thread."""
+        own_ident = threading.get_ident()
+        deadline = time.monotonic() + duration
+        while time.monotonic() < deadline:
+            if stop_event is not None and stop_event.is_set():
+                break
+            self._sample(own_ident)
+            time.sleep(self.interval)
+
+    def write(self) -> Path:
+        """Write the collapsed stacks and return the file path."""
+        directory = profiles_dir()
+        directory.mkdir(parents=True, exist_ok=True)
+        safe_name = re.sub(r"[^0-9a-zA-Z_.-]+", "_", self.name)
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        path = directory / f"{safe_name}-{os.getpid()}-{stamp}.folded"
+        tmp_path = path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            for stack, count in self.stacks.most_common():
+                file.write(f"{stack} {count}\n")
+        os.replace(tmp_path, path)
+        logger.info(
+            "Wrote profile of %s (%d samples) to %s", self.name, self.samples, path
+        )
+        return path
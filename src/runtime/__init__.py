@@ -1,20 +1,45 @@
 """
 Runtime module
+
+Submodules are imported on first attribute access, so importing a single
+one (e.g. runtime_shim) does not load websockets and requests with the
+whole package.
 """
 
-from .ws_client import WSClient
-from .context import Context, Page
-from .protocol_adapter import ProtocolAdapter
-from .cdp_adapter import CDPAdapter
-from .runtime_shim import SimpleRuntimeShim
-from .runtime import Runtime
-
-__all__ = [
-    "WSClient",
-    "Context",
-    "Page",
-    "ProtocolAdapter",
-    "CDPAdapter",
-    "SimpleRuntimeShim",
-    "Runtime",
-]
+import importlib
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from .ws_client import WSClient
+    from .context import Context, Page
+    from .eval_cache import EvaluationCache
+    from .protocol_adapter import ProtocolAdapter
+    from .cdp_adapter import CDPAdapter
+    from .runtime_shim import SimpleRuntimeShim
+    from .runtime import Runtime
+
+_EXPORTS = {
+    "WSClient": "ws_client",
+    "Context": "context",
+    "Page": "context",
+    "EvaluationCache": "eval_cache",
+    "ProtocolAdapter": "protocol_adapter",
+    "CDPAdapter": "cdp_adapter",
+    "SimpleRuntimeShim": "runtime_shim",
+    "Runtime": "runtime",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name: str) -> Any:
+    module_name = _EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module_name}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
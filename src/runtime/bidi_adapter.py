@@ -58,7 +58,7 @@ class BiDiAdapter(ProtocolAdapter):
         deadline = time.time() + timeout
         while time.time() < deadline:
             try:
-                raw = self.connection.recv()
+                raw = self.connection.recv(timeout=max(0.0, deadline - time.time()))
                 msg = json.loads(raw)
 
                 if isinstance(msg, dict) and msg.get("id") == msg_id:
@@ -66,6 +66,8 @@ class BiDiAdapter(ProtocolAdapter):
 
             except json.JSONDecodeError:
                 continue
+            except TimeoutError:
+                break
 
         raise TimeoutError(f"Timeout waiting for {method}")
 
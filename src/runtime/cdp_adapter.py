@@ -12,6 +12,7 @@ from websockets.sync.client import connect
 
 from .protocol_adapter import ProtocolAdapter
 from .context import Context
+from ..constants import config
 from ..logger import logger
 
 
@@ -101,7 +102,7 @@ class CDPAdapter(ProtocolAdapter):
             }
 
             ws.send(json.dumps(cmd))
-            response = json.loads(ws.recv())
+            response = json.loads(ws.recv(timeout=config.ws_recv_timeout))
             ws.close()
 
             if "result" in response:
@@ -39,9 +39,14 @@ class Context:
     _prefetched_media_session: Optional[Dict[str, Any]] = field(
         default=None, repr=False, compare=False
     )
+    _eval_cache: Optional[Any] = field(default=None, repr=False, compare=False)
+    _live_url: Optional[str] = field(default=None, repr=False, compare=False)
+    _page_events: bool = field(default=False, repr=False, compare=False)
 
-    def __post_init__(self):
-        self.minititle = (
+    @property
+    def minititle(self) -> str:
+        """Return a shortened title for logging."""
+        return (
             (self.title[:10] + "...")
             if self.title and len(self.title) > 13
             else self.title
@@ -55,7 +60,16 @@ class Context:
         )
 
     def __hash__(self):
-        return hash((self.id, self.url))
+        # url is updated in place when a reused context navigates
+        return hash(self.id)
+
+    @property
+    def live_url(self) -> str:
+        """
+        URL the page is at. Connected CDP contexts follow navigations from
+        page events, url is only the copy from the last pages snapshot.
+        """
+        return self._live_url or self.url
 
     @property
     def connected(self) -> bool:
@@ -139,6 +153,7 @@ class Context:
                     pass
                 finally:
                     self._ws = None
+                    self._page_events = False
                 logger.debug(
                     "Closed CDP connection for id=%s title=%s", self.id, self.minititle
                 )
@@ -177,15 +192,66 @@ class Context:
 
         deadline = time.time() + timeout
         while time.time() < deadline:
-            raw = self._ws.recv()
+            try:
+                raw = self._ws.recv(timeout=max(0.0, deadline - time.time()))
+            except TimeoutError:
+                break
             try:
                 msg = json.loads(raw)
             except Exception:
                 continue
             if isinstance(msg, dict) and msg.get("id") == msg_id:
                 return msg
+            self._handle_event(msg)
         raise TimeoutError(f"Timeout waiting for response to {method} (id={msg_id})")
 
+    def _handle_event(self, msg: Any) -> None:
+        """Follow main frame navigations reported by CDP page events."""
+        if not isinstance(msg, dict):
+            return
+        method = msg.get("method")
+        params = msg.get("params") or {}
+        url = None
+        if method == "Page.frameNavigated":
+            frame = params.get("frame") or {}
+            if not frame.get("parentId"):
+                url = frame.get("url")
+        elif method == "Page.navigatedWithinDocument":
+            if params.get("frameId") == self.id:
+                url = params.get("url")
+        if url and url != self.live_url:
+            logger.debug("Context %s navigated to %s", self.id, url)
+            self._live_url = url
+            if self._eval_cache is not None:
+                self._eval_cache.navigated(self.id)
+
+    def _poll_events(self) -> None:
+        """
+        Process the page events received so far without waiting. Page events
+        are enabled on first use, so live_url follows navigations.
+        """
+        if self.protocol != "cdp" or self._ws is None:
+            return
+        if not self._page_events:
+            self._page_events = True
+            try:
+                self._send_cdp("Page.enable", timeout=2.0)
+            except Exception as exc:
+                logger.debug("Failed to enable page events for %s: %s", self.id, exc)
+            return
+        while True:
+            try:
+                raw = self._ws.recv(timeout=0)
+            except TimeoutError:
+                return
+            except Exception:
+                logger.debug("Failed to poll events of %s", self.id, exc_info=True)
+                return
+            try:
+                self._handle_event(json.loads(raw))
+            except ValueError:
+                continue
+
     def _send_bidi(self, method: str, params: Optional[dict] = None) -> dict:
         """Send BiDi message through adapter."""
         if self._bidi_adapter is None:
@@ -203,9 +269,35 @@ class Context:
         raise NotImplementedError(f"BiDi method mapping for {method} not implemented")
 
     def evaluate(
-        self, expression: str, return_by_value: bool = True, timeout: float = 5.0
+        self,
+        expression: str,
+        return_by_value: bool = True,
+        timeout: float = 5.0,
+        cache_ttl: Optional[float] = None,
     ) -> Any:
-        """Execute JavaScript and return result."""
+        """
+        Execute JavaScript and return result.
+
+        When cache_ttl is given and the context belongs to a runtime with an
+        evaluation cache, the result is memoized for the live URL and reused
+        for cache_ttl seconds. Use it only for values that depend on the URL.
+        """
+        if cache_ttl and self._eval_cache is not None:
+            self._poll_events()
+            url = self.live_url
+            hit, value = self._eval_cache.get(self.id, url, expression)
+            if hit:
+                return value
+            value = self._evaluate(expression, return_by_value, timeout)
+            # the page may have navigated while evaluating
+            self._poll_events()
+            if self.live_url == url:
+                self._eval_cache.put(self.id, url, expression, value, cache_ttl)
+            return value
+        return self._evaluate(expression, return_by_value, timeout)
+
+    def _evaluate(self, expression: str, return_by_value: bool, timeout: float) -> Any:
+        """Execute JavaScript without caching."""
         # Shim protocol cannot execute JS
         if self.protocol == "shim":
             raise ValueError("Shim context cannot execute JS directly")
@@ -0,0 +1,127 @@
+"""
+Evaluation Cache - Memoized evaluate() results keyed by page, URL and script.
+"""
+
+import time
+import hashlib
+import threading
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from ..logger import logger
+
+
+class EvaluationCache:
+    """
+    Runtime-level memo cache for Context.evaluate() results.
+
+    Entries are keyed by (page id, live URL, script hash) and expire after
+    the TTL given on each call. Entries of a page are dropped when the page
+    navigates to another URL or disappears, and results are not stored while
+    a freshly navigated page is still settling (its DOM may lag the URL).
+    """
+
+    def __init__(self, max_entries: int = 512, settle_time: float = 2.0):
+        self.max_entries = max_entries
+        self.settle_time = settle_time
+        self._entries: Dict[Tuple[str, str, str], Tuple[float, Any]] = {}
+        self._urls: Dict[str, str] = {}
+        self._navigated_at: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(page_id: str, url: str, expression: str) -> Tuple[str, str, str]:
+        digest = hashlib.sha1(expression.encode("utf-8")).hexdigest()
+        return (page_id or "", url or "", digest)
+
+    def get(self, page_id: str, url: str, expression: str) -> Tuple[bool, Any]:
+        """
+        Return (hit, value) for a cached evaluation.
+        """
+        key = self._key(page_id, url, expression)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return False, None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return False, None
+            return True, value
+
+    def put(
+        self, page_id: str, url: str, expression: str, value: Any, ttl: float
+    ) -> None:
+        """
+        Store an evaluation result for ttl seconds. None results are not cached.
+        """
+        if value is None or ttl <= 0:
+            return
+        now = time.monotonic()
+        with self._lock:
+            navigated_at = self._navigated_at.get(page_id or "")
+            if navigated_at is not None and now - navigated_at < self.settle_time:
+                return
+            if len(self._entries) >= self.max_entries:
+                self._purge_expired(now)
+                if len(self._entries) >= self.max_entries:
+                    self._entries.pop(next(iter(self._entries)))
+            self._entries[self._key(page_id, url, expression)] = (now + ttl, value)
+
+    def _purge_expired(self, now: float) -> None:
+        for key in [k for k, (exp, _) in self._entries.items() if exp < now]:
+            del self._entries[key]
+
+    def invalidate(self, page_id: str) -> None:
+        """
+        Drop every cached result of a page.
+        """
+        with self._lock:
+            for key in [k for k in self._entries if k[0] == page_id]:
+                del self._entries[key]
+
+    def navigated(self, page_id: str) -> None:
+        """
+        Drop the results of a page that navigated and let it settle before
+        storing new ones.
+        """
+        with self._lock:
+            self._navigated_at[page_id or ""] = time.monotonic()
+        self.invalidate(page_id)
+
+    def track(self, pages: Iterable[Any]) -> None:
+        """
+        Observe the current pages and invalidate entries of pages that
+        navigated to another URL or are no longer present.
+        """
+        current = {}
+        for page in pages:
+            page_id = getattr(page, "id", None)
+            if page_id:
+                url = getattr(page, "live_url", None) or getattr(page, "url", "")
+                current[page_id] = url or ""
+
+        navigated = []
+        with self._lock:
+            now = time.monotonic()
+            for page_id, url in current.items():
+                previous: Optional[str] = self._urls.get(page_id)
+                if previous is not None and previous != url:
+                    navigated.append(page_id)
+                    self._navigated_at[page_id] = now
+            removed = [pid for pid in self._urls if pid not in current]
+            for page_id in removed:
+                self._navigated_at.pop(page_id, None)
+            self._urls = current
+
+        for page_id in navigated + removed:
+            logger.debug("Invalidating evaluation cache for page %s", page_id)
+            self.invalidate(page_id)
+
+    def clear(self) -> None:
+        """
+        Drop all cached results.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._urls.clear()
+            self._navigated_at.clear()
@@ -10,6 +10,7 @@ import requests
 from .protocol_adapter import ProtocolAdapter
 from .cdp_adapter import CDPAdapter
 from .context import Context
+from .eval_cache import EvaluationCache
 from ..constants import config
 from ..logger import logger
 
@@ -38,6 +39,7 @@ class Runtime:
         self._thread: Optional[threading.Thread] = None
         self._connected_callbacks: List[Callable[[bool], None]] = []
         self._lock = threading.Lock()
+        self.eval_cache = EvaluationCache()
 
     def _detect_protocol(self) -> Optional[str]:
         """Auto-detect which protocol is available."""
@@ -147,6 +149,7 @@ class Runtime:
             self._adapter.close()
             self._adapter = None
 
+        self.eval_cache.clear()
         logger.debug("Runtime stopped")
 
     def close(self):
@@ -158,7 +161,12 @@ class Runtime:
         """Get current contexts (compatible with Runtime.pages)."""
         if not self._adapter:
             return []
-        return self._adapter.get_contexts()
+        contexts = self._adapter.get_contexts()
+        for context in contexts:
+            # pylint: disable=protected-access
+            context._eval_cache = self.eval_cache
+        self.eval_cache.track(contexts)
+        return contexts
 
     def evaluate_script(
         self, context: Context, expression: str, await_promise: bool = False
@@ -179,6 +187,20 @@ class Runtime:
 
         return self._adapter.evaluate_script(context.id, expression, await_promise)
 
+    def wait_for_pages(
+        self, timeout: Optional[float], stop_event: Optional[Any] = None
+    ) -> bool:
+        """
+        Compatibility with SimpleRuntimeShim.wait_for_pages. A local runtime
+        has no change notifications, so this only waits for the timeout or
+        the stop_event and returns False.
+        """
+        if stop_event is not None:
+            stop_event.wait(timeout)
+        elif timeout:
+            self._stop_event.wait(timeout)
+        return False
+
     def is_connected(self) -> bool:
         """Check if runtime is connected."""
         if not self._adapter:
@@ -2,29 +2,123 @@
 Runtime Shim - Lightweight runtime for worker processes.
 """
 
-from typing import List, Dict, Any
+import time
+from typing import Iterable, List, Dict, Any, Optional
 
 from .context import Context
+from .eval_cache import EvaluationCache
 from ..logger import logger
 
 
+class PageDescriptor:
+    """
+    Compact descriptor of the read-only fields of a shared page.
+    Used to decide whether a cached Context can be reused for a snapshot item.
+    """
+
+    __slots__ = ("id", "protocol", "ws_url")
+
+    def __init__(self, page_id: str, protocol: str, ws_url: Optional[str]):
+        self.id = page_id
+        self.protocol = protocol
+        self.ws_url = ws_url
+
+    def matches(self, protocol: str, ws_url: Optional[str]) -> bool:
+        """Check if the descriptor still describes the same page endpoint."""
+        return self.protocol == protocol and self.ws_url == ws_url
+
+
 class SimpleRuntimeShim:
     """
-    Lightweight shim that wraps a shared_pages proxy (list of dicts)
+    Lightweight shim that wraps a shared pages snapshot (iterable of dicts)
     to expose a contexts/pages property compatible with the Runtime interface.
     Used by worker processes to access browser pages via shared memory.
+
+    Context objects are cached by page id and reused across snapshots, so a
+    connected Context keeps its socket when the worker re-reads pages.
     """
 
-    def __init__(self, shared_pages: List[Dict[str, Any]]):
+    def __init__(self, shared_pages: Iterable[Dict[str, Any]]):
         """
-        Initialize shim with a multiprocessing Manager list proxy.
+        Initialize shim with a shared pages snapshot.
 
         Args:
-            shared_pages: A Manager().list() proxy containing page dicts.
+            shared_pages: A SharedPageSnapshot, or any iterable of page dicts.
         """
         self._shared_pages = shared_pages
+        self._generation: Optional[int] = None
+        self._pages: List[Context] = []
+        self._contexts: Dict[str, Context] = {}
+        self._descriptors: Dict[str, PageDescriptor] = {}
+        self.eval_cache = EvaluationCache()
         self.interval = 1.0  # Default interval for compatibility
 
+    @staticmethod
+    def _resolve_protocol(item: Dict[str, Any]) -> str:
+        """
+        Workers always use shim for BiDi pages, CDP when a WebSocket URL exists.
+        """
+        if item.get("protocol") == "bidi" or item.get("bidi_info"):
+            return "shim"
+        if item.get("ws_url"):
+            return "cdp"
+        return "shim"
+
+    def _context_for(self, item: Dict[str, Any]) -> Context:
+        """
+        Return the cached Context for a snapshot item, updating it in place,
+        or create a new one if the page is new or its endpoint changed.
+        """
+        page_id = item.get("id", "") or ""
+        ws_url = item.get("ws_url")
+        protocol = self._resolve_protocol(item)
+
+        context = self._contexts.get(page_id)
+        descriptor = self._descriptors.get(page_id)
+        if (
+            context is not None
+            and descriptor is not None
+            and descriptor.matches(protocol, ws_url)
+        ):
+            url = item.get("url", "")
+            if context.url != url:
+                context.url = url
+            title = item.get("title", "")
+            if context.title != title:
+                context.title = title
+            # pylint: disable=protected-access
+            context._prefetched_media_session = item.get("media_session")
+            return context
+
+        if context is not None:
+            context.close()
+
+        context = Context(
+            id=page_id,
+            url=item.get("url", ""),
+            title=item.get("title", ""),
+            protocol=protocol,
+            ws_url=ws_url,
+            _bidi_adapter=None,
+            _prefetched_media_session=item.get("media_session"),
+            _eval_cache=self.eval_cache,
+        )
+        self._contexts[page_id] = context
+        self._descriptors[page_id] = PageDescriptor(page_id, protocol, ws_url)
+        return context
+
+    def _evict(self, seen: set) -> None:
+        """
+        Drop and close cached contexts whose pages are no longer present.
+        """
+        for page_id in [pid for pid in self._contexts if pid not in seen]:
+            context = self._contexts.pop(page_id)
+            self._descriptors.pop(page_id, None)
+            try:
+                context.close()
+            except Exception:
+                logger.debug("Failed to close evicted context %s", page_id)
+
     @property
     def pages(self) -> List[Context]:
         """
@@ -32,37 +126,46 @@ class SimpleRuntimeShim:
         For BiDi pages, workers use pre-fetched data (shim protocol) since
         BiDi sessions cannot be shared across WebSocket connections.
         """
+        generation = getattr(self._shared_pages, "generation", None)
+        if generation is not None and generation == self._generation:
+            return list(self._pages)
+
         result = []
         try:
             snapshot = list(self._shared_pages)
+            seen = set()
             for item in snapshot:
                 if isinstance(item, dict):
-                    ws_url = item.get("ws_url")
-                    protocol = item.get("protocol", "shim")
-                    bidi_info = item.get("bidi_info")
-                    media_session = item.get("media_session")
-
-                    if protocol == "bidi" or bidi_info:
-                        protocol = "shim"  # workers always use shim for BiDi pages
-                    elif ws_url:
-                        protocol = "cdp"
-                    else:
-                        protocol = "shim"
-
-                    result.append(
-                        Context(
-                            id=item.get("id", ""),
-                            url=item.get("url", ""),
-                            title=item.get("title", ""),
-                            protocol=protocol,
-                            ws_url=ws_url,
-                            _bidi_adapter=None,
-                            _prefetched_media_session=media_session,
-                        )
-                    )
+                    context = self._context_for(item)
+                    seen.add(context.id)
+                    result.append(context)
+            self._evict(seen)
+            self.eval_cache.track(result)
+            self._pages = result
+            self._generation = generation
         except Exception as exc:
             logger.debug("SimpleRuntimeShim.pages failed: %s", exc)
-        return result
+        return list(result)
+
+    def wait_for_pages(
+        self, timeout: Optional[float], stop_event: Optional[Any] = None
+    ) -> bool:
+        """
+        Block until the shared pages change since the last read of pages,
+        the stop_event is set or the timeout elapses.
+        Returns True if the pages changed.
+        """
+        wait_fn = getattr(self._shared_pages, "wait_for_change", None)
+        if wait_fn is None:
+            if stop_event is not None:
+                stop_event.wait(timeout)
+            elif timeout:
+                time.sleep(timeout)
+            return False
+        generation = self._generation
+        if generation is None:
+            generation = self._shared_pages.generation
+        return wait_fn(generation, timeout, stop_event)
 
     def load(self) -> bool:
         """
@@ -72,8 +175,12 @@ class SimpleRuntimeShim:
 
     def close(self):
         """
-        No-op for shim; resources are managed by parent process.
+        Close cached contexts; remaining resources are managed by parent process.
         """
+        self._evict(set())
+        self._pages = []
+        self._generation = None
+        self.eval_cache.clear()
 
     def is_connected(self) -> bool:
         """
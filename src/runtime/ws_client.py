@@ -3,7 +3,7 @@ WebSocket client wrapper with thread-safe operations.
 """
 
 import threading
-from typing import Any
+from typing import Any, Optional
 
 from ..logger import logger
 
@@ -24,12 +24,17 @@ class WSClient:
                 raise ValueError("WebSocket is closed")
             self._ws.send(data)
 
-    def recv(self) -> Any:
-        """Receive data from the WebSocket."""
+    def recv(self, timeout: Optional[float] = None) -> Any:
+        """
+        Receive data from the WebSocket. Raises TimeoutError if nothing
+        arrives within timeout seconds; None waits forever.
+        """
         with self._lock:
             if self._ws is None:
                 raise ValueError("WebSocket is closed")
-            return self._ws.recv()
+            if timeout is None:
+                return self._ws.recv()
+            return self._ws.recv(timeout=timeout)
 
     def close(self) -> None:
         """Close the WebSocket connection."""
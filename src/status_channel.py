@@ -0,0 +1,394 @@
+"""
+One-way status channel from presence workers to the manager.
+"""
+
+import time
+import itertools
+import threading
+from collections import OrderedDict
+from multiprocessing.connection import Connection, wait
+from multiprocessing import context as _mp_context
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from .constants import config
+from .logger import logger
+
+# record keys kept apart from the presence's own state
+METRICS_KEY = "__metrics__"
+HEARTBEAT_KEY = "__heartbeat__"
+
+
+class StatusChannel:
+    """
+    Sending end of the status pipe of one worker process, shared by the
+    threads of the process. Every process has its own pipe, so a worker
+    killed while writing can only break its own channel.
+
+    Records are queued and written by a sender thread, so a presence never
+    blocks on a full pipe while the manager is slow to read. Until the
+    sender catches up, a newer record for the same key replaces the queued
+    one, and records for new keys are dropped past
+    config.status_max_pending queued keys.
+    """
+
+    def __init__(self, conn: Connection):
+        self._conn = conn
+        self._condition = threading.Condition()
+        self._pending: "OrderedDict[Tuple[str, int, str], Any]" = OrderedDict()
+        self._sender: Optional[threading.Thread] = None
+        self._sending = False
+        self._closed = False
+        self._dropped = 0
+
+    def __reduce__(self):
+        return (StatusChannel, (self._conn,))
+
+    def send(self, record: Tuple[str, int, str, Any]) -> None:
+        """Queue one record for the manager without blocking."""
+        name, run_id, key, value = record
+        slot = (name, run_id, key)
+        with self._condition:
+            if self._closed:
+                return
+            if slot not in self._pending and (
+                len(self._pending) >= config.status_max_pending
+            ):
+                self._dropped += 1
+                return
+            self._pending[slot] = value
+            if self._sender is None:
+                self._sender = threading.Thread(
+                    target=self._send_loop, name="status-sender", daemon=True
+                )
+                self._sender.start()
+                _senders.append(self)
+            self._condition.notify_all()
+
+    def _send_loop(self) -> None:
+        while True:
+            with self._condition:
+                self._sending = False
+                self._condition.notify_all()
+                while not self._pending and not self._closed:
+                    self._condition.wait()
+                if not self._pending:
+                    self._conn.close()
+                    return
+                slot, value = self._pending.popitem(last=False)
+                dropped, self._dropped = self._dropped, 0
+                self._sending = True
+            if dropped:
+                logger.debug("Dropped %d status records on a full pipe", dropped)
+            try:
+                self._conn.send(slot + (value,))
+            except Exception:
+                # the manager is gone: nothing will read the pipe again
+                logger.debug("Failed to send status record", exc_info=True)
+                with self._condition:
+                    self._closed = True
+                    self._pending.clear()
+                    self._sending = False
+                    self._condition.notify_all()
+                return
+
+    def flush(self, timeout: float) -> bool:
+        """
+        Wait until every queued record was written. Returns False if the
+        timeout elapsed first.
+        """
+        deadline = time.monotonic() + timeout
+        with self._condition:
+            while self._pending or self._sending:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._condition.wait(remaining)
+        return True
+
+    def close(self) -> None:
+        """Close this process' copy of the sending end."""
+        with self._condition:
+            self._closed = True
+            self._pending.clear()
+            sending = self._sending
+            self._condition.notify_all()
+        # a sender blocked in a write keeps the connection until it returns
+        if not sending:
+            self._conn.close()
+
+
+# channels of this process with a running sender thread
+_senders: List[StatusChannel] = []
+
+
+def flush_status_channels(timeout: float = 1.0) -> None:
+    """
+    Write out the records still queued on the channels of this process.
+    Worker entrypoints call it before exiting, as the sender threads do
+    not keep the process alive.
+    """
+    deadline = time.monotonic() + timeout
+    for channel in list(_senders):
+        if not channel.flush(max(0.0, deadline - time.monotonic())):
+            logger.debug("Status records left unsent at exit")
+
+
+# channel of long-lived worker processes (pool workers, presence host)
+_installed_channel: Optional[StatusChannel] = None  # pylint: disable=invalid-name
+
+
+def install_status_channel(channel: Optional[StatusChannel]) -> None:
+    """
+    Set the status channel used by writers that were received over a pipe.
+    A pipe can only be handed over at process start, so processes that
+    receive jobs later install the one they were started with.
+    """
+    global _installed_channel  # pylint: disable=global-statement,invalid-name
+    _installed_channel = channel
+
+
+class StatusWriter:
+    """
+    Worker-side dict used as a presence's shared_state. Reads are served
+    from a local copy and every write is sent to the manager as a small
+    (name, run_id, key, value) record over the status channel.
+    """
+
+    def __init__(self, name: str, run_id: int, channel: Optional[StatusChannel] = None):
+        self.name = name
+        self.run_id = run_id
+        # own channel of a spawned worker, None to use the installed one
+        self.channel = channel
+        self._data: Dict[str, Any] = {}
+
+    def __reduce__(self):
+        if self.channel is not None and _mp_context.get_spawning_popen():
+            return (StatusWriter, (self.name, self.run_id, self.channel))
+        return (StatusWriter, (self.name, self.run_id))
+
+    def _send(self, key: str, value: Any) -> None:
+        channel = self.channel if self.channel is not None else _installed_channel
+        if channel is None:
+            return
+        try:
+            channel.send((self.name, self.run_id, key, value))
+        except Exception:
+            logger.debug("Failed to send status %s for %s", key, self.name)
+
+    def send_metrics(self, metrics: Dict[str, Any]) -> None:
+        """Send the resource figures of the worker (see worker_metrics)."""
+        self._send(METRICS_KEY, metrics)
+
+    def send_heartbeat(self, at: float, deadline: Optional[float]) -> None:
+        """
+        Tell the manager the presence is alive at time at and expected to
+        report again by deadline (None while waiting without a timeout).
+        """
+        self._send(HEARTBEAT_KEY, (at, deadline))
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        self._data[key] = value
+        self._send(key, value)
+
+    def __getitem__(self, key: str) -> Any:
+        return self._data[key]
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._data
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._data)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Return a value written by this worker."""
+        return self._data.get(key, default)
+
+    def update(self, *args: Any, **kwargs: Any) -> None:
+        """Write several keys."""
+        for key, value in dict(*args, **kwargs).items():
+            self[key] = value
+
+    def keys(self):
+        """Keys written by this worker."""
+        return self._data.keys()
+
+    def items(self):
+        """Items written by this worker."""
+        return self._data.items()
+
+
+def _with_cpu_percent(
+    previous: Optional[Dict[str, Any]], metrics: Dict[str, Any]
+) -> Dict[str, Any]:
+    """Add the CPU usage since the previous metrics of the same process."""
+    metrics = dict(metrics)
+    metrics["cpu_percent"] = None
+    if not previous or any(
+        previous.get(key) != metrics.get(key) for key in ("pid", "cpu_scope")
+    ):
+        return metrics
+    try:
+        elapsed = metrics["sampled_at"] - previous["sampled_at"]
+        if elapsed > 0:
+            used = metrics["cpu_time"] - previous["cpu_time"]
+            metrics["cpu_percent"] = max(0.0, used / elapsed * 100.0)
+    except (KeyError, TypeError):
+        pass
+    return metrics
+
+
+class StatusBoard:
+    """
+    Manager-side end of the status channels. A reader thread waits on the
+    pipe of every worker process and applies their records to an in-memory
+    state per presence, so reading a presence's state never leaves the
+    process. Records of previous runs are ignored.
+    """
+
+    def __init__(self, ctx: Any):
+        self._ctx = ctx
+        self._states: Dict[str, Dict[str, Any]] = {}
+        self._metrics: Dict[str, Dict[str, Any]] = {}
+        self._heartbeats: Dict[str, Tuple[float, Optional[float]]] = {}
+        self._run_ids: Dict[str, int] = {}
+        self._counter = itertools.count(1)
+        self._lock = threading.Lock()
+        self._channels: List[Connection] = []
+        self._closed = False
+        self._wakeup_recv, self._wakeup_send = ctx.Pipe(duplex=False)
+        self._reader = threading.Thread(
+            target=self._read_loop, name="status-board", daemon=True
+        )
+        self._reader.start()
+
+    def open_channel(self) -> StatusChannel:
+        """
+        Create the status channel of a new worker process. The caller hands
+        it to the process at start, then closes its own copy.
+        """
+        receiver, sender = self._ctx.Pipe(duplex=False)
+        with self._lock:
+            self._channels.append(receiver)
+        self._wake()
+        return StatusChannel(sender)
+
+    def _wake(self) -> None:
+        try:
+            self._wakeup_send.send_bytes(b"\0")
+        except (OSError, ValueError):
+            pass
+
+    def _drain_wakeup(self) -> bool:
+        try:
+            while self._wakeup_recv.poll():
+                self._wakeup_recv.recv_bytes()
+        except (EOFError, OSError):
+            return False
+        return True
+
+    def _apply(self, record: Tuple[str, int, str, Any]) -> None:
+        name, run_id, key, value = record
+        with self._lock:
+            if self._run_ids.get(name) != run_id:
+                return
+            if key == HEARTBEAT_KEY:
+                self._heartbeats[name] = value
+            elif key == METRICS_KEY:
+                self._metrics[name] = _with_cpu_percent(self._metrics.get(name), value)
+            else:
+                self._states.setdefault(name, {})[key] = value
+
+    def _drop(self, receiver: Connection) -> None:
+        with self._lock:
+            if receiver in self._channels:
+                self._channels.remove(receiver)
+        receiver.close()
+
+    def _read_loop(self) -> None:
+        while True:
+            with self._lock:
+                if self._closed:
+                    break
+                channels = list(self._channels)
+            for ready in wait(channels + [self._wakeup_recv]):
+                if ready is self._wakeup_recv:
+                    if not self._drain_wakeup():
+                        return
+                    continue
+                try:
+                    record = ready.recv()
+                except (EOFError, OSError):
+                    # the worker exited (or died mid-write): only its pipe is gone
+                    self._drop(ready)
+                    continue
+                except Exception:
+                    logger.debug("Failed to read status record", exc_info=True)
+                    continue
+                try:
+                    self._apply(record)
+                except Exception:
+                    logger.debug("Invalid status record", exc_info=True)
+
+    def writer(
+        self, name: str, channel: Optional[StatusChannel] = None
+    ) -> StatusWriter:
+        """
+        Start a new run for a presence and return the writer it should use.
+        The previous state of the presence is discarded.
+
+        Parameters:
+            name (str): Presence name.
+            channel (Optional[StatusChannel]): Channel of a worker process
+                started for this run, None for pooled and hosted presences
+                which use the channel of their process.
+        """
+        run_id = next(self._counter)
+        with self._lock:
+            self._run_ids[name] = run_id
+            self._states[name] = {}
+            self._metrics.pop(name, None)
+            self._heartbeats.pop(name, None)
+        return StatusWriter(name, run_id, channel)
+
+    def set(self, name: str, key: str, value: Any) -> None:
+        """Record a value for a presence from the manager side."""
+        with self._lock:
+            self._states.setdefault(name, {})[key] = value
+
+    def get(self, name: str) -> Dict[str, Any]:
+        """Return a copy of the latest state reported by a presence."""
+        with self._lock:
+            return dict(self._states.get(name, {}))
+
+    def get_metrics(self, name: str) -> Dict[str, Any]:
+        """
+        Return the latest metrics reported by a presence. They are kept
+        after the presence stopped, until its next run.
+        """
+        with self._lock:
+            return dict(self._metrics.get(name, {}))
+
+    def get_heartbeat(self, name: str) -> Optional[Tuple[float, Optional[float]]]:
+        """Return the last (at, deadline) heartbeat of a presence, if any."""
+        with self._lock:
+            return self._heartbeats.get(name)
+
+    def reset_heartbeat(self, name: str, at: float) -> None:
+        """Record a heartbeat on behalf of a presence, e.g. after a restart."""
+        with self._lock:
+            self._heartbeats[name] = (at, at)
+
+    def close(self, timeout: float = 2.0) -> None:
+        """Stop the reader thread and close every channel."""
+        with self._lock:
+            self._closed = True
+        self._wake()
+        self._reader.join(timeout=timeout)
+        self._wakeup_send.close()
+        with self._lock:
+            channels, self._channels = self._channels, []
+        for receiver in channels:
+            receiver.close()
@@ -0,0 +1,218 @@
+"""
+Restart supervisor for crashed presence workers.
+"""
+
+import time
+import heapq
+import functools
+import threading
+import dataclasses
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .logger import logger
+from .constants import config
+from .worker_spec import WorkerSpecification
+
+
+@dataclasses.dataclass
+class RestartStats:
+    """
+    Restart statistics of a presence.
+    """
+
+    crashes: int = 0
+    consecutive_crashes: int = 0
+    restarts: int = 0
+    hangs: int = 0
+    last_exit_code: Optional[int] = None
+    last_exit_at: Optional[float] = None
+    next_restart_at: Optional[float] = None
+    crash_loop: bool = False
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return the statistics as a JSON-serializable dict."""
+        data = dataclasses.asdict(self)
+        if self.next_restart_at is not None:
+            data["restart_in"] = max(0.0, self.next_restart_at - time.time())
+        return data
+
+
+class Supervisor:
+    """
+    Restarts workers that exit with an error. The delay starts at the
+    worker's backoff_time and doubles with every consecutive crash up to
+    config.restart_backoff_max. Exits within config.crash_loop_window
+    seconds of the start count as consecutive crashes; after
+    config.crash_loop_threshold of them the worker is left stopped.
+
+    Restarts are scheduled on a single thread, which also runs the start
+    and stop actions other threads hand over with run_soon.
+    """
+
+    def __init__(self, start: Callable[[WorkerSpecification], None]):
+        self._start = start
+        self._stats: Dict[str, RestartStats] = {}
+        self._queue: List[Tuple[float, int, str, WorkerSpecification]] = []
+        self._counter = 0
+        self._actions: "OrderedDict[str, Callable[[], None]]" = OrderedDict()
+        self._condition = threading.Condition()
+        self._closed = False
+        self._thread = threading.Thread(
+            target=self._run, name="supervisor", daemon=True
+        )
+        self._thread.start()
+
+    def stats(self, name: str) -> RestartStats:
+        """Return (and create) the restart statistics of a presence."""
+        with self._condition:
+            return self._stats.setdefault(name, RestartStats())
+
+    def delay_for(self, spec: WorkerSpecification, crashes: int) -> float:
+        """Backoff delay before the restart following the given crash count."""
+        base = max(1, spec.backoff_time or 1)
+        return min(base * 2 ** max(0, crashes - 1), config.restart_backoff_max)
+
+    def check_start(self, spec: WorkerSpecification) -> None:
+        """
+        Raise RuntimeError if a start would come before the backoff delay of
+        the last crash elapsed, so retries cannot hammer Discord. Starting a
+        crash looping worker again is allowed once the delay elapsed.
+        """
+        with self._condition:
+            stats = self._stats.setdefault(spec.name, RestartStats())
+            if not stats.consecutive_crashes or stats.last_exit_at is None:
+                return
+            ready_at = stats.next_restart_at or (
+                stats.last_exit_at + self.delay_for(spec, stats.consecutive_crashes)
+            )
+            remaining = ready_at - time.time()
+            if remaining > 0:
+                raise RuntimeError(
+                    f"{spec.name} crashed recently, retry in {remaining:.0f}s"
+                )
+            stats.crash_loop = False
+
+    def on_exit(
+        self,
+        spec: WorkerSpecification,
+        exit_code: Optional[int],
+        uptime: Optional[float],
+        stop_requested: bool,
+    ) -> None:
+        """
+        Record the exit of a worker and schedule a restart if it crashed.
+        """
+        now = time.time()
+        with self._condition:
+            stats = self._stats.setdefault(spec.name, RestartStats())
+            stats.last_exit_code = exit_code
+            stats.last_exit_at = now
+            if stop_requested or exit_code == 0:
+                stats.consecutive_crashes = 0
+                return
+
+            stats.crashes += 1
+            if uptime is not None and uptime >= config.crash_loop_window:
+                stats.consecutive_crashes = 1
+            else:
+                stats.consecutive_crashes += 1
+
+            if stats.consecutive_crashes >= config.crash_loop_threshold:
+                stats.crash_loop = True
+                stats.next_restart_at = None
+                logger.error(
+                    "Worker %s is crash looping (%d crashes in a row); not restarting",
+                    spec.name,
+                    stats.consecutive_crashes,
+                )
+                return
+
+            delay = self.delay_for(spec, stats.consecutive_crashes)
+            stats.next_restart_at = now + delay
+            self._counter += 1
+            heapq.heappush(
+                self._queue, (stats.next_restart_at, self._counter, spec.name, spec)
+            )
+            self._condition.notify()
+        logger.warning(
+            "Worker %s crashed with code %s; restarting in %.0fs",
+            spec.name,
+            exit_code,
+            delay,
+        )
+
+    def record_hang(self, name: str) -> None:
+        """Count a restart of a presence the watchdog found hung."""
+        with self._condition:
+            self._stats.setdefault(name, RestartStats()).hangs += 1
+
+    def run_soon(self, name: str, action: Callable[[], None]) -> None:
+        """
+        Run an action for a presence on the supervisor thread, for callers
+        that must not block on a start or stop. A pending action of the same
+        presence is replaced.
+
+        Parameters:
+            name (str): Presence name.
+            action (Callable): Called without arguments.
+        """
+        with self._condition:
+            if self._closed:
+                return
+            self._actions.pop(name, None)
+            self._actions[name] = action
+            self._condition.notify()
+
+    def cancel(self, name: str) -> None:
+        """Cancel a pending restart or action of a presence."""
+        with self._condition:
+            self._actions.pop(name, None)
+            self._queue = [item for item in self._queue if item[2] != name]
+            heapq.heapify(self._queue)
+            stats = self._stats.get(name)
+            if stats is not None:
+                stats.next_restart_at = None
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                while not self._closed and not self._actions:
+                    if self._queue:
+                        timeout = self._queue[0][0] - time.time()
+                        if timeout <= 0:
+                            break
+                        self._condition.wait(timeout)
+                    else:
+                        self._condition.wait()
+                if self._closed:
+                    return
+                if self._actions:
+                    name, action = self._actions.popitem(last=False)
+                else:
+                    _, _, name, spec = heapq.heappop(self._queue)
+                    stats = self._stats.setdefault(name, RestartStats())
+                    stats.next_restart_at = None
+                    stats.restarts += 1
+                    action = functools.partial(self._restart, spec)
+            try:
+                action()
+            except Exception:
+                logger.exception("Action for worker %s failed", name)
+
+    def _restart(self, spec: WorkerSpecification) -> None:
+        logger.info("Restarting crashed worker %s", spec.name)
+        try:
+            self._start(spec)
+        except Exception as exc:
+            logger.warning("Failed to restart worker %s: %s", spec.name, exc)
+            self.on_exit(spec, None, 0.0, False)
+
+    def close(self) -> None:
+        """Cancel every pending restart and stop the supervisor thread."""
+        with self._condition:
+            self._closed = True
+            self._queue.clear()
+            self._actions.clear()
+            self._condition.notify_all()
+        self._thread.join(timeout=2)
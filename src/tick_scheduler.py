@@ -0,0 +1,179 @@
+"""
+Timer heap driving the ticks of presences that use the tick model.
+"""
+
+import time
+import heapq
+import random
+import threading
+from typing import Any, List, Optional, Tuple
+
+from .logger import logger
+from .constants import config
+
+
+class TickJob:
+    """
+    Tick schedule of one presence. The presence thread calls wait() between
+    ticks; the scheduler thread wakes it when the next tick is due, or as
+    soon as its stop_event is set.
+    """
+
+    def __init__(
+        self,
+        scheduler: "TickScheduler",
+        name: str,
+        interval: float,
+        jitter: float,
+        stop_event: Optional[Any] = None,
+    ):
+        self.name = name
+        self.interval = max(0.1, float(interval or 1))
+        self.jitter = max(0.0, min(jitter, 0.5))
+        self.stop_event = stop_event
+        self.ticks = 0
+        self._scheduler = scheduler
+        self._event = threading.Event()
+        self._cancelled = False
+        self._due: Optional[float] = None
+
+    @property
+    def cancelled(self) -> bool:
+        """True once the job was cancelled or its stop_event was set."""
+        return self._cancelled or bool(
+            self.stop_event is not None and self.stop_event.is_set()
+        )
+
+    def _next_due(self) -> float:
+        now = time.monotonic()
+        if self._due is None:
+            # random phase so presences started together do not tick together
+            return now + random.uniform(0, min(self.jitter * self.interval, 1.0))
+        spread = self.interval * random.uniform(-self.jitter, self.jitter)
+        # scheduled from the previous due time to avoid drift, never in the past
+        return max(self._due + self.interval + spread, now)
+
+    def wait(self) -> bool:
+        """
+        Block until the next tick is due. Returns False once the job was
+        cancelled, which ends the presence.
+        """
+        if self.cancelled:
+            return False
+        self._event.clear()
+        self._due = self._next_due()
+        self._scheduler.schedule(self, self._due)
+        self._event.wait()
+        if self.cancelled:
+            return False
+        self.ticks += 1
+        return True
+
+    def fire(self) -> None:
+        """Wake the presence thread."""
+        self._event.set()
+
+    def cancel(self) -> None:
+        """Stop the job and wake the presence thread."""
+        self._cancelled = True
+        self._event.set()
+
+
+class TickScheduler:
+    """
+    Single timer thread for every tick presence in the process, e.g. all
+    presences of the shared host, instead of one timed wait per presence.
+    The stop_events of waiting jobs are checked from the same thread every
+    config.tick_stop_poll_interval seconds.
+    """
+
+    def __init__(self) -> None:
+        self._heap: List[Tuple[float, int, TickJob]] = []
+        self._counter = 0
+        self._condition = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+
+    def add(
+        self,
+        name: str,
+        interval: float,
+        stop_event: Optional[Any] = None,
+        jitter: Optional[float] = None,
+    ) -> TickJob:
+        """
+        Create the tick job of a presence. A stop_event that is set cancels
+        the job and wakes its thread.
+
+        Parameters:
+            name (str): Name of the presence.
+            interval (float): Seconds between ticks.
+            stop_event (Optional[Any]): Event that stops the presence.
+            jitter (Optional[float]): Fraction of the interval ticks are
+                randomly moved by, config.tick_jitter by default.
+        """
+        return TickJob(
+            self,
+            name,
+            interval,
+            config.tick_jitter if jitter is None else jitter,
+            stop_event,
+        )
+
+    def schedule(self, job: TickJob, due: float) -> None:
+        """Fire a job at the given monotonic time."""
+        with self._condition:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name="tick-scheduler", daemon=True
+                )
+                self._thread.start()
+            self._counter += 1
+            heapq.heappush(self._heap, (due, self._counter, job))
+            if self._heap[0][2] is job:
+                self._condition.notify()
+
+    def _cancel_stopped(self) -> None:
+        """Wake the waiting jobs whose stop_event was set."""
+        stopped = []
+        for item in self._heap:
+            try:
+                if item[2].cancelled:
+                    stopped.append(item)
+            except Exception:
+                # e.g. the stop_event of a parent that already exited
+                logger.debug("Failed to check stop of %s", item[2].name)
+                stopped.append(item)
+        if not stopped:
+            return
+        self._heap = [item for item in self._heap if item not in stopped]
+        heapq.heapify(self._heap)
+        for _, _, job in stopped:
+            job.cancel()
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                while True:
+                    self._cancel_stopped()
+                    if not self._heap:
+                        self._condition.wait()
+                        continue
+                    timeout = self._heap[0][0] - time.monotonic()
+                    if timeout <= 0:
+                        break
+                    self._condition.wait(min(timeout, config.tick_stop_poll_interval))
+                _, _, job = heapq.heappop(self._heap)
+            job.fire()
+
+
+_scheduler: Optional[TickScheduler] = None  # pylint: disable=invalid-name
+_scheduler_lock = threading.Lock()
+
+
+def get_tick_scheduler() -> TickScheduler:
+    """Return the tick scheduler of the current process."""
+    global _scheduler  # pylint: disable=global-statement
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = TickScheduler()
+        return _scheduler
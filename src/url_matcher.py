@@ -0,0 +1,122 @@
+"""
+URL match patterns declared by presence manifests.
+"""
+
+import fnmatch
+import threading
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from urllib.parse import urlsplit
+
+from .logger import logger
+
+
+class UrlPattern:
+    """
+    A "<scheme>://<host>/<path>" match pattern, as used by browser
+    extensions. The scheme may be "*" (http or https), the host may be "*"
+    or start with "*." to also match subdomains, and the path may contain
+    "*" wildcards (the query string is part of the path).
+    """
+
+    __slots__ = ("pattern", "scheme", "host", "subdomains", "path")
+
+    def __init__(self, pattern: str):
+        self.pattern = pattern
+        scheme, sep, rest = pattern.partition("://")
+        if not sep or scheme not in ("*", "http", "https"):
+            raise ValueError(f"Invalid scheme in match pattern {pattern!r}")
+        host, slash, path = rest.partition("/")
+        if not host or not slash:
+            raise ValueError(f"Invalid host or path in match pattern {pattern!r}")
+        host = host.lower()
+        self.subdomains = host.startswith("*.")
+        if self.subdomains:
+            host = host[2:]
+        if "*" in host and host != "*":
+            raise ValueError(f"Invalid host in match pattern {pattern!r}")
+        self.scheme = scheme
+        self.host = host
+        self.path = "/" + path
+
+    def matches(self, scheme: str, host: str, path: str) -> bool:
+        """Check a split URL against the pattern."""
+        if self.scheme == "*":
+            if scheme not in ("http", "https"):
+                return False
+        elif scheme != self.scheme:
+            return False
+        if self.host not in ("*", host):
+            if not (self.subdomains and host.endswith("." + self.host)):
+                return False
+        return fnmatch.fnmatchcase(path, self.path)
+
+
+class UrlMatcher:
+    """
+    Index from URL host to the presences whose match patterns could apply,
+    so matching a page URL only tests the patterns of its host and parent
+    domains instead of every pattern of every presence.
+    """
+
+    def __init__(self) -> None:
+        self._by_host: Dict[str, List[Tuple[str, UrlPattern]]] = {}
+        self._any_host: List[Tuple[str, UrlPattern]] = []
+        self._lock = threading.Lock()
+
+    def set(self, name: str, patterns: Optional[Iterable[str]]) -> None:
+        """Replace the match patterns of a presence."""
+        compiled = []
+        for pattern in patterns or ():
+            try:
+                compiled.append(UrlPattern(str(pattern)))
+            except ValueError as exc:
+                logger.warning("Ignoring match pattern of %s: %s", name, exc)
+        with self._lock:
+            self._remove(name)
+            for pattern in compiled:
+                if pattern.host == "*":
+                    self._any_host.append((name, pattern))
+                else:
+                    self._by_host.setdefault(pattern.host, []).append((name, pattern))
+
+    def _remove(self, name: str) -> None:
+        self._any_host = [item for item in self._any_host if item[0] != name]
+        for host in list(self._by_host):
+            items = [item for item in self._by_host[host] if item[0] != name]
+            if items:
+                self._by_host[host] = items
+            else:
+                del self._by_host[host]
+
+    def remove(self, name: str) -> None:
+        """Forget the match patterns of a presence."""
+        with self._lock:
+            self._remove(name)
+
+    def match(self, url: str) -> Set[str]:
+        """Return the names of the presences matching a URL."""
+        try:
+            parts = urlsplit(url or "")
+        except ValueError:
+            return set()
+        host = (parts.hostname or "").lower()
+        if not host:
+            return set()
+        path = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+        labels = host.split(".")
+        matched = set()
+        with self._lock:
+            candidates = list(self._any_host)
+            for i in range(len(labels)):
+                candidates += self._by_host.get(".".join(labels[i:]), [])
+        for name, pattern in candidates:
+            if name not in matched and pattern.matches(parts.scheme, host, path):
+                matched.add(name)
+        return matched
+
+    def match_all(self, urls: Iterable[str]) -> Set[str]:
+        """Return the names of the presences matching any of the URLs."""
+        matched: Set[str] = set()
+        for url in urls:
+            matched |= self.match(url)
+        return matched
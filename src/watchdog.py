@@ -0,0 +1,92 @@
+"""
+Watchdog restarting presence workers that stopped sending heartbeats.
+"""
+
+import time
+import threading
+from typing import Callable, Dict, Optional, Tuple
+
+from .logger import logger
+from .constants import config
+from .worker_spec import WorkerSpecification
+
+HeartbeatFn = Callable[[str], Optional[Tuple[float, Optional[float]]]]
+
+
+class Watchdog:
+    """
+    Checks the heartbeats of running workers every config.watchdog_interval
+    seconds. A worker whose last heartbeat (or the end of the wait it
+    announced) is older than config.watchdog_budget plus its interval is
+    considered hung and handed to on_hang. Workers waiting without a
+    timeout are never considered hung, and neither are workers that did
+    not send a heartbeat yet: presences that never wait on their
+    stop_event (e.g. looping on time.sleep) send none.
+
+    Parameters:
+        workers (Callable): Returns the worker specifications to check.
+        heartbeat (Callable): Returns the last (at, deadline) heartbeat of a
+            presence, or None if it did not send one yet.
+        on_hang (Callable): Called with the hung worker and the number of
+            seconds it is overdue.
+    """
+
+    def __init__(
+        self,
+        workers: Callable[[], Dict[str, WorkerSpecification]],
+        heartbeat: HeartbeatFn,
+        on_hang: Callable[[WorkerSpecification, float], None],
+    ):
+        self._workers = workers
+        self._heartbeat = heartbeat
+        self._on_hang = on_hang
+        self._thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+
+    def start(self) -> None:
+        """Start checking in a background thread."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="watchdog", daemon=True)
+        self._thread.start()
+
+    def overdue(self, spec: WorkerSpecification, now: float) -> Optional[float]:
+        """Seconds a running worker is past its heartbeat budget, if any."""
+        beat = self._heartbeat(spec.name)
+        if beat is None:
+            return None
+        _, deadline = beat
+        if deadline is None:
+            return None
+        limit = deadline + config.watchdog_budget + (spec.interval or 0)
+        return now - limit if now > limit else None
+
+    def check(self) -> None:
+        """Check every running worker once."""
+        now = time.time()
+        for spec in self._workers().values():
+            process = spec.process
+            if not spec.running or process is None or not process.is_alive():
+                continue
+            overdue = self.overdue(spec, now)
+            if overdue is None:
+                continue
+            try:
+                self._on_hang(spec, overdue)
+            except Exception:
+                logger.exception("Failed to handle hung worker %s", spec.name)
+
+    def _run(self) -> None:
+        while not self._stop_event.wait(config.watchdog_interval):
+            try:
+                self.check()
+            except Exception:
+                logger.exception("Error in watchdog loop")
+
+    def close(self) -> None:
+        """Stop the watchdog thread."""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+            self._thread = None
@@ -0,0 +1,425 @@
+"""
+Lean entry point of presence worker processes.
+
+Only what every presence needs is imported here; the browser runtime
+(websockets, requests) is imported when a web presence starts, so desktop
+presences do not pay for it.
+"""
+
+import time
+
+_IMPORT_STARTED = time.perf_counter()
+
+# pylint: disable=wrong-import-position
+import os
+import sys
+import pathlib
+import threading
+import multiprocessing as _mp
+import importlib
+import importlib.util
+import types
+import functools
+from multiprocessing.connection import Connection
+from typing import Any, Dict, Optional
+
+from .utils import resolve_callable
+from .logger import logger, get_logger
+from .constants import config
+from .presence_spec import PresenceJob, parameter_plan, read_compiled
+from .tick_scheduler import get_tick_scheduler
+from .worker_metrics import (
+    Heartbeat,
+    MeteredStopEvent,
+    MetricsReporter,
+    TickMeter,
+    rss_bytes,
+)
+from .status_channel import flush_status_channels
+from .worker_control import ControlHandler
+from .rpc import ClientRPC
+
+
+def _report_first_update(
+    rpc: ClientRPC, name: str, started_at: float, shared_state: Optional[Any]
+) -> None:
+    """
+    Wrap rpc.update so the first call reports the time elapsed since the
+    presence start was requested.
+    """
+    original_update = rpc.update
+
+    def update(*args: Any, **kwargs: Any) -> Any:
+        rpc.update = original_update
+        latency = time.time() - started_at
+        logger.info("First RPC update for %s after %.3fs", name, latency)
+        if shared_state is not None:
+            try:
+                shared_state["startup_latency"] = latency
+            except Exception:
+                logger.debug("Failed to store startup latency for %s", name)
+        return original_update(*args, **kwargs)
+
+    rpc.update = update
+
+
+def _update_from_result(rpc: Optional[ClientRPC], result: Any, path: str) -> None:
+    """
+    Update the activity from a dict returned by a presence callable.
+    """
+    if not isinstance(result, dict) or rpc is None:
+        return
+    try:
+        rpc.update(
+            state=result.get("state"),
+            details=result.get("details"),
+            activity_type=result.get("activity_type"),
+            start_time=result.get("start_time"),
+            end_time=result.get("end_time"),
+            large_image=result.get("large_image"),
+            large_text=result.get("large_text"),
+            small_image=result.get("small_image"),
+            small_text=result.get("small_text"),
+            buttons=result.get("buttons"),
+        )
+    except Exception:
+        logger.exception("Failed to call rpc.update for %s", path)
+
+
+def _run_ticks(
+    name: str,
+    tick: Any,
+    rpc: Optional[ClientRPC],
+    interval: int,
+    stop_event: Optional[Any],
+    meter: Optional[TickMeter] = None,
+    heartbeat: Optional[Heartbeat] = None,
+) -> None:
+    """
+    Run a tick model presence until its stop_event is set. The process's
+    tick scheduler wakes it every interval seconds (with jitter). A tick
+    returning a dict updates the activity when it differs from the last
+    one; a failing tick is logged and retried on the next tick.
+    """
+    job = get_tick_scheduler().add(name, interval, stop_event)
+    # longest wait for the next tick: interval plus jitter
+    max_wait = job.interval * (1 + job.jitter)
+    last_result = None
+    while True:
+        if heartbeat is not None:
+            heartbeat.beat(max_wait)
+        if not job.wait():
+            break
+        if heartbeat is not None:
+            heartbeat.beat()
+        started = time.perf_counter()
+        try:
+            result = tick()
+        except Exception:
+            logger.exception("Tick of %s failed", name)
+            continue
+        finally:
+            if meter is not None:
+                meter.record(time.perf_counter() - started)
+        if isinstance(result, dict) and result != last_result:
+            _update_from_result(rpc, result, name)
+            last_result = result
+    logger.debug("Tick loop of %s stopped after %d ticks", name, job.ticks)
+
+
+# pylint: disable=too-many-branches
+# pylint: disable=too-many-locals
+# pylint: disable=too-many-nested-blocks
+def run_presence(
+    job: PresenceJob,
+    stop_event: Optional[Any] = None,
+    hosted: bool = False,
+    control: Optional[Connection] = None,
+) -> int:
+    """
+    Loads and runs the specified presence worker in the calling thread.
+    Used by worker processes and by the shared presence host.
+
+    Parameters:
+        job (PresenceJob): The presence to run.
+        stop_event (Optional[Any]): Multiprocessing Event to signal shutdown.
+        hosted (bool): True when running as a thread of the presence host;
+            CPU time is then reported for the presence's thread only.
+        control (Optional[Connection]): Receiving end of the control pipe of
+            a process worker (see worker_control.ControlHandler).
+
+    Returns:
+        int: Exit code, non-zero if the presence could not be loaded or failed.
+    """
+    path = job.path
+    shared_state = job.shared_state
+    compiled = job.compiled
+    rpc: Optional[ClientRPC] = None
+    runtime: Optional[Any] = None
+    meter = TickMeter()
+    heartbeat = Heartbeat(shared_state)
+    reporter = MetricsReporter(
+        shared_state, meter, hosted=hosted, extra={"import_seconds": IMPORT_SECONDS}
+    )
+    reporter.start()
+    if control is not None:
+        ControlHandler(pathlib.Path(path).name, shared_state).listen(control)
+
+    try:
+        logger.debug(
+            "run_presence starting in pid=%s name=%s thread=%s",
+            os.getpid(),
+            _mp.current_process().name,
+            threading.current_thread().name,
+        )
+
+        rpc = ClientRPC(client_id=job.client_id, debug=True)
+        rpc.connect()
+        module_path = pathlib.Path(path)
+        if job.started_at is not None:
+            _report_first_update(rpc, module_path.name, job.started_at, shared_state)
+
+        if compiled is None:
+            compiled = read_compiled(path, job.entrypoint, job.callable_name)
+
+        # if manifest specifies imports, create a temporary package and preload files
+        process_name = compiled.module_name
+        package_name = compiled.package_name
+        if package_name is not None:
+            try:
+                pkg_mod = types.ModuleType(package_name)
+                pkg_mod.__path__ = [str(module_path)]
+                sys.modules[package_name] = pkg_mod
+                for fname in compiled.imports:
+                    try:
+                        file_path = module_path / fname
+                        if not file_path.exists():
+                            logger.warning(
+                                "Import file %s listed in manifest not found for %s",
+                                fname,
+                                module_path,
+                            )
+                            continue
+                        mod_name = f"{package_name}.{file_path.stem}"
+                        spec_i = importlib.util.spec_from_file_location(
+                            mod_name, str(file_path)
+                        )
+                        if spec_i and spec_i.loader:
+                            m = importlib.util.module_from_spec(spec_i)
+                            spec_i.loader.exec_module(m)
+                            sys.modules[mod_name] = m
+                            logger.info(
+                                "Preloaded import %s for %s", fname, module_path
+                            )
+                    except Exception:
+                        logger.debug(
+                            "Failed to preload import %s for %s", fname, module_path
+                        )
+            except Exception:
+                process_name = "pp_" + module_path.name
+
+        spec = importlib.util.spec_from_file_location(
+            process_name, str(module_path / compiled.entrypoint)
+        )
+        if spec is None or spec.loader is None:
+            logger.error("Could not load module for presence worker at %s", path)
+            return 1
+
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+
+        func = getattr(module, compiled.callable_name, None)
+        params = compiled.params
+        if params is None or not callable(func):
+            # not resolved during discovery: reflect on the loaded module
+            func, resolved_name = resolve_callable(module, compiled.callable_name)
+            if func is None:
+                logger.error(
+                    "Callable %s not found in module %s",
+                    compiled.callable_name,
+                    compiled.entrypoint,
+                )
+                return 1
+            if resolved_name != compiled.callable_name:
+                logger.warning(
+                    "Requested callable %s not found, using %s instead",
+                    compiled.callable_name,
+                    resolved_name,
+                )
+            # pylint: disable=import-outside-toplevel
+            import inspect
+
+            params = parameter_plan(inspect.signature(func).parameters)
+
+        web_enabled = compiled.web
+        if not web_enabled:
+            logger.debug(
+                "Manifest of %s does not set web:true; runtime will be disabled",
+                module_path,
+            )
+
+        runtime = None
+        if web_enabled:
+            logger.debug("Web runtime enabled for worker %s", module_path.name)
+            # pylint: disable=import-outside-toplevel
+            import_started = time.perf_counter()
+            from .runtime.runtime import Runtime
+            from .runtime.runtime_shim import SimpleRuntimeShim
+
+            reporter.extra["web_import_seconds"] = time.perf_counter() - import_started
+            if job.shared_pages is not None:
+                try:
+                    logger.debug(
+                        "Using shared pages snapshot inside worker %s", module_path.name
+                    )
+                    runtime = SimpleRuntimeShim(job.shared_pages)
+                    try:
+                        pages_count = len(list(job.shared_pages))
+                    except Exception:
+                        pages_count = 0
+                    logger.debug(
+                        "Using shared pages snapshot inside worker %s (pages=%d)",
+                        module_path.name,
+                        pages_count,
+                    )
+                    logger.debug(
+                        "Worker runtime type=shim (shared_pages) module=%s",
+                        module_path.name,
+                    )
+                except Exception as exc:
+                    runtime = None
+                    logger.debug(
+                        "Failed to build runtime from shared_pages for %s: %s",
+                        module_path.name,
+                        exc,
+                    )
+            else:
+                try:
+                    runtime = Runtime(origin=f"worker:{module_path.name}")
+                    try:
+                        try:
+                            runtime.load(start_background=False)
+                        except TypeError:
+                            runtime.load()
+
+                    except Exception as inner_exc:
+                        runtime = None
+                        logger.debug(
+                            "Failed to initialize local Runtime for %s: %s",
+                            module_path.name,
+                            inner_exc,
+                        )
+                except Exception as exc:
+                    runtime = None
+                    logger.debug(
+                        "Failed to create Runtime for %s: %s", module_path.name, exc
+                    )
+
+        if stop_event is not None and not compiled.tick:
+            # loop presences wait on their stop_event between two updates
+            stop_event = MeteredStopEvent(stop_event, meter, heartbeat)
+        context: Dict[str, Any] = {
+            "client_id": job.client_id,
+            "path": str(module_path),
+            "interval": job.interval,
+            "runtime": runtime,
+            "stop_event": stop_event,
+            "process_name": process_name,
+            "steam_account": job.steam_account,
+            "shared_state": shared_state,
+        }
+        try:
+            logger.debug("Calling worker %s with params: %s", path, params)
+            args = []
+            if params:
+                injected = {
+                    "rpc": rpc,
+                    "context": context,
+                    "stop_event": stop_event,
+                    "runtime": runtime,
+                    "steam_account": job.steam_account,
+                    "interval": job.interval,
+                    "shared_state": shared_state,
+                }
+                for key in params:
+                    if key == "logger":
+                        args.append(get_logger("worker"))
+                    else:
+                        args.append(injected[key])
+            if compiled.tick:
+                _run_ticks(
+                    module_path.name,
+                    functools.partial(func, *args),
+                    rpc,
+                    job.interval,
+                    stop_event,
+                    meter,
+                    heartbeat,
+                )
+                return 0
+            result = func(*args)
+            _update_from_result(rpc, result, path)
+        except Exception:
+            logger.exception("Error calling callable for worker %s", path)
+            return 1
+    except Exception as exc:
+        logger.exception("Fatal error in run_presence for %s -> %s", path, exc)
+        return 1
+    finally:
+        reporter.stop()
+        if rpc is not None:
+            try:
+                try:
+                    rpc.clear_activity()
+                except Exception:
+                    logger.debug(
+                        "rpc.clear_activity() failed (continuing to close)",
+                        exc_info=True,
+                    )
+                rpc.close()
+            except Exception:
+                logger.exception("Error closing rpc for worker %s", path)
+        if runtime is not None:
+            try:
+                # if runtime has a close method, call it
+                close_fn = getattr(runtime, "close", None)
+                if callable(close_fn):
+                    # pylint: disable=not-callable
+                    close_fn()
+            except Exception:
+                logger.exception("Error closing runtime for worker %s", path)
+    return 0
+
+
+def log_bootstrap() -> None:
+    """
+    Log the import time and memory of a fresh worker process, warning when
+    the imports exceed config.worker_import_budget seconds.
+    """
+    rss = rss_bytes()
+    rss_text = f"{rss / 1048576:.1f} MiB" if rss is not None else "unknown"
+    if IMPORT_SECONDS > config.worker_import_budget:
+        logger.warning(
+            "Worker imports took %.3fs, over the %.3fs budget (rss %s)",
+            IMPORT_SECONDS,
+            config.worker_import_budget,
+            rss_text,
+        )
+    else:
+        logger.debug("Worker imports took %.3fs (rss %s)", IMPORT_SECONDS, rss_text)
+
+
+def process_worker(*args: Any, **kwargs: Any) -> None:
+    """
+    Worker process entrypoint. Runs the presence and exits with its code.
+    Takes the same arguments as run_presence.
+    """
+    log_bootstrap()
+    exit_code = run_presence(*args, **kwargs)
+    flush_status_channels()
+    if exit_code:
+        sys.exit(exit_code)
+
+
+# seconds spent importing this module and its dependencies
+IMPORT_SECONDS = time.perf_counter() - _IMPORT_STARTED
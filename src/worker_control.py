@@ -0,0 +1,120 @@
+"""
+Control messages sent from the manager to running presences.
+"""
+
+import time
+import threading
+from multiprocessing.connection import Connection
+from typing import Any, Iterable, Optional, Tuple
+
+from .logger import logger
+from .constants import config
+from .profiler import SamplingProfiler, dump_stacks
+
+
+class ControlHandler:
+    """
+    Worker-side handler of control messages, which are tuples whose first
+    item names the operation:
+
+        ("profile", seconds, interval): sample the presence for seconds and
+            write its collapsed stacks to config.logs_dir/profiles. The
+            result is reported as "last_profile" in the shared state.
+        ("dump_stacks",): write the current stack of the presence's threads
+            to config.logs_dir/stacks, e.g. when the watchdog found it hung.
+
+    Parameters:
+        name (str): Presence name.
+        shared_state (Optional[Any]): Status writer of the presence.
+        thread_ids (Optional[Iterable[int]]): Threads of the presence, or None
+            when the presence owns the whole process.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        shared_state: Optional[Any] = None,
+        thread_ids: Optional[Iterable[int]] = None,
+    ):
+        self.name = name
+        self.shared_state = shared_state
+        self.thread_ids = list(thread_ids) if thread_ids is not None else None
+        self._profiling = threading.Lock()
+
+    def _report(self, key: str, value: Any) -> None:
+        if self.shared_state is None:
+            return
+        try:
+            self.shared_state[key] = value
+        except Exception:
+            logger.debug("Failed to report %s for %s", key, self.name)
+
+    def handle(self, message: Tuple[Any, ...]) -> None:
+        """Handle one control message without blocking the caller."""
+        op = message[0] if message else None
+        if op == "profile":
+            seconds = min(float(message[1]), config.profile_max_seconds)
+            interval = message[2] if len(message) > 2 else None
+            threading.Thread(
+                target=self._profile,
+                args=(seconds, interval),
+                name=f"profiler:{self.name}",
+                daemon=True,
+            ).start()
+        elif op == "dump_stacks":
+            self.dump_stacks()
+        else:
+            logger.warning("Unknown control message %r for %s", op, self.name)
+
+    def dump_stacks(self) -> Optional[str]:
+        """Write the stacks of the presence's threads and return the path."""
+        try:
+            path = dump_stacks(self.name, self.thread_ids)
+        except Exception:
+            logger.exception("Failed to dump stacks of %s", self.name)
+            return None
+        logger.warning("Dumped stacks of %s to %s", self.name, path)
+        self._report("last_stack_dump", {"path": str(path), "at": time.time()})
+        return str(path)
+
+    def _profile(self, seconds: float, interval: Optional[float]) -> None:
+        if not self._profiling.acquire(blocking=False):
+            logger.warning("%s is already being profiled", self.name)
+            return
+        try:
+            logger.info("Profiling %s for %.1fs", self.name, seconds)
+            self._report("last_profile", {"status": "running", "seconds": seconds})
+            profiler = SamplingProfiler(self.name, self.thread_ids, interval)
+            profiler.run(seconds)
+            path = profiler.write()
+            self._report(
+                "last_profile",
+                {
+                    "status": "done",
+                    "seconds": seconds,
+                    "samples": profiler.samples,
+                    "path": str(path),
+                    "finished_at": time.time(),
+                },
+            )
+        except Exception as exc:
+            logger.exception("Profiling %s failed", self.name)
+            self._report("last_profile", {"status": "failed", "error": str(exc)})
+        finally:
+            self._profiling.release()
+
+    def listen(self, control: Connection) -> None:
+        """Handle the messages of a control pipe in a background thread."""
+
+        def loop() -> None:
+            while True:
+                try:
+                    message = control.recv()
+                except (EOFError, OSError):
+                    break
+                try:
+                    self.handle(message)
+                except Exception:
+                    logger.exception("Failed to handle control message")
+
+        threading.Thread(target=loop, name="worker-control", daemon=True).start()
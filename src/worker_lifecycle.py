@@ -0,0 +1,168 @@
+"""
+Exit monitoring and bulk stopping of presence workers.
+"""
+
+import time
+import functools
+import threading
+from typing import Any, List, Optional
+
+from .logger import logger
+from .process_monitor import ProcessMonitor
+from .process_utils import wait_for_exit
+from .status_channel import StatusBoard
+from .supervisor import Supervisor
+from .presence_host import HostedProcess
+from .worker_spec import WorkerSpecification
+
+
+class WorkerMonitor:
+    """
+    Watches the process of every started worker. When one exits, the
+    worker's process state is cleared, its exit code is recorded on the
+    status board and the supervisor decides about a restart.
+
+    Parameters:
+        status (StatusBoard): Status board of the workers.
+        supervisor (Supervisor): Restart supervisor.
+    """
+
+    def __init__(self, status: StatusBoard, supervisor: Supervisor):
+        self._status = status
+        self._supervisor = supervisor
+        self._processes = ProcessMonitor()
+        # guards the process state of the watched workers
+        self._lock = threading.Lock()
+
+    def attach(
+        self,
+        worker_spec: WorkerSpecification,
+        process: Any,
+        stop_event: Optional[Any],
+        control: Optional[Any],
+    ) -> None:
+        """
+        Point a worker at the process of its new run and watch it. The
+        state is swapped under the lock that guards exit handling, so the
+        exit of a previous run can never clear the new one.
+
+        Parameters:
+            worker_spec (WorkerSpecification): Worker that was started.
+            process (Any): Process or handle of the new run.
+            stop_event (Optional[Any]): Stop event of the new run.
+            control (Optional[Any]): Control pipe of the new run.
+        """
+        with self._lock:
+            worker_spec.stop_event = stop_event
+            worker_spec.control = control
+            worker_spec.process = process
+            worker_spec.running = True
+        self.watch(worker_spec)
+
+    def watch(self, worker_spec: WorkerSpecification) -> None:
+        """
+        Register the current process of a worker with the process monitor.
+        """
+        process = worker_spec.process
+        if not process:
+            logger.warning(
+                "No process found for monitoring worker %s", worker_spec.name
+            )
+            return
+        logger.info("Monitoring worker %s (%s)", worker_spec.name, process.pid)
+        self._processes.watch(
+            process,
+            functools.partial(
+                self._on_exit,
+                worker_spec,
+                getattr(worker_spec, "stop_event", None),
+                worker_spec.started_at,
+            ),
+        )
+
+    def _on_exit(
+        self,
+        worker_spec: WorkerSpecification,
+        stop_event: Optional[Any],
+        started_at: Optional[float],
+        process: Any,
+    ) -> None:
+        exit_code = process.exitcode
+        logger.info("Worker %s exited with code %s", worker_spec.name, exit_code)
+        if isinstance(process, HostedProcess):
+            # the monitor no longer waits on its sentinel
+            process.close()
+        with self._lock:
+            # a restart may already have replaced the process
+            if worker_spec.process is not process:
+                return
+            worker_spec.process = None
+            worker_spec.running = False
+            control, worker_spec.control = worker_spec.control, None
+            worker_spec.stop_event = None
+        if control is not None:
+            try:
+                control.close()
+            except Exception:
+                logger.debug("Failed to close control pipe of %s", worker_spec.name)
+        self._status.set(worker_spec.name, "exit_code", exit_code)
+        try:
+            stop_requested = stop_event is not None and stop_event.is_set()
+        except Exception:
+            stop_requested = False
+        uptime = time.time() - started_at if started_at else None
+        self._supervisor.on_exit(worker_spec, exit_code, uptime, stop_requested)
+
+    def close(self) -> None:
+        """Stop monitoring."""
+        self._processes.close()
+
+
+def stop_workers(
+    targets: List[WorkerSpecification], supervisor: Supervisor, timeout: float
+) -> None:
+    """
+    Stop several workers at once: every stop_event is signalled first, then
+    all workers are awaited together until a single deadline and the ones
+    still running are terminated.
+
+    Parameters:
+        targets (List[WorkerSpecification]): Running workers to stop.
+        supervisor (Supervisor): Restart supervisor, whose pending restarts
+            of the workers are cancelled.
+        timeout (float): Seconds to wait before terminating.
+    """
+    started = time.monotonic()
+    # the monitor clears worker_spec.process as soon as a worker exits
+    processes = [worker_spec.process for worker_spec in targets]
+    names = {}
+    for worker_spec, process in zip(targets, processes):
+        supervisor.cancel(worker_spec.name)
+        names[id(process)] = worker_spec.name
+        stop_event = getattr(worker_spec, "stop_event", None)
+        try:
+            if stop_event is not None:
+                stop_event.set()
+            else:
+                process.terminate()
+        except Exception:
+            logger.exception("Failed to signal worker %s", worker_spec.name)
+    stragglers = wait_for_exit(processes, timeout)
+    for process in stragglers:
+        name = names.get(id(process))
+        logger.warning("Worker %s did not exit in time; terminating", name)
+        try:
+            process.terminate()
+        except Exception:
+            logger.exception("Failed to terminate worker %s", name)
+    if stragglers:
+        wait_for_exit(stragglers, 2.0)
+
+    for worker_spec in targets:
+        worker_spec.running = False
+    logger.info(
+        "Stopped %d worker(s) in %.2fs (%d terminated)",
+        len(targets),
+        time.monotonic() - started,
+        len(stragglers),
+    )
@@ -0,0 +1,272 @@
+"""
+Resource and tick accounting of presence workers.
+"""
+
+import os
+import sys
+import time
+import bisect
+import threading
+from typing import Any, Dict, List, Optional
+
+from .logger import logger
+from .constants import config
+
+try:
+    import psutil  # optional, used when installed
+except ImportError:  # pragma: no cover
+    psutil = None
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+# upper bounds in milliseconds of the tick duration histogram buckets
+TICK_BUCKETS_MS = (1, 5, 10, 50, 100, 500, 1000, 5000)
+
+
+class TickMeter:
+    """
+    Counts the ticks of a presence and keeps a histogram of their duration.
+    The last bucket counts ticks longer than the largest bound.
+    """
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets: List[int] = [0] * (len(TICK_BUCKETS_MS) + 1)
+        self._lock = threading.Lock()
+
+    def record(self, duration: float) -> None:
+        """Record a tick that took duration seconds."""
+        index = bisect.bisect_left(TICK_BUCKETS_MS, duration * 1000.0)
+        with self._lock:
+            self.count += 1
+            self.total += duration
+            self.max = max(self.max, duration)
+            self.buckets[index] += 1
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return the tick figures as a JSON-serializable dict."""
+        with self._lock:
+            return {
+                "ticks": self.count,
+                "tick_avg_ms": (
+                    self.total / self.count * 1000.0 if self.count else None
+                ),
+                "tick_max_ms": self.max * 1000.0 if self.count else None,
+                "tick_histogram": {
+                    "bounds_ms": list(TICK_BUCKETS_MS),
+                    "counts": list(self.buckets),
+                },
+            }
+
+
+class Heartbeat:
+    """
+    Sends heartbeats of a presence over its status writer. Busy beats are
+    sent at most every config.heartbeat_interval seconds; a beat before a
+    wait is always sent with the time the wait ends, so the manager's
+    watchdog does not mistake a long sleep for a hang.
+    """
+
+    def __init__(self, shared_state: Any):
+        if not hasattr(shared_state, "send_heartbeat"):
+            shared_state = None
+        self.shared_state = shared_state
+        self._last_sent = 0.0
+
+    def beat(self, idle_for: Optional[float] = 0.0) -> None:
+        """
+        Report progress. idle_for is how long the presence is about to wait,
+        None for a wait without a timeout.
+        """
+        if self.shared_state is None:
+            return
+        now = time.time()
+        busy = idle_for is not None and idle_for <= 0
+        if busy and now - self._last_sent < config.heartbeat_interval:
+            return
+        self._last_sent = now
+        deadline = None if idle_for is None else now + max(0.0, idle_for)
+        try:
+            self.shared_state.send_heartbeat(now, deadline)
+        except Exception:
+            logger.debug("Failed to send heartbeat", exc_info=True)
+
+
+class MeteredStopEvent:
+    """
+    stop_event handed to loop presences. Presences wait on it between two
+    updates, so the time from one wait() returning to the next wait() call
+    is recorded as a tick, and checking or waiting on it sends heartbeats.
+    """
+
+    def __init__(
+        self, stop_event: Any, meter: TickMeter, heartbeat: Optional[Heartbeat] = None
+    ):
+        self._stop_event = stop_event
+        self._meter = meter
+        self._heartbeat = heartbeat
+        self._tick_started: Optional[float] = time.perf_counter()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Wait for the stop_event, recording the tick that just ended."""
+        if self._tick_started is not None:
+            self._meter.record(time.perf_counter() - self._tick_started)
+        if self._heartbeat is not None:
+            self._heartbeat.beat(timeout)
+        try:
+            return self._stop_event.wait(timeout)
+        finally:
+            self._tick_started = time.perf_counter()
+
+    def is_set(self) -> bool:
+        """Return True once the presence should stop."""
+        if self._heartbeat is not None:
+            self._heartbeat.beat()
+        return self._stop_event.is_set()
+
+    def set(self) -> None:
+        """Request the presence to stop."""
+        self._stop_event.set()
+
+    def clear(self) -> None:
+        """Reset the stop_event."""
+        self._stop_event.clear()
+
+
+def _read_proc(path: str) -> Optional[str]:
+    try:
+        with open(path, "r", encoding="ascii", errors="ignore") as file:
+            return file.read()
+    except OSError:
+        return None
+
+
+def _thread_cpu_time(native_id: int) -> Optional[float]:
+    """CPU seconds used by a thread of this process (Linux only)."""
+    stat = _read_proc(f"/proc/self/task/{native_id}/stat")
+    if stat is None:
+        return None
+    # fields after the parenthesized command name, utime and stime are 14-15
+    fields = stat.rsplit(")", 1)[-1].split()
+    try:
+        ticks = int(fields[11]) + int(fields[12])
+    except (IndexError, ValueError):
+        return None
+    return ticks / os.sysconf("SC_CLK_TCK")
+
+
+def rss_bytes() -> Optional[int]:
+    """Current resident memory of the process in bytes, if known."""
+    statm = _read_proc("/proc/self/statm")
+    if statm is not None:
+        try:
+            return int(statm.split()[1]) * os.sysconf("SC_PAGE_SIZE")
+        except (IndexError, ValueError):
+            pass
+    if psutil is not None:
+        try:
+            return psutil.Process().memory_info().rss
+        except Exception:
+            logger.debug("psutil memory_info failed", exc_info=True)
+    if resource is not None:
+        # peak rather than current RSS; KiB on Linux, bytes on macOS
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+    return None
+
+
+def sample_process(native_id: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Sample the resource usage of the current process. With native_id, the
+    CPU time is the one of that thread only, used for hosted presences that
+    share the host process.
+    """
+    cpu_time = None
+    if native_id is not None:
+        cpu_time = _thread_cpu_time(native_id)
+    if cpu_time is None:
+        times = os.times()
+        cpu_time = times.user + times.system
+        native_id = None
+    status = _read_proc("/proc/self/status")
+    threads = None
+    if status is not None:
+        for line in status.splitlines():
+            if line.startswith("Threads:"):
+                threads = int(line.split()[1])
+                break
+    if threads is None:
+        threads = threading.active_count()
+    return {
+        "pid": os.getpid(),
+        "cpu_time": cpu_time,
+        "cpu_scope": "thread" if native_id is not None else "process",
+        "rss": rss_bytes(),
+        "threads": threads,
+    }
+
+
+class MetricsReporter:
+    """
+    Background thread sending the metrics of a presence over its status
+    writer every config.metrics_interval seconds, plus once when stopped.
+    """
+
+    def __init__(
+        self,
+        shared_state: Any,
+        meter: TickMeter,
+        hosted: bool = False,
+        interval: Optional[float] = None,
+        extra: Optional[Dict[str, Any]] = None,
+    ):
+        self.shared_state = shared_state
+        self.meter = meter
+        # static figures added to every report, e.g. import times
+        self.extra: Dict[str, Any] = dict(extra or {})
+        self.interval = interval if interval is not None else config.metrics_interval
+        # hosted presences share the host process: account their thread only
+        self._native_id = threading.get_native_id() if hosted else None
+        self._started = time.time()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """Start reporting in a background thread."""
+        if not hasattr(self.shared_state, "send_metrics"):
+            return
+        self._thread = threading.Thread(
+            target=self._run, name="metrics-reporter", daemon=True
+        )
+        self._thread.start()
+
+    def report(self) -> None:
+        """Send the current figures."""
+        try:
+            metrics = sample_process(self._native_id)
+            metrics.update(self.meter.to_dict())
+            metrics.update(self.extra)
+            metrics["uptime"] = time.time() - self._started
+            metrics["sampled_at"] = time.time()
+            self.shared_state.send_metrics(metrics)
+        except Exception:
+            logger.debug("Failed to report worker metrics", exc_info=True)
+
+    def _run(self) -> None:
+        self.report()
+        while not self._stop_event.wait(self.interval):
+            self.report()
+
+    def stop(self) -> None:
+        """Send a last report and stop the thread."""
+        if self._thread is None:
+            return
+        self._stop_event.set()
+        self._thread.join(timeout=2)
+        self._thread = None
+        self.report()
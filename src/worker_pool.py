@@ -0,0 +1,215 @@
+"""
+Pool of pre-spawned, pre-imported idle presence workers.
+"""
+
+import sys
+import threading
+import multiprocessing as _mp
+from multiprocessing.connection import Connection
+from typing import List, Optional, Any, Dict
+
+from .logger import logger
+from .process_utils import wait_for_exit
+from .status_channel import (
+    StatusChannel,
+    flush_status_channels,
+    install_status_channel,
+)
+
+
+def pooled_worker_main(
+    jobs: Connection,
+    stop_event: Any,
+    status_channel: Optional[StatusChannel] = None,
+) -> None:
+    """
+    Idle worker entrypoint. Imports the worker stack up front, then waits for
+    a job (a PresenceJob) and runs it.
+
+    Parameters:
+        jobs (Connection): Receiving end of the job pipe, then used as the
+            control pipe of the presence.
+        stop_event (Any): Multiprocessing Event handed to the presence.
+        status_channel (Optional[StatusChannel]): Status channel of this worker.
+    """
+    # pylint: disable=import-outside-toplevel
+    from .worker import log_bootstrap, run_presence
+
+    log_bootstrap()
+    install_status_channel(status_channel)
+    try:
+        job = jobs.recv()
+    except (EOFError, OSError):
+        jobs.close()
+        return
+    if job is None:
+        jobs.close()
+        return
+    # the job pipe stays open as the control pipe of the presence
+    exit_code = run_presence(job, stop_event=stop_event, control=jobs)
+    flush_status_channels()
+    if exit_code:
+        sys.exit(exit_code)
+
+
+def get_worker_context() -> Any:
+    """
+    Return the multiprocessing context used for worker processes.
+    On Linux a forkserver with the worker stack preloaded is used, so each
+    new worker forks from an already-initialized interpreter.
+    """
+    if sys.platform.startswith("linux"):
+        try:
+            ctx = _mp.get_context("forkserver")
+            ctx.set_forkserver_preload(["src.worker"])
+            return ctx
+        except ValueError:
+            logger.debug("forkserver start method not available")
+    return _mp.get_context()
+
+
+class PooledWorker:
+    """
+    An idle worker process waiting for a job.
+    """
+
+    def __init__(self, process: Any, jobs: Connection, stop_event: Any):
+        self.process = process
+        self.stop_event = stop_event
+        self._jobs = jobs
+
+    @property
+    def control(self) -> Connection:
+        """Control pipe of the presence once a job was submitted."""
+        return self._jobs
+
+    def submit(self, job: Dict[str, Any]) -> None:
+        """Hand a job to the worker. The worker runs a single job."""
+        try:
+            self._jobs.send(job)
+        except Exception:
+            self._jobs.close()
+            raise
+
+    def discard(self) -> None:
+        """Tell an idle worker to exit without running a job."""
+        try:
+            self._jobs.send(None)
+            self._jobs.close()
+        except Exception:
+            pass
+
+
+class WorkerPool:
+    """
+    Keeps a small number of idle workers ready so starting a presence only
+    needs to hand over a job instead of booting a new interpreter.
+    """
+
+    def __init__(
+        self,
+        size: int = 2,
+        ctx: Optional[Any] = None,
+        status: Optional[Any] = None,
+    ):
+        self.size = size
+        self.ctx = ctx if ctx is not None else get_worker_context()
+        # StatusBoard opening the status channel of each worker
+        self.status = status
+        self._idle: List[PooledWorker] = []
+        self._lock = threading.Lock()
+        self._closed = False
+        self._counter = 0
+        # workers being spawned, counted against the size of the pool
+        self._spawning = 0
+        self._retired: List[PooledWorker] = []
+
+    def _spawn(self, number: int) -> Optional[PooledWorker]:
+        jobs_recv, jobs_send = self.ctx.Pipe(duplex=False)
+        stop_event = self.ctx.Event()
+        channel = self.status.open_channel() if self.status is not None else None
+        process = self.ctx.Process(
+            target=pooled_worker_main,
+            args=(jobs_recv, stop_event, channel),
+            name=f"rpp-pool-{number}",
+            daemon=False,
+        )
+        try:
+            process.start()
+        except Exception:
+            logger.exception("Failed to spawn pooled worker")
+            return None
+        finally:
+            if channel is not None:
+                channel.close()
+        jobs_recv.close()
+        logger.debug("Spawned pooled worker pid=%s", process.pid)
+        return PooledWorker(process, jobs_send, stop_event)
+
+    def fill(self) -> None:
+        """
+        Spawn idle workers until the pool is full. A slot is reserved under
+        the lock before each spawn, so concurrent fills never overshoot.
+        """
+        while True:
+            with self._lock:
+                if self._closed or len(self._idle) + self._spawning >= self.size:
+                    return
+                self._spawning += 1
+                self._counter += 1
+                number = self._counter
+            try:
+                worker = self._spawn(number)
+            except Exception:
+                # e.g. out of file descriptors for the pipes
+                logger.exception("Failed to spawn pooled worker")
+                worker = None
+            with self._lock:
+                self._spawning -= 1
+                if worker is None:
+                    return
+                if self._closed:
+                    self._retired.append(worker)
+                    worker.discard()
+                    return
+                self._idle.append(worker)
+
+    def fill_async(self) -> None:
+        """Refill the pool in a background thread."""
+        threading.Thread(target=self.fill, daemon=True).start()
+
+    def acquire(self) -> Optional[PooledWorker]:
+        """
+        Take an idle worker from the pool, or None if none is ready.
+        The pool is refilled in the background.
+        """
+        worker = None
+        with self._lock:
+            while self._idle:
+                candidate = self._idle.pop(0)
+                if candidate.process.is_alive():
+                    worker = candidate
+                    break
+        if not self._closed:
+            self.fill_async()
+        return worker
+
+    def close(self) -> None:
+        """Stop handing out workers and tell the idle ones to exit."""
+        with self._lock:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._retired.extend(idle)
+        for worker in idle:
+            worker.discard()
+
+    def shutdown(self, timeout: float = 2.0) -> None:
+        """Stop every idle worker, waiting for all of them together."""
+        self.close()
+        with self._lock:
+            retired, self._retired = self._retired, []
+        stragglers = wait_for_exit([worker.process for worker in retired], timeout)
+        for process in stragglers:
+            process.terminate()
+        if stragglers:
+            wait_for_exit(stragglers, 1.0)
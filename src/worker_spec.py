@@ -4,7 +4,7 @@ Worker specification dataclass.
 
 import dataclasses
 import threading
-from typing import Optional, Any
+from typing import List, Optional, Any
 from .constants import config
 
 
@@ -25,13 +25,21 @@ class WorkerSpecification:
     runs: int = 0
     verified: bool = False
     web: bool = False
+    hosted: bool = False
+    armed: bool = False
     running: bool = False
     description: Optional[str] = None
     on_exit: Optional[str] = None
     image: Optional[str] = None
+    started_at: Optional[float] = None
+    startup_latency: Optional[float] = None
     # thread: Optional[threading.Thread] = dataclasses.field(default=None, repr=False)  # Not used
     process: Optional[Any] = dataclasses.field(default=None, repr=False)
     stop_event: Optional[threading.Event] = dataclasses.field(default=None, repr=False)
     shared_state: Optional[Any] = dataclasses.field(default=None, repr=False)
+    manifest_sha: Optional[str] = dataclasses.field(default=None, repr=False)
+    compiled: Optional[Any] = dataclasses.field(default=None, repr=False)
+    control: Optional[Any] = dataclasses.field(default=None, repr=False)
+    matches: List[str] = dataclasses.field(default_factory=list)
     # last_exception: Optional[str] = dataclasses.field(default=None, repr=False)  # Not used
     # runtime: Optional[Any] = dataclasses.field(default=None, repr=False)  # Not used